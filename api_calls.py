@@ -52,6 +52,37 @@ def generate_flood_model() -> str:
     return response_body["taskId"]
 
 
+def generate_flood_model_sweep() -> list:
+    # Create request data for getting flood model data for several scenarios over the same region over Kaiapoi
+    request_data = {
+        "bbox": {
+            "lat1": -43.370613130921434,
+            "lng1": 172.65156000179044,
+            "lng2": 172.71678302522903,
+            "lat2": -43.400136655560765
+        },
+        "scenarioOptions": [
+            {
+                "Projected Year": projected_year,
+                "SSP Scenario": "SSP2-4.5",
+                "Confidence Level": "medium",
+                "Add Vertical Land Movement": True,
+                "Rainfall ARI": rainfall_ari
+            }
+            for projected_year in (2050, 2100)
+            for rainfall_ari in (10, 100)
+        ]
+    }
+    print(f"Requesting backend to generate flood model sweep for {request_data}")
+    generate_sweep_response = requests.post(f"{backend_url}/models/sweep", json=request_data)
+    # Check for errors (400/500 codes)
+    generate_sweep_response.raise_for_status()
+    # Load the body JSON into a python dict
+    response_body = json.loads(generate_sweep_response.text)
+    # Read the task id of each scenario, each can be polled using poll_for_completion
+    return response_body["taskIds"]
+
+
 def poll_for_completion(task_id: str) -> int:
     """Returns task value of completed task e.g. generate model task -> model output id"""
     # Retry forever until the task is complete
@@ -72,6 +103,47 @@ def poll_for_completion(task_id: str) -> int:
     return task_value
 
 
+def stream_until_completion(task_id: str) -> int:
+    """Returns task value of completed task, receiving status updates as they happen instead of polling"""
+    response_body = None
+    task_status = None
+    # The server closes each stream after a few minutes, so reconnect until the task has finished
+    while task_status not in states.READY_STATES:
+        if response_body is not None:
+            # 5 Second delay before reconnecting, as requested by the server's retry field
+            time.sleep(5)
+            print("Reconnecting to task status stream...")
+        # The server sends a status event whenever the task status or its stage progress changes
+        with requests.get(f"{backend_url}/tasks/{task_id}/stream", stream=True) as task_status_stream:
+            if task_status_stream.status_code == 503:
+                # Too many streams are open, so wait as long as the server asks before trying again
+                retry_after = int(task_status_stream.headers.get("Retry-After", 5))
+                print(f"Task status stream unavailable, retrying in {retry_after}s...")
+                time.sleep(retry_after)
+                continue
+            task_status_stream.raise_for_status()
+            event = None
+            for line in task_status_stream.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line.removeprefix("event: ")
+                # Skip keep-alive comments, retry fields and blank lines between events
+                if not line.startswith("data: "):
+                    continue
+                if event == "unknown":
+                    # The task is still PENDING without any stages, so the task id is unknown or has expired
+                    raise RuntimeError(f"Task {task_id} is not known to the backend")
+                response_body = json.loads(line.removeprefix("data: "))
+                print(response_body)
+                task_status = response_body["taskStatus"]
+        if response_body is None:
+            raise RuntimeError(f"Task status stream for {task_id} closed without sending a status")
+    if task_status != states.SUCCESS:
+        raise RuntimeError(f"Task {task_id} finished with status {task_status}")
+    task_value = response_body['taskValue']
+    print(f"Task completed with value {task_value}")
+    return task_value
+
+
 def get_building_statuses(model_id: int) -> GeoDataFrame:
     # Retrieve building statuses
     building_response = requests.get(f"{backend_url}/models/{model_id}/buildings")
@@ -96,6 +168,23 @@ def get_depths_at_point(task_id: str):
     print(response_body)
 
 
+def get_depths_along_transect(task_id: str):
+    transect = {
+        "transect": [{"lat": -43.39, "lng": 172.65}, {"lat": -43.40, "lng": 172.66}],
+        "interval": 10,
+        "variables": ["h", "hmax"]
+    }
+    # Send a request to get the depths every 10m along a transect for a flood model associated with a task
+    print(f"requesting depths along transect {transect['transect']}")
+    depths_response = requests.post(f"{backend_url}/tasks/{task_id}/model/depths", json=transect)
+
+    # Check for errors (400/500 codes)
+    depths_response.raise_for_status()
+    # Load the body JSON into a python dict
+    response_body = depths_response.json()
+    print(f"received {len(response_body['distance'])} sampled points")
+
+
 def fetch_new_dataset_table():
     # Update LiDAR datasets, takes a long time.
     print("Refreshing LiDAR OpenTopography URLs to get newest LiDAR data")
@@ -116,9 +205,10 @@ def stop_task(task_id: str):
 def main():
     perform_health_check()
     flood_generation_task_id = generate_flood_model()
-    model_output_id = poll_for_completion(flood_generation_task_id)
+    model_output_id = stream_until_completion(flood_generation_task_id)
     get_building_statuses(model_output_id)
     get_depths_at_point(flood_generation_task_id)
+    get_depths_along_transect(flood_generation_task_id)
 
 
 if __name__ == '__main__':
@@ -4,19 +4,30 @@
 import logging
 import pathlib
 from functools import wraps
-from http.client import OK, ACCEPTED, BAD_REQUEST, INTERNAL_SERVER_ERROR, NOT_FOUND, SERVICE_UNAVAILABLE
-from typing import Callable, Dict, Tuple
+from http.client import (OK, ACCEPTED, BAD_REQUEST, GATEWAY_TIMEOUT, INTERNAL_SERVER_ERROR, NOT_FOUND,
+                         SERVICE_UNAVAILABLE)
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import requests
-from celery import result, states
+import pyarrow as pa
+import xarray
+from celery import group, result, states
 from flask import Flask, Response, jsonify, make_response, send_file, request
 from flask_cors import CORS
 from flask_swagger_ui import get_swaggerui_blueprint
-from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
 from shapely import box
 
-from src import tasks
+from src import task_events, task_results, tasks, worker_health
 from src.config import EnvVariable
+from src.digitaltwin import setup_environment
+from src.dynamic_boundary_conditions.rainfall.hirds_rainfall_data_from_db import HIRDS_ARIS
+from src.flood_model import building_flood_statuses, model_output_reader, model_output_subset, model_tiles
+from src.flood_model.building_flood_statuses import FeatureFormat
+from src.flood_model.model_output_subset import OutputFormat
+from src.flood_model.model_output_reader import MAX_SAMPLE_POINTS, OutputVariable
+from src.response_cache import immutable_model_response
+from src.response_encoding import arrow_response, compressible, wants_arrow
+from src.task_results import TaskTimeoutError
 
 # Initialise flask server object
 app = Flask(__name__)
@@ -57,11 +68,11 @@ def check_celery_alive(f: Callable[..., Response]) -> Callable[..., Response]:
             SERVICE_UNAVAILABLE if Celery workers are down, otherwise response from function `f`.
         """
         try:
-            ping_celery_response = tasks.app.control.ping()
-            if len(ping_celery_response) == 0:
+            # Read the workers' heartbeats rather than pinging them, which would wait for replies on every request
+            if worker_health.count_live_workers(tasks.app.backend.client) == 0:
                 logging.warning("Celery workers not active, may indicate a fault")
                 return make_response("Celery workers not active", SERVICE_UNAVAILABLE)
-        except OperationalError:
+        except RedisError:
             logging.warning("Celery workers not active, may indicate a fault")
             return make_response("Celery workers not active", SERVICE_UNAVAILABLE)
         return f(*args, **kwargs)
@@ -69,6 +80,33 @@ def check_celery_alive(f: Callable[..., Response]) -> Callable[..., Response]:
     return decorated_function
 
 
+@app.errorhandler(TaskTimeoutError)
+def task_timeout(error: TaskTimeoutError) -> Response:
+    """
+    Respond to requests that timed out waiting for the result of a Celery task.
+
+    Parameters
+    ----------
+    error : TaskTimeoutError
+        The error raised when waiting for the task result timed out.
+
+    Returns
+    -------
+    Response
+        GATEWAY_TIMEOUT, since the Celery workers did not respond in time.
+    """
+    logging.warning(str(error))
+    return make_response(f"Timed out waiting for Celery workers after {EnvVariable.API_TASK_TIMEOUT}s", GATEWAY_TIMEOUT)
+
+
+# The scenario options that every model run requires
+REQUIRED_SCENARIO_OPTIONS = ("Projected Year", "SSP Scenario", "Confidence Level", "Add Vertical Land Movement")
+# The SSP scenarios that sea level rise data is available for, at each confidence level
+SSP_SCENARIOS_BY_CONFIDENCE_LEVEL = {
+    "low": ("SSP1-2.6", "SSP2-4.5", "SSP5-8.5"),
+    "medium": ("SSP1-1.9", "SSP1-2.6", "SSP2-4.5", "SSP3-7.0", "SSP5-8.5"),
+}
+
 # Serve API documentation
 SWAGGER_URL = "/swagger"
 API_URL = "/static/api_documentation.yml"
@@ -94,6 +132,7 @@ def index() -> Response:
     return Response("""
     Backend is receiving requests.
     GET /health-check to check if celery workers active.
+    GET /health-check/details to get the number of celery workers and queued tasks.
     GET /swagger to get API documentation.
     """, OK)
 
@@ -113,6 +152,33 @@ def health_check() -> Response:
     return Response("Healthy", OK)
 
 
+@app.route('/health-check/details')
+def health_check_details() -> Response:
+    """
+    Report the liveness of the Celery workers, the number of live workers and the number of tasks waiting in each queue.
+    Supported methods: GET
+
+    Returns
+    -------
+    Response
+        JSON response in the form {"workersAlive": boolean, "workerCount": number, "workers": Array<object>,
+        "queueDepths": {queue: number}}. OK if any workers are alive, otherwise SERVICE_UNAVAILABLE.
+    """
+    redis_client = tasks.app.backend.client
+    try:
+        workers = worker_health.get_live_workers(redis_client)
+        queue_depths = worker_health.get_queue_depths(redis_client, tasks.TaskQueue)
+    except RedisError:
+        logging.warning("Message broker not reachable, may indicate a fault")
+        return make_response("Message broker not reachable", SERVICE_UNAVAILABLE)
+    return make_response(jsonify({
+        "workersAlive": len(workers) > 0,
+        "workerCount": len(workers),
+        "workers": workers,
+        "queueDepths": queue_depths,
+    }), OK if workers else SERVICE_UNAVAILABLE)
+
+
 @app.route('/tasks/<task_id>', methods=["GET"])
 def get_status(task_id: str) -> Response:
     """
@@ -130,10 +196,73 @@ def get_status(task_id: str) -> Response:
         JSON response containing taskStatus
     """
     task_result = result.AsyncResult(task_id, app=tasks.app)
+    task_status, http_status = get_task_status_body(task_result)
+    return make_response(jsonify(task_status), http_status)
+
+
+@app.route('/tasks/<task_id>/stream', methods=["GET"])
+def stream_status(task_id: str) -> Response:
+    """
+    Stream the status of a particular Celery backend task as Server-Sent Events, instead of polling for it.
+    A "status" event with the same body as GET /tasks/<task_id> is sent straight away, and again only when the status of
+    the task or the progress of its stages changes. The stream ends once the task has finished, after a bounded time for
+    the client to reconnect, or with an "unknown" event if the task is unknown.
+    Streams are refused with SERVICE_UNAVAILABLE and a Retry-After header while too many are already open.
+    Supported methods: GET
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the Celery task to stream the status of
+
+    Returns
+    -------
+    Response
+        text/event-stream response of status events, or SERVICE_UNAVAILABLE if too many streams are open
+    """  # noqa: D400
+    # Each open stream holds a web server thread, so refuse streams that would leave too few threads for other requests
+    if not task_events.try_open_stream():
+        response = make_response("Too many task status streams are open, try again later", SERVICE_UNAVAILABLE)
+        response.headers["Retry-After"] = str(task_events.RECONNECT_DELAY // 1000)
+        return response
+
+    def get_status_body() -> Dict[str, Any]:
+        """Get the current status body of the task, reading it from the result backend again."""
+        task_status, _http_status = get_task_status_body(result.AsyncResult(task_id, app=tasks.app))
+        return task_status
+
+    response = Response(
+        task_events.stream_task_status(task_id, get_status_body),
+        status=OK,
+        mimetype="text/event-stream",
+        # Stop proxies from caching or buffering the events
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Release the stream when the server closes the response, even if the client disconnects before it is read
+    response.call_on_close(task_events.close_stream)
+    return response
+
+
+def get_task_status_body(task_result: result.AsyncResult) -> Tuple[Dict[str, Any], int]:
+    """
+    Create the JSON body describing the status of a Celery backend task.
+
+    Parameters
+    ----------
+    task_result : result.AsyncResult
+        The result of the Celery task to describe.
+
+    Returns
+    -------
+    Tuple[Dict[str, Any], int]
+        The JSON body containing taskId, taskStatus, taskValue and stages, and the HTTP status for the task.
+        The stages contain the progress and timing of each stage of a model run, and are empty for other tasks.
+    """
     status = task_result.status
     http_status = OK
     if status == states.SUCCESS:
-        task_value = task_result.get()
+        # The task has finished, so read its stored value rather than waiting on it with get()
+        task_value = task_result.result
     elif status == states.FAILURE:
         http_status = INTERNAL_SERVER_ERROR
         is_debug_mode = EnvVariable.DEBUG_TRACEBACK
@@ -141,11 +270,39 @@ def get_status(task_id: str) -> Response:
     else:
         task_value = None
 
-    return make_response(jsonify({
+    return {
         "taskId": task_result.id,
         "taskStatus": status,
-        "taskValue": task_value
-    }), http_status)
+        "taskValue": task_value,
+        "stages": tasks.get_model_stages_progress(task_result.id)
+    }, http_status
+
+
+@app.route('/groups/<group_id>', methods=["GET"])
+def get_group_status(group_id: str) -> Response:
+    """
+    Retrieve status of each task in a group of Celery backend tasks, e.g. the flood model tasks of a scenario sweep.
+    Supported methods: GET
+
+    Parameters
+    ----------
+    group_id : str
+        The id of the group of Celery tasks to retrieve status from
+
+    Returns
+    -------
+    Response
+        JSON response containing the status of each task in the group, in the order they were added to the group
+    """
+    group_result = result.GroupResult.restore(group_id, app=tasks.app)
+    if group_result is None:
+        return make_response(f"Could not find group {group_id}", NOT_FOUND)
+    task_statuses = [get_task_status_body(task_result)[0] for task_result in group_result.results]
+    return make_response(jsonify({
+        "groupId": group_result.id,
+        "completedCount": group_result.completed_count(),
+        "tasks": task_statuses
+    }), OK)
 
 
 @app.route('/tasks/<task_id>', methods=["DELETE"])
@@ -175,7 +332,9 @@ def generate_model() -> Response:
     """
     Generate a flood model for a given area.
     Supported methods: POST
-    POST values: {"bbox": {"lat1": number, "lat2": number, "lng1": number, "lng2": number}}
+    POST values: {"bbox": {"lat1": number, "lat2": number, "lng1": number, "lng2": number}, "scenarioOptions": {...},
+                  "force": boolean}
+    If a model has already been run with identical inputs then its output is reused, unless "force" is true.
 
     Returns
     -------
@@ -183,32 +342,198 @@ def generate_model() -> Response:
         ACCEPTED is the expected response. Response body contains Celery taskId
     """
     try:
-        bbox = request.get_json()["bbox"]
-        lat1 = float(bbox.get("lat1"))
-        lng1 = float(bbox.get("lng1"))
-        lat2 = float(bbox.get("lat2"))
-        lng2 = float(bbox.get("lng2"))
-        scenario_options = request.get_json()["scenarioOptions"]
-    except ValueError:
+        bbox_wkt = parse_bbox_wkt(request.get_json()["bbox"])
+    except ValueError as error:
+        return make_response(str(error), BAD_REQUEST)
+    scenario_options = request.get_json().get("scenarioOptions")
+    try:
+        validate_scenario_options(scenario_options)
+    except ValueError as error:
+        return make_response(str(error), BAD_REQUEST)
+    force = request.get_json().get("force", False)
+    if not isinstance(force, bool):
+        return make_response("JSON body parameter force must be a boolean", BAD_REQUEST)
+
+    if not force:
+        # Reuse the output of a previous model run with identical inputs, if there is one
+        cached_model_task = tasks.get_cached_model_id.delay(bbox_wkt, scenario_options)
+        try:
+            cached_model_id = task_results.wait_for_result(cached_model_task)
+        except TaskTimeoutError:
+            # A slow cache lookup should not stop the model from running, and identical runs are deduplicated anyway
+            logging.warning("Timed out looking up cached model output, running the model instead")
+            cached_model_id = None
+        if cached_model_id is not None:
+            # The cached model task's value is the model output id, so it can be used in place of a model run task
+            return make_response(
+                jsonify({"taskId": cached_model_task.id}),
+                ACCEPTED
+            )
+    task = tasks.create_model_for_area(bbox_wkt, scenario_options)
+
+    return make_response(
+        jsonify({"taskId": task.id}),
+        ACCEPTED
+    )
+
+
+@app.route('/models/sweep', methods=["POST"])
+@check_celery_alive
+def generate_model_sweep() -> Response:
+    """
+    Generate a flood model for a given area for each of a list of scenarios.
+    Work shared between the scenarios, such as the base data, DEM and river inputs, is only done once.
+    Scenarios that have already been run with identical inputs reuse their output, and scenarios that are already being
+    run join the in-flight model run.
+    Supported methods: POST
+    POST values: {"bbox": {"lat1": number, "lat2": number, "lng1": number, "lng2": number},
+                  "scenarioOptions": [{...}, ...]}
+
+    Returns
+    -------
+    Response
+        ACCEPTED is the expected response. Response body contains the Celery groupId of the sweep, and the taskId of
+        the flood model for each scenario in the same order as the scenarios.
+    """
+    try:
+        bbox_wkt = parse_bbox_wkt(request.get_json()["bbox"])
+    except ValueError as error:
+        return make_response(str(error), BAD_REQUEST)
+    scenario_options_list = request.get_json().get("scenarioOptions")
+    if not isinstance(scenario_options_list, list) or len(scenario_options_list) == 0:
+        return make_response("JSON body parameter scenarioOptions must be a non-empty list", BAD_REQUEST)
+    if len(scenario_options_list) > EnvVariable.MAX_SWEEP_SCENARIOS:
         return make_response(
-            "JSON values for bbox: lat1, lng1, lat2, lng2 must be valid floats", BAD_REQUEST
+            f"JSON body parameter scenarioOptions must have at most {EnvVariable.MAX_SWEEP_SCENARIOS} scenarios",
+            BAD_REQUEST
         )
-    if any(coord is None for coord in [lat1, lng1, lat2, lng2]):
-        return make_response("JSON body parameters bbox: {lat1, lng1, lat2, lng2} mandatory", BAD_REQUEST)
-    if not valid_coordinates(lat1, lng1) or not valid_coordinates(lat2, lng2):
-        return make_response("lat & lng must fall in the range -90 < lat <= 90, -180 < lng <= 180", BAD_REQUEST)
-    if (lat1, lng1) == (lat2, lng2):
-        return make_response("lat1, lng1 must not equal lat2, lng2", BAD_REQUEST)
+    try:
+        for scenario_options in scenario_options_list:
+            validate_scenario_options(scenario_options)
+    except ValueError as error:
+        return make_response(str(error), BAD_REQUEST)
 
-    bbox_wkt = create_wkt_from_coords(lat1, lng1, lat2, lng2)
-    task = tasks.create_model_for_area(bbox_wkt, scenario_options)
+    # Reuse the output of previous model runs with identical inputs, like single model runs do
+    cached_model_task_ids = find_cached_model_tasks(bbox_wkt, scenario_options_list)
+    sweep_result = tasks.create_sweep_for_area(bbox_wkt, scenario_options_list, cached_model_task_ids)
 
     return make_response(
-        jsonify({"taskId": task.id}),
+        jsonify({
+            "groupId": sweep_result.id,
+            "taskIds": [task_result.id for task_result in sweep_result.results]
+        }),
         ACCEPTED
     )
 
 
+def find_cached_model_tasks(bbox_wkt: str, scenario_options_list: List[dict]) -> List[Optional[str]]:
+    """
+    Find the output of previous model runs with identical inputs for each of a list of scenarios.
+    The lookups run in parallel, and are all treated as cache misses if they time out.
+
+    Parameters
+    ----------
+    bbox_wkt : str
+        The bbox defining the area of the model runs. Defined in WKT form.
+    scenario_options_list : List[dict]
+        Options for scenario modelling inputs, one for each scenario.
+
+    Returns
+    -------
+    List[Optional[str]]
+        For each scenario, the id of the lookup task whose value is the cached model output id, or None if the
+        scenario has no cached model output.
+    """  # noqa: D400
+    cached_model_tasks = group(
+        tasks.get_cached_model_id.s(bbox_wkt, scenario_options) for scenario_options in scenario_options_list
+    )()
+    try:
+        cached_model_ids = task_results.wait_for_result(cached_model_tasks)
+    except TaskTimeoutError:
+        # A slow cache lookup should not stop the models from running, and identical runs are deduplicated anyway
+        logging.warning("Timed out looking up cached model outputs, running the models instead")
+        return [None] * len(scenario_options_list)
+    return [
+        cached_model_task.id if cached_model_id is not None else None
+        for cached_model_task, cached_model_id in zip(cached_model_tasks.results, cached_model_ids)
+    ]
+
+
+def validate_scenario_options(scenario_options: Any) -> None:
+    """
+    Validate the scenario options from a request body, so that a model run is not started for options that it would
+    fail on, e.g. a missing option, an SSP scenario without sea level rise data or an ARI without HIRDS rainfall data.
+
+    Parameters
+    ----------
+    scenario_options : Any
+        The scenario options from the request body.
+
+    Raises
+    ------
+    ValueError
+        If the scenario options are not an object, a required option is missing or invalid, or the optional rainfall
+        ARI is not one of HIRDS_ARIS.
+    """  # noqa: D400
+    if not isinstance(scenario_options, dict):
+        raise ValueError("JSON body parameter scenarioOptions must be an object for each scenario")
+    missing_options = [option for option in REQUIRED_SCENARIO_OPTIONS if option not in scenario_options]
+    if missing_options:
+        raise ValueError(f"Scenario options {missing_options} are required")
+    # Booleans are ints in Python, so reject them explicitly
+    projected_year = scenario_options["Projected Year"]
+    if isinstance(projected_year, bool) or not isinstance(projected_year, (int, float)):
+        raise ValueError("Scenario option Projected Year must be a number")
+    confidence_level = scenario_options["Confidence Level"]
+    if not isinstance(confidence_level, str) or confidence_level not in SSP_SCENARIOS_BY_CONFIDENCE_LEVEL:
+        raise ValueError(f"Scenario option Confidence Level must be one of {list(SSP_SCENARIOS_BY_CONFIDENCE_LEVEL)}")
+    ssp_scenarios = SSP_SCENARIOS_BY_CONFIDENCE_LEVEL[confidence_level]
+    if scenario_options["SSP Scenario"] not in ssp_scenarios:
+        raise ValueError(
+            f"Scenario option SSP Scenario must be one of {list(ssp_scenarios)} for {confidence_level} confidence")
+    if not isinstance(scenario_options["Add Vertical Land Movement"], bool):
+        raise ValueError("Scenario option Add Vertical Land Movement must be a boolean")
+    ari = scenario_options.get("Rainfall ARI")
+    # Booleans compare equal to 1 and 0, so reject them explicitly
+    if "Rainfall ARI" in scenario_options and (isinstance(ari, bool) or ari not in HIRDS_ARIS):
+        raise ValueError(f"Scenario option Rainfall ARI must be one of {list(HIRDS_ARIS)}")
+
+
+def parse_bbox_wkt(bbox: Dict[str, Any]) -> str:
+    """
+    Validate the bbox from a request body and create a WKT bbox string from it.
+
+    Parameters
+    ----------
+    bbox : Dict[str, Any]
+        The bbox from the request body, in the form {"lat1": number, "lat2": number, "lng1": number, "lng2": number}
+
+    Returns
+    -------
+    str
+        bbox in wkt form
+
+    Raises
+    ------
+    ValueError
+        If the bbox is incomplete or invalid. The message describes what is wrong.
+    """
+    if any(bbox.get(coord) is None for coord in ["lat1", "lng1", "lat2", "lng2"]):
+        raise ValueError("JSON body parameters bbox: {lat1, lng1, lat2, lng2} mandatory")
+    try:
+        lat1 = float(bbox["lat1"])
+        lng1 = float(bbox["lng1"])
+        lat2 = float(bbox["lat2"])
+        lng2 = float(bbox["lng2"])
+    except ValueError as error:
+        raise ValueError("JSON values for bbox: lat1, lng1, lat2, lng2 must be valid floats") from error
+    if not valid_coordinates(lat1, lng1) or not valid_coordinates(lat2, lng2):
+        raise ValueError("lat & lng must fall in the range -90 < lat <= 90, -180 < lng <= 180")
+    if (lat1, lng1) == (lat2, lng2):
+        raise ValueError("lat1, lng1 must not equal lat2, lng2")
+    return create_wkt_from_coords(lat1, lng1, lat2, lng2)
+
+
 def create_wkt_from_coords(lat1: float, lng1: float, lat2: float, lng2: float) -> str:
     """
     Create a WKT bbox string from two points.
@@ -236,8 +561,29 @@ def create_wkt_from_coords(lat1: float, lng1: float, lat2: float, lng2: float) -
     return box(xmin, ymin, xmax, ymax).wkt
 
 
+def get_model_id_from_task(task_id: str) -> Optional[int]:
+    """
+    Get the ID of the model output created by a model generation task, for caching responses derived from it.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the task for generating a flood model.
+
+    Returns
+    -------
+    Optional[int]
+        The ID of the model output, or None if the task has not completed successfully.
+    """
+    model_task_result = result.AsyncResult(task_id, app=tasks.app)
+    if model_task_result.status != states.SUCCESS:
+        return None
+    return model_task_result.result
+
+
 @app.route('/tasks/<task_id>/model/depth', methods=["GET"])
-@check_celery_alive
+@compressible
+@immutable_model_response(get_model_id_from_task)
 def get_depth_at_point(task_id: str) -> Response:
     """
     Find the depths and times at a particular point for a given completed model output task.
@@ -253,7 +599,8 @@ def get_depth_at_point(task_id: str) -> Response:
     -------
     Response
         Returns JSON response in the form {"depth": Array<number>,  "time": Array<number>} representing the values
-        for the given point.
+        for the given point. Clients that accept "application/vnd.apache.arrow.stream" instead receive an Arrow IPC
+        stream with float64 "time" and float32 "depth" columns.
     """
     try:
         lat = request.args.get("lat", type=float)
@@ -268,23 +615,169 @@ def get_depth_at_point(task_id: str) -> Response:
     model_task_result = result.AsyncResult(task_id, app=tasks.app)
     status = model_task_result.status
     if status != states.SUCCESS:
-        response = make_response(f"Task {task_id} has status {status}, not {states.SUCCESS}", BAD_REQUEST)
-        # Explicitly set content-type because task_id may make browsers visiting this endpoint vulnerable to XSS
-        # For more info: SonarCloud RuleID pythonsecurity:S5131
-        response.mimetype = "text/plain"
-        return response
+        return incomplete_model_task_response(task_id, status)
 
-    model_id = model_task_result.get()
-    depth_task = tasks.get_depth_by_time_at_point.delay(model_id, lat, lng)
-    depths, times = depth_task.get()
+    model_id = model_task_result.result
+    # Read the model output in this process, since a round trip through the message broker takes longer than the read
+    depths, times = model_output_reader.get_depth_by_time_at_point(model_id, lat, lng)
 
+    if wants_arrow():
+        # Depths are packed as float32, times keep float64 precision for long simulations
+        depth_table = pa.table({"time": pa.array(times, pa.float64()), "depth": pa.array(depths, pa.float32())})
+        return arrow_response(depth_table)
     return make_response(jsonify({
         'depth': depths,
         'time': times
     }), OK)
 
 
+@app.route('/tasks/<task_id>/model/depths', methods=["POST"])
+@compressible
+def get_depths_at_points(task_id: str) -> Response:
+    """
+    Find the time series of model output variables at many points, or along a transect, for a given completed model
+    output task.
+    Supported methods: POST
+    POST values: {"points": [{"lat": number, "lng": number}, ...]}
+              or {"transect": [{"lat": number, "lng": number}, ...], "interval": number},
+              with optional "variables": Array<"h" | "zs" | "hmax">, defaulting to ["hmax"]
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the completed task for generating a flood model.
+
+    Returns
+    -------
+    Response
+        Returns columnar JSON response in the form {"time": Array<number>, "x": Array<number>, "y": Array<number>,
+        <variable>: Array<Array<number>>} where each variable holds a time series for each point, parallel to the NZTM
+        x and y coordinates of the points. Transects also have "distance": Array<number> along the transect in metres.
+        Clients that accept "application/vnd.apache.arrow.stream" instead receive an Arrow IPC stream with a row for
+        each point, a float32 time series for each variable, and the times as JSON in the "time" schema metadata.
+    """  # noqa: D400
+    body = request.get_json()
+    distances = None
+    try:
+        if not isinstance(body, dict):
+            raise ValueError("JSON body must be an object")
+        variables = parse_output_variables(body.get("variables", [OutputVariable.HMAX]))
+        if "points" in body:
+            lats, lngs = parse_lat_lngs(body["points"], "points")
+            if len(lats) > MAX_SAMPLE_POINTS:
+                raise ValueError(f"JSON body parameter points must not contain more than {MAX_SAMPLE_POINTS} points")
+            xs, ys = model_output_reader.transform_points(lats, lngs)
+        elif "transect" in body:
+            lats, lngs = parse_lat_lngs(body["transect"], "transect")
+            if len(lats) < 2:
+                raise ValueError("JSON body parameter transect must contain at least 2 points")
+            interval = body.get("interval")
+            if isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval <= 0:
+                raise ValueError("JSON body parameter interval must be a positive number of metres")
+            xs, ys, distances = model_output_reader.sample_transect(lats, lngs, interval)
+        else:
+            raise ValueError("JSON body parameters mandatory: points, or transect & interval")
+    except ValueError as error:
+        return make_response(str(error), BAD_REQUEST)
+    model_task_result = result.AsyncResult(task_id, app=tasks.app)
+    status = model_task_result.status
+    if status != states.SUCCESS:
+        return incomplete_model_task_response(task_id, status)
+
+    model_id = model_task_result.result
+    columns = model_output_reader.get_time_series_at_points(model_id, xs, ys, variables)
+    if distances is not None:
+        columns["distance"] = distances.tolist()
+    if wants_arrow():
+        return arrow_response(model_output_reader.time_series_to_arrow(columns))
+    return make_response(jsonify(columns), OK)
+
+
+def incomplete_model_task_response(task_id: str, status: str) -> Response:
+    """
+    Create the response for a request that needs a completed model output task, when the task has not succeeded.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the task for generating a flood model.
+    status : str
+        The status of the task.
+
+    Returns
+    -------
+    Response
+        BAD_REQUEST response describing the status of the task.
+    """
+    response = make_response(f"Task {task_id} has status {status}, not {states.SUCCESS}", BAD_REQUEST)
+    # Explicitly set content-type because task_id may make browsers visiting this endpoint vulnerable to XSS
+    # For more info: SonarCloud RuleID pythonsecurity:S5131
+    response.mimetype = "text/plain"
+    return response
+
+
+def parse_output_variables(variables: Any) -> List[OutputVariable]:
+    """
+    Validate the model output variables from a request body.
+
+    Parameters
+    ----------
+    variables : Any
+        The variables from the request body, expected to be a non-empty list of variable names.
+
+    Returns
+    -------
+    List[OutputVariable]
+        The model output variables, without duplicates.
+
+    Raises
+    ------
+    ValueError
+        If the variables are not a non-empty list of valid variable names.
+    """
+    valid_variables = [str(variable) for variable in OutputVariable]
+    if not isinstance(variables, list) or len(variables) == 0 or any(
+            variable not in valid_variables for variable in variables):
+        raise ValueError(f"JSON body parameter variables must be a non-empty list containing only {valid_variables}")
+    return [OutputVariable(variable) for variable in dict.fromkeys(variables)]
+
+
+def parse_lat_lngs(points: Any, parameter_name: str) -> Tuple[List[float], List[float]]:
+    """
+    Validate a list of points from a request body, and split them into latitudes and longitudes.
+
+    Parameters
+    ----------
+    points : Any
+        The points from the request body, expected to be a non-empty list in the form [{"lat": number, "lng": number}]
+    parameter_name : str
+        The name of the request body parameter, used in error messages.
+
+    Returns
+    -------
+    Tuple[List[float], List[float]]
+        The latitudes and the parallel longitudes of the points.
+
+    Raises
+    ------
+    ValueError
+        If the points are not a non-empty list of valid coordinates.
+    """
+    if not isinstance(points, list) or len(points) == 0:
+        raise ValueError(f"JSON body parameter {parameter_name} must be a non-empty list of {{lat, lng}} points")
+    try:
+        lats = [float(point["lat"]) for point in points]
+        lngs = [float(point["lng"]) for point in points]
+    except (KeyError, TypeError, ValueError) as error:
+        message = f"JSON body parameter {parameter_name} must only contain points with valid float lat & lng"
+        raise ValueError(message) from error
+    if not all(valid_coordinates(lat, lng) for lat, lng in zip(lats, lngs)):
+        raise ValueError("lat & lng must fall in the range -90 < lat <= 90, -180 < lng <= 180")
+    return lats, lngs
+
+
 @app.route('/scenarios/medusa/<int:scenario_id>', methods=["GET"])
+@compressible
 @check_celery_alive
 def get_rainfall_information(scenario_id: int) -> Response:
     """
@@ -317,7 +810,7 @@ def get_rainfall_information(scenario_id: int) -> Response:
         representing the values for the given point.
     """  # noqa: D400
     # Get medusa rainfall information
-    medusa_rainfall_dictionary = tasks.retrieve_medusa_input_parameters.delay(scenario_id).get()
+    medusa_rainfall_dictionary = task_results.run_task(tasks.retrieve_medusa_input_parameters, scenario_id)
 
     # Check if the scenario exists
     if medusa_rainfall_dictionary is None:
@@ -327,11 +820,14 @@ def get_rainfall_information(scenario_id: int) -> Response:
 
 
 @app.route('/models/<int:model_id>/buildings', methods=["GET"])
-@check_celery_alive
+@compressible
+@immutable_model_response(lambda model_id: model_id)
 def retrieve_building_flood_status(model_id: int) -> Response:
     """
     Retrieve information on building flood status, for a given flood model output ID.
-    It is recommended to use the geoserver API if it is possible, since this is a proxy around that.
+    Buildings are queried directly from the database and streamed as they are fetched.
+    Optional query param values: "crs": int, "format": "geojson" | "ndjson" | "arrow"
+    Without a format, clients that accept "application/vnd.apache.arrow.stream" receive the arrow format.
 
     Parameters
     ----------
@@ -341,51 +837,54 @@ def retrieve_building_flood_status(model_id: int) -> Response:
     Returns
     -------
     Response
-        Returns GeoJSON building layer for the area of the flood model output.
+        Returns GeoJSON building layer for the area of the flood model output, newline-delimited GeoJSON features, or an
+        Arrow IPC stream of building_outline_id, is_flooded and WKB geometry columns.
         Has a property "is_flooded" to designate if a building is flooded in that scenario or not
-    """
-    # Set output crs argument from request args
-    crs = request.args.get("crs", type=int, default=4326)
+    """  # noqa: D400
+    # Parse the raw values, since request.args.get silently ignores values that fail type conversion
+    try:
+        # Set output crs argument from request args
+        crs = int(request.args.get("crs", 4326))
+        default_format = FeatureFormat.ARROW if wants_arrow() else FeatureFormat.GEOJSON
+        feature_format = FeatureFormat(request.args.get("format", default_format))
+    except ValueError:
+        return make_response(
+            f"Query parameter crs must be an integer EPSG code, and format must be one of "
+            f"{[str(fmt) for fmt in FeatureFormat]}",
+            BAD_REQUEST)
 
+    engine = setup_environment.get_connection_from_profile()
     try:
         # Get bounding box of model output to filter vector data to that area
-        bbox = tasks.get_model_extents_bbox.delay(model_id).get()
+        bounds = building_flood_statuses.get_model_bounds(engine, model_id)
     except FileNotFoundError:
         return make_response(f"Could not find flood model output {model_id}", NOT_FOUND)
+    # Check the CRS before streaming, since the response status cannot change once the first features are sent
+    if not building_flood_statuses.is_crs_supported(engine, crs):
+        return make_response(f"Query parameter crs must be a supported EPSG code, got {crs}", BAD_REQUEST)
 
-    # Geoserver workspace is dependant on environment variables
-    db_name = EnvVariable.POSTGRES_DB
-    workspace_name = f"{db_name}-buildings"
-    store_name = f"{db_name} PostGIS"
-    # Set up geoserver request parameters
-    geoserver_host = EnvVariable.GEOSERVER_HOST
-    geoserver_port = EnvVariable.GEOSERVER_PORT
-    request_url = f"{geoserver_host}:{geoserver_port}/geoserver/{workspace_name}/ows"
-    params = {
-        "service": "WFS",
-        "version": "1.0.0",
-        "request": "GetFeature",
-        "typeName": f"{store_name}:building_flood_status",
-        "outputFormat": "application/json",
-        "srsName": f"EPSG:{crs}",  # Set output CRS
-        "viewParams": f"scenario:{model_id}",  # Choose scenario for flooded_buildings
-        "cql_filter": f"bbox(geometry,{bbox},'EPSG:2193')"  # Filter output to be only geometries inside the model bbox
-    }
-    # Request building statuses from geoserver
-    geoserver_response = requests.get(request_url, params)
-    # Serve those building statuses
+    # Serve the building statuses as they are fetched from the database
+    if feature_format == FeatureFormat.ARROW:
+        feature_stream = building_flood_statuses.stream_building_flood_statuses_arrow(engine, model_id, bounds, crs)
+    else:
+        feature_stream = building_flood_statuses.stream_building_flood_statuses(
+            engine, model_id, bounds, crs, feature_format)
     return Response(
-        geoserver_response.text,
-        status=geoserver_response.status_code,
-        content_type=geoserver_response.headers['content-type']
+        feature_stream,
+        status=OK,
+        mimetype=feature_format.mimetype
     )
 
 
 @app.route('/models/<int:model_id>', methods=['GET'])
+@immutable_model_response(lambda model_id: model_id)
 @check_celery_alive
 def serve_model_output(model_id: int) -> Response:
     """
-    Serve the specified model output as a raw file.
+    Serve the specified model output as a raw file, or a subset of it.
+    Optional query param values: "variables": comma separated e.g. "h,zs", "startTime": number, "endTime": number,
+    "bbox": "minLng,minLat,maxLng,maxLat", "format": "netcdf" | "geotiff" | "csv".
+    If any are given then only the subset is served, streamed in chunks, otherwise the whole file is served.
 
     Parameters
     ----------
@@ -395,13 +894,108 @@ def serve_model_output(model_id: int) -> Response:
     Returns
     -------
     Response
-        HTTP Response containing the model output file.
+        HTTP Response containing the model output file, or the subset of it.
+    """  # noqa: D400
+    subset_parameters = ("variables", "startTime", "endTime", "bbox", "format")
+    is_subset = any(parameter in request.args for parameter in subset_parameters)
+    # Parse the raw values, since request.args.get silently ignores values that fail type conversion
+    variables = request.args["variables"].split(",") if "variables" in request.args else None
+    try:
+        time_range = tuple(
+            float(request.args[parameter]) if parameter in request.args else None
+            for parameter in ("startTime", "endTime"))
+    except ValueError:
+        return make_response("Query parameters startTime & endTime must be valid floats", BAD_REQUEST)
+    try:
+        bbox = parse_bbox_query(request.args["bbox"]) if "bbox" in request.args else None
+    except ValueError:
+        return make_response("Query parameter bbox must be 4 comma separated valid floats minLng,minLat,maxLng,maxLat "
+                             "with -90 < lat <= 90, -180 < lng <= 180", BAD_REQUEST)
+    try:
+        output_format = OutputFormat(request.args.get("format", OutputFormat.NETCDF))
+    except ValueError:
+        return make_response(f"Query parameter format must be one of {[str(fmt) for fmt in OutputFormat]}",
+                             BAD_REQUEST)
+    try:
+        model_filepath = pathlib.Path(
+            task_results.run_task(tasks.get_model_output_filepath_from_model_id, model_id))
+        if not is_subset:
+            return send_file(model_filepath)
+        with xarray.open_dataset(model_filepath, decode_coords="all") as ds:
+            subset = model_output_subset.select_subset(ds, variables, time_range, bbox)
+            subset_filepath = model_output_subset.write_subset(subset, output_format)
+    except FileNotFoundError:
+        return make_response(f"Could not find flood model output {model_id}", NOT_FOUND)
+    except ValueError as error:
+        return make_response(str(error), BAD_REQUEST)
+    return Response(
+        model_output_subset.stream_file(subset_filepath),
+        mimetype=output_format.mimetype,
+        headers={"Content-Disposition": f"attachment; filename={model_filepath.stem}_subset.{output_format.extension}"}
+    )
+
+
+def parse_bbox_query(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Parse and validate a bbox query parameter.
+
+    Parameters
+    ----------
+    bbox : str
+        The bbox query parameter, in the form "minLng,minLat,maxLng,maxLat".
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        The bbox as (min lng, min lat, max lng, max lat).
+
+    Raises
+    ------
+    ValueError
+        If the bbox does not contain 4 valid coordinates in order.
     """
+    min_lng, min_lat, max_lng, max_lat = map(float, bbox.split(","))
+    if not valid_coordinates(min_lat, min_lng) or not valid_coordinates(max_lat, max_lng):
+        raise ValueError("bbox coordinates out of range")
+    if min_lng >= max_lng or min_lat >= max_lat:
+        raise ValueError("bbox minimum coordinates must be less than maximum coordinates")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+@app.route('/models/<int:model_id>/tiles/<int:z>/<int:x>/<int:y>.png', methods=['GET'])
+@immutable_model_response(lambda model_id, **_: model_id)
+def get_model_output_tile(model_id: int, z: int, x: int, y: int) -> Response:
+    """
+    Serve an XYZ map tile of the maximum flood depths of the specified model output.
+    Tiles are rendered from a Cloud Optimized GeoTIFF of the model output without going through GeoServer.
+    Supported methods: GET
+
+    Parameters
+    ----------
+    model_id : int
+        The ID of the model output to be served.
+    z : int
+        The zoom level of the tile.
+    x : int
+        The column of the tile, from west to east.
+    y : int
+        The row of the tile, from north to south.
+
+    Returns
+    -------
+    Response
+        HTTP Response containing the PNG image of the tile.
+    """  # noqa: D400
+    if z > model_tiles.MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        return make_response(f"Tile {z}/{x}/{y} does not exist, zoom level must be at most {model_tiles.MAX_ZOOM}",
+                             BAD_REQUEST)
     try:
-        model_filepath = tasks.get_model_output_filepath_from_model_id.delay(model_id).get()
-        return send_file(pathlib.Path(model_filepath))
+        tile = model_tiles.get_tile(model_id, z, x, y)
     except FileNotFoundError:
         return make_response(f"Could not find flood model output {model_id}", NOT_FOUND)
+    except ValueError as error:
+        return make_response(str(error), BAD_REQUEST)
+    return Response(tile, status=OK, mimetype="image/png")
 
 
 @app.route('/datasets/update', methods=["POST"])
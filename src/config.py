@@ -98,14 +98,41 @@ class EnvVariable:  # pylint: disable=too-few-public-methods
     DATA_DIR_MODEL_OUTPUT = pathlib.Path(_get_env_variable("DATA_DIR_MODEL_OUTPUT"))
     DATA_DIR_GEOSERVER = pathlib.Path(_get_env_variable("DATA_DIR_GEOSERVER"))
     FLOOD_MODEL_DIR = pathlib.Path(_get_env_variable("FLOOD_MODEL_DIR"))
+    DATA_DIR_MODEL_WORKSPACE = pathlib.Path(
+        _get_env_variable("DATA_DIR_MODEL_WORKSPACE", default=str(DATA_DIR / "model_workspace")))
+    KEEP_MODEL_WORKSPACE = _get_bool_env_variable("KEEP_MODEL_WORKSPACE", default=False)
+    DATA_DIR_STAGE_ARTIFACTS = pathlib.Path(
+        _get_env_variable("DATA_DIR_STAGE_ARTIFACTS", default=str(DATA_DIR / "stage_artifacts")))
+    DATA_DIR_ARTIFACTS = pathlib.Path(_get_env_variable("DATA_DIR_ARTIFACTS", default=str(DATA_DIR / "artifacts")))
+    DATA_DIR_MODEL_TILES = pathlib.Path(
+        _get_env_variable("DATA_DIR_MODEL_TILES", default=str(DATA_DIR / "model_tiles")))
 
     POSTGRES_HOST = _get_env_variable("POSTGRES_HOST", default="localhost")
     POSTGRES_PORT = _get_env_variable("POSTGRES_PORT", default="5431")
     POSTGRES_DB = _get_env_variable("POSTGRES_DB", default="db")
     POSTGRES_USER = _get_env_variable("POSTGRES_USER", default="postgres")
     POSTGRES_PASSWORD = _get_env_variable("POSTGRES_PASSWORD")
+    # Connections kept open by each process, extra connections allowed under load, seconds to wait for a connection,
+    # seconds after which connections are replaced, and whether to check connections are alive before using them
+    POSTGRES_POOL_SIZE = int(_get_env_variable("POSTGRES_POOL_SIZE", default="5"))
+    POSTGRES_MAX_OVERFLOW = int(_get_env_variable("POSTGRES_MAX_OVERFLOW", default="10"))
+    POSTGRES_POOL_TIMEOUT = float(_get_env_variable("POSTGRES_POOL_TIMEOUT", default="30"))
+    POSTGRES_POOL_RECYCLE = int(_get_env_variable("POSTGRES_POOL_RECYCLE", default="1800"))
+    POSTGRES_POOL_PRE_PING = _get_bool_env_variable("POSTGRES_POOL_PRE_PING", default=True)
 
     MESSAGE_BROKER_HOST = _get_env_variable("MESSAGE_BROKER_HOST", default="localhost")
+    # The maximum time in seconds that a web request waits for the result of a Celery task
+    API_TASK_TIMEOUT = float(_get_env_variable("API_TASK_TIMEOUT", default="30"))
+    # The maximum time in seconds that a task status stream stays open before the client has to reconnect, since each
+    # open stream holds a web server thread
+    TASK_STREAM_MAX_DURATION = float(_get_env_variable("TASK_STREAM_MAX_DURATION", default="300"))
+    # The time in seconds after which a task status stream ends if the task is unknown, i.e. PENDING with no stages
+    TASK_STREAM_UNKNOWN_TIMEOUT = float(_get_env_variable("TASK_STREAM_UNKNOWN_TIMEOUT", default="30"))
+    # The maximum number of task status streams open at once in each web server process, so that streams cannot hold
+    # every thread of the process and block other requests
+    TASK_STREAM_MAX_OPEN = int(_get_env_variable("TASK_STREAM_MAX_OPEN", default="8"))
+    # The maximum number of scenarios in a single model sweep request, since each scenario runs a flood model
+    MAX_SWEEP_SCENARIOS = int(_get_env_variable("MAX_SWEEP_SCENARIOS", default="20"))
 
     GEOSERVER_HOST = _get_env_variable("GEOSERVER_HOST", default="http://localhost")
     GEOSERVER_PORT = _get_env_variable("GEOSERVER_PORT", default="8088")
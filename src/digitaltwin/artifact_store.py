@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+This script manages the shared artifact store on the data volume. Intermediate GeoDataFrames and DataFrames produced by
+one stage of a model run are published as GeoParquet or Parquet files, so that later stages and other workers can load
+them by reference instead of repeating the same database queries and geometry operations. Artifacts are published
+under the versions of the input datasets they were produced from, so that models running while a dataset is refreshed
+never load artifacts of the new versions, and artifacts of superseded versions are removed once the refresh has been
+committed.
+"""  # noqa: D400
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import uuid
+from typing import Dict, Optional
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.config import EnvVariable
+from src.digitaltwin.utils import get_catchment_area_wkt
+
+log = logging.getLogger(__name__)
+
+# The name of the file recording the dataset versions that the artifacts of an area reference were produced from
+DATASET_VERSIONS_FILE_NAME = "dataset_versions.json"
+
+
+def write_geoparquet(gdf: pd.DataFrame, file_path: pathlib.Path) -> None:
+    """
+    Write a GeoDataFrame to a GeoParquet file, or a DataFrame without geometries to a Parquet file.
+    The file is written to a temporary path first and then moved into place, so that readers in other workers never
+    see a partially written file.
+
+    Parameters
+    ----------
+    gdf : pd.DataFrame
+        The GeoDataFrame or DataFrame to write. All geometry columns are written as GeoParquet geometry columns.
+    file_path : pathlib.Path
+        The path of the GeoParquet file to write.
+    """  # noqa: D400
+    # Create the parent directory if it does not already exist
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file_path = file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex}.tmp")
+    gdf.to_parquet(temp_file_path, index=False)
+    # Atomically replace any existing file
+    os.replace(temp_file_path, file_path)
+
+
+def read_geoparquet(file_path: pathlib.Path) -> gpd.GeoDataFrame:
+    """
+    Read a GeoDataFrame from a GeoParquet file, memory-mapping the file rather than copying it into a buffer.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        The path of the GeoParquet file to read.
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        The GeoDataFrame read from the file.
+    """
+    return gpd.read_parquet(file_path, memory_map=True)
+
+
+def read_artifact(file_path: pathlib.Path) -> pd.DataFrame:
+    """
+    Read an artifact from a Parquet file, as a GeoDataFrame if it was written from one, otherwise as a DataFrame.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        The path of the Parquet file to read.
+
+    Returns
+    -------
+    pd.DataFrame
+        The GeoDataFrame or DataFrame read from the file.
+    """
+    # GeoParquet files record their geometry columns in the "geo" schema metadata
+    if b"geo" in (pq.read_schema(file_path).metadata or {}):
+        return read_geoparquet(file_path)
+    return pd.read_parquet(file_path, memory_map=True)
+
+
+def get_area_reference(catchment_area: gpd.GeoDataFrame, dataset_versions: Dict[str, int]) -> str:
+    """
+    Get the reference under which intermediate artifacts for a catchment area are published.
+
+    Parameters
+    ----------
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+    dataset_versions : Dict[str, int]
+        A dictionary mapping each dataset name to its current version.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 hash of the normalised catchment area and the dataset versions.
+    """
+    reference_inputs = {"catchment_area": get_catchment_area_wkt(catchment_area), "dataset_versions": dataset_versions}
+    serialised_inputs = json.dumps(reference_inputs, sort_keys=True)
+    return hashlib.sha256(serialised_inputs.encode("utf-8")).hexdigest()
+
+
+def get_area_artifact_path(
+        catchment_area: gpd.GeoDataFrame,
+        dataset_versions: Dict[str, int],
+        artifact_name: str) -> pathlib.Path:
+    """
+    Get the path of an intermediate artifact for a catchment area.
+
+    Parameters
+    ----------
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+    dataset_versions : Dict[str, int]
+        A dictionary mapping each dataset name to its current version.
+    artifact_name : str
+        The name of the artifact, e.g. 'hydro_dem_extent'.
+
+    Returns
+    -------
+    pathlib.Path
+        The path of the GeoParquet file for the artifact.
+    """
+    area_reference = get_area_reference(catchment_area, dataset_versions)
+    return EnvVariable.DATA_DIR_ARTIFACTS / area_reference / f"{artifact_name}.parquet"
+
+
+def publish_area_artifact(
+        catchment_area: gpd.GeoDataFrame,
+        dataset_versions: Dict[str, int],
+        artifact_name: str,
+        gdf: pd.DataFrame) -> None:
+    """
+    Publish an intermediate artifact for a catchment area to the artifact store.
+
+    Parameters
+    ----------
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+    dataset_versions : Dict[str, int]
+        A dictionary mapping each dataset name to its current version, which the artifact was produced from.
+    artifact_name : str
+        The name of the artifact, e.g. 'hydro_dem_extent'.
+    gdf : pd.DataFrame
+        The intermediate GeoDataFrame or DataFrame to publish.
+    """
+    artifact_path = get_area_artifact_path(catchment_area, dataset_versions, artifact_name)
+    # Record the dataset versions before publishing, so that the artifacts can be removed once they are superseded
+    versions_path = artifact_path.with_name(DATASET_VERSIONS_FILE_NAME)
+    if not versions_path.exists():
+        versions_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_versions_path = versions_path.with_name(f"{versions_path.name}.{uuid.uuid4().hex}.tmp")
+        temp_versions_path.write_text(json.dumps(dataset_versions, sort_keys=True))
+        os.replace(temp_versions_path, versions_path)
+    write_geoparquet(gdf, artifact_path)
+    log.debug(f"Published '{artifact_name}' artifact to '{artifact_path}'.")
+
+
+def load_area_artifact(
+        catchment_area: gpd.GeoDataFrame,
+        dataset_versions: Dict[str, int],
+        artifact_name: str) -> Optional[pd.DataFrame]:
+    """
+    Load an intermediate artifact for a catchment area from the artifact store.
+
+    Parameters
+    ----------
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+    dataset_versions : Dict[str, int]
+        A dictionary mapping each dataset name to its current version, which the artifact must be produced from.
+    artifact_name : str
+        The name of the artifact, e.g. 'hydro_dem_extent'.
+
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        The intermediate GeoDataFrame or DataFrame, or None if the artifact has not been published.
+    """
+    artifact_path = get_area_artifact_path(catchment_area, dataset_versions, artifact_name)
+    try:
+        gdf = read_artifact(artifact_path)
+    except FileNotFoundError:
+        return None
+    log.debug(f"Loaded '{artifact_name}' artifact from '{artifact_path}'.")
+    return gdf
+
+
+def remove_superseded_area_artifacts(dataset_versions: Dict[str, int]) -> None:
+    """
+    Remove the artifacts of every area reference that was produced from versions of the input datasets other than the
+    current versions, since they can no longer be loaded. Artifacts without recorded dataset versions are removed too.
+
+    Parameters
+    ----------
+    dataset_versions : Dict[str, int]
+        A dictionary mapping each dataset name to its current version.
+    """  # noqa: D400
+    if not EnvVariable.DATA_DIR_ARTIFACTS.is_dir():
+        return
+    for area_dir in EnvVariable.DATA_DIR_ARTIFACTS.iterdir():
+        try:
+            area_versions = json.loads((area_dir / DATASET_VERSIONS_FILE_NAME).read_text())
+        except (OSError, ValueError):
+            area_versions = None
+        if area_versions != dataset_versions:
+            # Stages loading a removed artifact find it missing and produce it again
+            shutil.rmtree(area_dir, ignore_errors=True)
+            log.debug(f"Removed superseded artifacts '{area_dir}'.")
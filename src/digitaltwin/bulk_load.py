@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+This script bulk loads DataFrames and GeoDataFrames into the database with PostgreSQL `COPY FROM STDIN`, which is much
+faster than the batched INSERT statements issued by `to_sql` and `to_postgis` for large tables. Rows are converted to
+CSV in chunks as the database reads them, with geometries as hex EWKB, so the whole CSV is never held in memory.
+Missing values are written with an explicit NULL marker, so that empty strings are loaded as empty strings.
+Tables created by a load get their managed indexes and planner statistics straight away, while appends only update them
+when requested, so that callers appending many small batches can do so once after the last batch.
+"""  # noqa: D400
+
+import logging
+from enum import StrEnum
+from typing import Iterator, List, Optional, Sequence
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import text
+
+from src.digitaltwin import table_indexes, tables
+
+log = logging.getLogger(__name__)
+
+# The number of rows converted to CSV at a time
+COPY_CHUNK_ROWS = 50000
+# The number of bytes sent to the database at a time
+COPY_BUFFER_BYTES = 1024 * 1024
+# The CSV value of missing values, since COPY would otherwise read empty strings as NULL
+COPY_NULL_MARKER = "\\N"
+
+
+class LoadMode(StrEnum):
+    """
+    StrEnum to represent how rows are loaded into a table.
+
+    Attributes
+    ----------
+    APPEND : str
+        Append the rows, creating the table if it does not exist.
+    REPLACE : str
+        Drop the table if it exists, create it again, and load the rows.
+    UPSERT : str
+        Load the rows into a staging table, then insert them into the table, updating rows that conflict on the
+        conflict columns. The table must have a unique constraint on the conflict columns.
+    """
+
+    APPEND = "append"
+    REPLACE = "replace"
+    UPSERT = "upsert"
+
+
+class _CsvChunkReader:
+    """
+    File-like object that converts a DataFrame to CSV chunk by chunk as it is read, for `COPY FROM STDIN`.
+
+    Parameters
+    ----------
+    chunks : Iterator[bytes]
+        The CSV chunks of the DataFrame.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._chunk = b""
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read up to `size` bytes of CSV, which may be fewer at the end of each chunk. Returns no bytes once all chunks
+        have been read.
+
+        Parameters
+        ----------
+        size : int = -1
+            The maximum number of bytes to read, or -1 to read the rest of the current chunk.
+
+        Returns
+        -------
+        bytes
+            The CSV bytes read.
+        """  # noqa: D400
+        if self._position >= len(self._chunk):
+            self._chunk = next(self._chunks, b"")
+            self._position = 0
+        end = len(self._chunk) if size < 0 else self._position + size
+        data = self._chunk[self._position:end]
+        self._position += len(data)
+        return data
+
+
+def _get_srid(gdf: gpd.GeoDataFrame) -> int:
+    """
+    Get the Spatial Reference System Identifier (SRID) of the geometries of a GeoDataFrame.
+
+    Parameters
+    ----------
+    gdf : gpd.GeoDataFrame
+        The GeoDataFrame.
+
+    Returns
+    -------
+    int
+        The EPSG code of the CRS of the GeoDataFrame, or 0, the unknown SRID, if it has no CRS.
+
+    Raises
+    ------
+    ValueError
+        If the CRS of the GeoDataFrame has no EPSG code, so that it cannot be stored as an SRID.
+    """
+    if gdf.crs is None:
+        return 0
+    srid = gdf.crs.to_epsg()
+    if srid is None:
+        raise ValueError(f"Cannot load geometries with CRS '{gdf.crs.name}', which has no EPSG code")
+    return srid
+
+
+def _iter_csv_chunks(df: pd.DataFrame) -> Iterator[bytes]:
+    """
+    Convert a DataFrame to CSV in chunks of COPY_CHUNK_ROWS rows, with the geometries of a GeoDataFrame as hex EWKB.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame or GeoDataFrame to convert.
+
+    Yields
+    ------
+    bytes
+        The next chunk of CSV, without a header. Missing values are COPY_NULL_MARKER.
+    """
+    srid = _get_srid(df) if isinstance(df, gpd.GeoDataFrame) else None
+    for start in range(0, len(df), COPY_CHUNK_ROWS):
+        chunk = df.iloc[start:start + COPY_CHUNK_ROWS]
+        if isinstance(chunk, gpd.GeoDataFrame):
+            geometry_column = chunk.geometry.name
+            geometries = shapely.set_srid(np.asarray(chunk.geometry.array), srid)
+            chunk = pd.DataFrame(chunk)
+            # EWKB includes the SRID, so that geometries match the SRID of the geometry column
+            chunk[geometry_column] = shapely.to_wkb(geometries, hex=True, include_srid=True)
+        yield chunk.to_csv(header=False, index=False, na_rep=COPY_NULL_MARKER).encode()
+
+
+def _create_table(conn: Connection, df: pd.DataFrame, table_name: str, if_exists: str) -> None:
+    """
+    Create a table with the columns of a DataFrame, without loading any rows.
+
+    Parameters
+    ----------
+    conn : Connection
+        The database connection, within the transaction that loads the rows.
+    df : pd.DataFrame
+        The DataFrame or GeoDataFrame to create the table for.
+    table_name : str
+        The name of the table to create.
+    if_exists : str
+        What to do if the table exists, "replace" or "fail".
+    """
+    if not isinstance(df, gpd.GeoDataFrame):
+        df.iloc[:0].to_sql(table_name, conn, if_exists=if_exists, index=False)
+        return
+    # to_postgis replaces the geometry type given in dtype with one inferred from the rows, of which there are none,
+    # so create the other columns with to_sql and add the geometry column with the dimensions of the rows explicitly
+    geometry_column = df.geometry.name
+    geometry_type = "GeometryZ" if df.has_z.any() else "Geometry"
+    pd.DataFrame(df.drop(columns=geometry_column).iloc[:0]).to_sql(
+        table_name, conn, if_exists=if_exists, index=False)
+    quote = conn.dialect.identifier_preparer.quote
+    conn.execute(text(f"ALTER TABLE {quote(table_name)} ADD COLUMN {quote(geometry_column)} "
+                      f"geometry({geometry_type}, {_get_srid(df)})"))
+    # Create the spatial index that to_postgis would have created
+    conn.execute(text(f"CREATE INDEX {quote(f'idx_{table_name}_{geometry_column}')} ON {quote(table_name)} "
+                      f"USING GIST ({quote(geometry_column)})"))
+
+
+def _copy_rows(conn: Connection, df: pd.DataFrame, table_name: str, columns: Sequence[str]) -> None:
+    """
+    Stream the rows of a DataFrame into an existing table with `COPY FROM STDIN`.
+
+    Parameters
+    ----------
+    conn : Connection
+        The database connection, within the transaction that loads the rows.
+    df : pd.DataFrame
+        The DataFrame or GeoDataFrame to load.
+    table_name : str
+        The name of the table to load the rows into.
+    columns : Sequence[str]
+        The names of the columns of the DataFrame, in order.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    copy_statement = (f"COPY {quote(table_name)} ({', '.join(quote(column) for column in columns)}) "
+                      f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL_MARKER}')")
+    # COPY is not part of the DB-API, so use the psycopg2 cursor of the connection, within the same transaction
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(copy_statement, _CsvChunkReader(_iter_csv_chunks(df)), size=COPY_BUFFER_BYTES)
+
+
+def _upsert_rows(
+        conn: Connection,
+        df: pd.DataFrame,
+        table_name: str,
+        columns: Sequence[str],
+        conflict_columns: Sequence[str]) -> None:
+    """
+    Load the rows of a DataFrame into a staging table, then insert them into an existing table, updating rows that
+    conflict on the conflict columns.
+
+    Parameters
+    ----------
+    conn : Connection
+        The database connection, within the transaction that loads the rows.
+    df : pd.DataFrame
+        The DataFrame or GeoDataFrame to load.
+    table_name : str
+        The name of the table to upsert the rows into.
+    columns : Sequence[str]
+        The names of the columns of the DataFrame, in order.
+    conflict_columns : Sequence[str]
+        The columns of the unique constraint that upserted rows conflict on.
+    """  # noqa: D400
+    quote = conn.dialect.identifier_preparer.quote
+    # Load the rows into a staging table dropped at the end of the transaction, then merge them into the table
+    staging_table_name = f"{table_name}_staging"
+    conn.execute(text(f"CREATE TEMP TABLE {quote(staging_table_name)} "
+                      f"(LIKE {quote(table_name)} INCLUDING DEFAULTS) ON COMMIT DROP"))
+    _copy_rows(conn, df, staging_table_name, columns)
+    column_list = ", ".join(quote(column) for column in columns)
+    update_columns = [column for column in columns if column not in conflict_columns]
+    conflict_action = "DO NOTHING" if not update_columns else "DO UPDATE SET " + ", ".join(
+        f"{quote(column)} = EXCLUDED.{quote(column)}" for column in update_columns)
+    conn.execute(text(f"""
+        INSERT INTO {quote(table_name)} ({column_list})
+        SELECT {column_list} FROM {quote(staging_table_name)}
+        ON CONFLICT ({", ".join(quote(column) for column in conflict_columns)}) {conflict_action}
+    """))
+
+
+def copy_to_db(
+        engine: Engine,
+        df: pd.DataFrame,
+        table_name: str,
+        mode: LoadMode = LoadMode.APPEND,
+        index: bool = False,
+        conflict_columns: Optional[List[str]] = None,
+        analyze: bool = False) -> int:
+    """
+    Bulk load a DataFrame or GeoDataFrame into a database table with `COPY FROM STDIN`, in a single transaction.
+    Tables created by this function have the column types that `to_sql` or `to_postgis` would give them, except that
+    geometry columns have a generic geometry type.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    df : pd.DataFrame
+        The DataFrame or GeoDataFrame to load.
+    table_name : str
+        The name of the table to load the rows into.
+    mode : LoadMode = LoadMode.APPEND
+        Whether to append the rows, replace the table, or upsert the rows.
+    index : bool = False
+        Whether to load the index of the DataFrame as columns, as with `to_sql`.
+    conflict_columns : Optional[List[str]] = None
+        The columns of the unique constraint that upserted rows conflict on. Required for LoadMode.UPSERT.
+    analyze : bool = False
+        Whether to create any missing managed indexes and ANALYZE the table after loading into an existing table, e.g.
+        after a large append. Tables created by the load, including replaced tables, are always indexed and analyzed.
+
+    Returns
+    -------
+    int
+        The number of rows loaded.
+
+    Raises
+    ------
+    ValueError
+        If the mode is LoadMode.UPSERT and no conflict columns are given, or the CRS of a GeoDataFrame has no EPSG code.
+    """  # noqa: D400
+    if mode == LoadMode.UPSERT and not conflict_columns:
+        raise ValueError("conflict_columns must be given to upsert rows")
+    if isinstance(df, gpd.GeoDataFrame):
+        # Check that the geometries have an SRID before starting the load, rather than part way through the COPY
+        _get_srid(df)
+    if index:
+        df = df.reset_index()
+    columns = [str(column) for column in df.columns]
+    log.debug(f"Loading {len(df)} rows into '{table_name}' ({mode}).")
+    creates_table = mode == LoadMode.REPLACE or not tables.check_table_exists(engine, table_name)
+    with engine.begin() as conn:
+        if creates_table:
+            _create_table(conn, df, table_name, if_exists="replace" if mode == LoadMode.REPLACE else "fail")
+        if mode != LoadMode.UPSERT:
+            _copy_rows(conn, df, table_name, columns)
+        else:
+            _upsert_rows(conn, df, table_name, columns, conflict_columns)
+    # The table exists once the transaction has been committed
+    tables.record_table_exists(engine, table_name)
+    if creates_table or analyze:
+        # Index tables created by the load, and update the planner statistics for the loaded rows
+        table_indexes.ensure_indexes(engine, [table_name], analyze=True)
+    return len(df)
@@ -12,8 +12,10 @@ import pandas as pd
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql import text
 
+from src.digitaltwin.bulk_load import LoadMode, copy_to_db
 from src.digitaltwin.tables import GeospatialLayers, UserLogInfo, create_table, check_table_exists, execute_query
 from src.digitaltwin.get_data_using_geoapis import fetch_vector_data_using_geoapis
+from src.digitaltwin.run_cache import DatasetName, refresh_dataset_version
 
 log = logging.getLogger(__name__)
 
@@ -151,6 +153,7 @@ def nz_geospatial_layers_data_to_db(
         verbose: bool = False) -> None:
     """
     Fetch New Zealand geospatial layers data using 'geoapis' and store it into the database.
+    If any layers are refreshed then cached model runs are invalidated.
 
     Parameters
     ----------
@@ -163,6 +166,8 @@ def nz_geospatial_layers_data_to_db(
     """
     # Get New Zealand geospatial layers
     nz_geo_layers = get_nz_geospatial_layers(engine)
+    # Keep track of whether any of the static data has been refreshed
+    static_data_refreshed = False
 
     # Iterate over each NZ geospatial layer
     for _, layer_row in nz_geo_layers.iterrows():
@@ -178,7 +183,12 @@ def nz_geospatial_layers_data_to_db(
             vector_data = fetch_vector_data_using_geoapis(data_provider, layer_id, crs, verbose)
             # Insert vector data into the database
             log.info(f"Adding '{table_name}' data ({data_provider} {layer_id}) to the database.")
-            vector_data.to_postgis(table_name, engine, index=False, if_exists="replace")
+            copy_to_db(engine, vector_data, table_name, LoadMode.REPLACE)
+            static_data_refreshed = True
+
+    if static_data_refreshed:
+        # Model runs using the previous static data are no longer valid
+        refresh_dataset_version(engine, DatasetName.STATIC_DATA)
 
 
 def get_non_intersection_area_from_db(
@@ -277,7 +287,7 @@ def process_new_non_nz_geospatial_layers(
     else:
         # Insert vector data into the database
         log.info(f"Adding '{table_name}' data ({data_provider} {layer_id}) for the catchment area to the database.")
-        vector_data.to_postgis(table_name, engine, index=False, if_exists="replace")
+        copy_to_db(engine, vector_data, table_name, LoadMode.REPLACE)
 
 
 def process_existing_non_nz_geospatial_layers(
@@ -328,7 +338,7 @@ def process_existing_non_nz_geospatial_layers(
             # Insert vector data into the database
             log.info(
                 f"Adding new '{table_name}' data ({data_provider} {layer_id}) for the catchment area to the database.")
-            vector_data_not_in_db.to_postgis(table_name, engine, index=False, if_exists="append")
+            copy_to_db(engine, vector_data_not_in_db, table_name, analyze=True)
         else:
             log.info(f"'{table_name}' data for the requested catchment area is already in the database.")
 
@@ -14,6 +14,7 @@ import pandas as pd
 import validators
 from sqlalchemy.engine import Engine
 
+from src.digitaltwin.bulk_load import copy_to_db
 from src.digitaltwin.tables import GeospatialLayers, create_table
 
 log = logging.getLogger(__name__)
@@ -183,4 +184,4 @@ def store_instructions_records_to_db(engine: Engine) -> None:
     else:
         # Store the non-existing records to the 'geospatial_layers' table
         log.info("Adding new 'static_boundary_instructions' records to the database.")
-        non_existing_records.to_sql(GeospatialLayers.__tablename__, engine, index=False, if_exists="append")
+        copy_to_db(engine, non_existing_records, GeospatialLayers.__tablename__)
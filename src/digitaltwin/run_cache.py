@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+"""
+This script fingerprints the inputs of a model run, so that the output of a previous model run with identical inputs
+can be reused instead of running the whole pipeline again.
+Each stage of a model run is fingerprinted in the same way, so that unchanged stages can be skipped and their output
+artifacts reused when only some of the inputs of a model run have changed.
+Cached model runs and stages are invalidated when the underlying input datasets are refreshed.
+"""  # noqa: D400
+
+import hashlib
+import json
+import logging
+import pathlib
+import shutil
+import uuid
+from datetime import datetime, timezone
+from enum import Enum, StrEnum
+from types import ModuleType
+from typing import Any, Dict, List, Optional
+
+import geopandas as gpd
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import text
+
+from src.config import EnvVariable
+from src.digitaltwin import artifact_store
+from src.digitaltwin.tables import BGFloodModelOutput, DatasetVersion, ModelRunCache, StageCache, create_table
+from src.digitaltwin.utils import get_catchment_area_wkt
+
+log = logging.getLogger(__name__)
+
+
+class DatasetName(StrEnum):
+    """
+    StrEnum to represent the groups of input datasets that are versioned.
+
+    Attributes
+    ----------
+    STATIC_DATA : str
+        Static boundary and national reference data, e.g. geospatial layers, REC, sea level rise and rainfall sites.
+    LIDAR : str
+        LiDAR data sources used to create the hydrologically conditioned DEM.
+    """
+
+    STATIC_DATA = "static_data"
+    LIDAR = "lidar"
+
+
+class ModelStage(StrEnum):
+    """
+    StrEnum to represent the stages of a model run that can be skipped when their inputs are unchanged.
+
+    Attributes
+    ----------
+    BASE_DATA : str
+        Static base data for the area of interest is added to the database.
+    DEM : str
+        The hydrologically-conditioned DEM for the area of interest is processed and added to the database.
+    RAINFALL : str
+        The rainfall model input files are created.
+    TIDE : str
+        The tide and sea level rise model input files are created.
+    RIVER : str
+        The river model input files are created.
+    """
+
+    BASE_DATA = "base_data"
+    DEM = "dem"
+    RAINFALL = "rainfall"
+    TIDE = "tide"
+    RIVER = "river"
+
+
+# The model input files written to the model workspace by each stage, matching the files read by the BG-Flood model
+STAGE_ARTIFACT_PATTERNS: Dict[ModelStage, List[str]] = {
+    ModelStage.RAINFALL: ["rain_forcing.*"],
+    ModelStage.TIDE: ["*_bnd.txt"],
+    ModelStage.RIVER: ["river[0-9]*.txt"],
+}
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Serialise values that the json module cannot serialise by default, for use in fingerprints.
+
+    Parameters
+    ----------
+    value : Any
+        The value to serialise.
+
+    Returns
+    -------
+    Any
+        A JSON serialisable form of the value.
+
+    Raises
+    ------
+    TypeError
+        If the value is of a type that cannot be serialised.
+    """
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} cannot be used in a fingerprint")
+
+
+def get_dataset_versions(engine: Engine) -> Dict[str, int]:
+    """
+    Get the current version of each group of input datasets.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+
+    Returns
+    -------
+    Dict[str, int]
+        A dictionary mapping each dataset name to its current version.
+    """
+    # Create the 'dataset_version' table if it doesn't exist
+    create_table(engine, DatasetVersion)
+    query = text(f"SELECT dataset_name, version FROM {DatasetVersion.__tablename__};")
+    with engine.connect() as conn:
+        rows = conn.execute(query).fetchall()
+    return {row["dataset_name"]: row["version"] for row in rows}
+
+
+def _fingerprint_inputs(inputs: Dict[str, Any]) -> str:
+    """
+    Create a fingerprint of a dictionary of inputs.
+
+    Parameters
+    ----------
+    inputs : Dict[str, Any]
+        The inputs to fingerprint. Must be JSON serialisable, apart from Enum values.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 fingerprint of the inputs.
+    """
+    # Sort the keys so that the same inputs always produce the same fingerprint, regardless of order
+    serialised_inputs = json.dumps(inputs, sort_keys=True, default=_json_default)
+    return hashlib.sha256(serialised_inputs.encode("utf-8")).hexdigest()
+
+
+def _parameters_without_log_level(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Remove the log level from module parameters, since it does not affect any outputs.
+
+    Parameters
+    ----------
+    parameters : Dict[str, Any]
+        The parameters used for the main function of a module.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The parameters without the log level.
+    """
+    return {name: value for name, value in parameters.items() if name != "log_level"}
+
+
+def refresh_dataset_version(engine: Engine, dataset_name: DatasetName) -> None:
+    """
+    Increment the version of a group of input datasets after it has been refreshed,
+    and remove all cached model runs and stages since they were produced with the previous version of the datasets.
+    The stage artifact directories of the removed stages, and the intermediate artifacts published under the previous
+    dataset versions, are deleted once the refresh has been committed.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    dataset_name : DatasetName
+        The name of the group of input datasets that has been refreshed.
+    """  # noqa: D400
+    # Create the tables if they don't exist
+    create_table(engine, DatasetVersion)
+    create_table(engine, ModelRunCache)
+    create_table(engine, StageCache)
+    updated_at = datetime.now(timezone.utc)
+    # Insert the first version of the datasets, or increment the version if it already exists
+    query = insert(DatasetVersion).values(dataset_name=dataset_name, version=1, updated_at=updated_at)
+    query = query.on_conflict_do_update(
+        index_elements=[DatasetVersion.dataset_name],
+        set_={"version": DatasetVersion.version + 1, "updated_at": updated_at}
+    )
+    with engine.begin() as conn:
+        conn.execute(query)
+        # Model runs and stages using the previous version of the datasets are no longer valid
+        conn.execute(delete(ModelRunCache))
+        artifact_dirs = conn.execute(delete(StageCache).returning(StageCache.artifact_dir)).scalars().all()
+    # Remove the artifacts of the removed stages, which can no longer be restored, so that they do not accumulate
+    for artifact_dir in artifact_dirs:
+        if artifact_dir is not None:
+            shutil.rmtree(artifact_dir, ignore_errors=True)
+    artifact_store.remove_superseded_area_artifacts(get_dataset_versions(engine))
+    log.info(f"Refreshed '{dataset_name}' dataset version and invalidated cached model runs.")
+
+
+def model_run_fingerprint(
+        catchment_area: gpd.GeoDataFrame,
+        scenario_options: dict,
+        modules_to_parameters: Dict[ModuleType, Dict[str, Any]],
+        dataset_versions: Dict[str, int]) -> str:
+    """
+    Create a fingerprint of all the inputs of a model run.
+    Model runs with the same fingerprint produce the same model output.
+
+    Parameters
+    ----------
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+    scenario_options : dict
+        Options for scenario modelling inputs.
+    modules_to_parameters : Dict[ModuleType, Dict[str, Any]]
+        A dictionary that associates each module with the parameters used for its main function.
+    dataset_versions : Dict[str, int]
+        A dictionary mapping each dataset name to its current version.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 fingerprint of the model run inputs.
+    """
+    fingerprint_inputs = {
+        "catchment_area": get_catchment_area_wkt(catchment_area),
+        "scenario_options": scenario_options,
+        "parameters": {
+            module.__name__: _parameters_without_log_level(parameters)
+            for module, parameters in modules_to_parameters.items()
+        },
+        "dataset_versions": dataset_versions,
+    }
+    return _fingerprint_inputs(fingerprint_inputs)
+
+
+def model_request_fingerprint(catchment_area: gpd.GeoDataFrame, scenario_options: dict) -> str:
+    """
+    Create a fingerprint of a model run request, i.e. the normalised catchment area and the scenario options.
+    Unlike the model run fingerprint it does not need the database, so that identical requests can be matched before
+    any work is started.
+
+    Parameters
+    ----------
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+    scenario_options : dict
+        Options for scenario modelling inputs.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 fingerprint of the model run request.
+    """  # noqa: D400
+    fingerprint_inputs = {
+        "catchment_area": get_catchment_area_wkt(catchment_area),
+        "scenario_options": scenario_options,
+    }
+    return _fingerprint_inputs(fingerprint_inputs)
+
+
+def get_cached_model_id(engine: Engine, fingerprint: str) -> Optional[int]:
+    """
+    Get the ID of the flood model output produced by a previous model run with the same fingerprint.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    fingerprint : str
+        The fingerprint of the model run inputs.
+
+    Returns
+    -------
+    Optional[int]
+        The ID of the cached flood model output, or None if there is no valid cached model run.
+    """
+    # Create the tables if they don't exist
+    create_table(engine, ModelRunCache)
+    create_table(engine, BGFloodModelOutput)
+    # Only return model outputs that still exist
+    query = text(f"""
+    SELECT cache.flood_model_id
+    FROM {ModelRunCache.__tablename__} AS cache
+    JOIN {BGFloodModelOutput.__tablename__} AS model_output ON cache.flood_model_id = model_output.unique_id
+    WHERE cache.fingerprint = :fingerprint;
+    """).bindparams(fingerprint=fingerprint)
+    with engine.connect() as conn:
+        row = conn.execute(query).fetchone()
+    return None if row is None else row["flood_model_id"]
+
+
+def store_model_run_in_cache(engine: Engine, fingerprint: str, flood_model_id: int) -> None:
+    """
+    Store the flood model output produced by a model run against the fingerprint of its inputs.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    fingerprint : str
+        The fingerprint of the model run inputs.
+    flood_model_id : int
+        The ID of the flood model output produced by the model run.
+    """
+    # Create the 'model_run_cache' table if it doesn't exist
+    create_table(engine, ModelRunCache)
+    created_at = datetime.now(timezone.utc)
+    # Replace any existing entry, for example when a model run has been forced
+    query = insert(ModelRunCache).values(fingerprint=fingerprint, flood_model_id=flood_model_id, created_at=created_at)
+    query = query.on_conflict_do_update(
+        index_elements=[ModelRunCache.fingerprint],
+        set_={"flood_model_id": flood_model_id, "created_at": created_at}
+    )
+    with engine.begin() as conn:
+        conn.execute(query)
+    log.info(f"Stored flood model output {flood_model_id} in the model run cache.")
+
+
+def stage_fingerprint(
+        stage: ModelStage,
+        catchment_area: gpd.GeoDataFrame,
+        parameters: Dict[str, Any],
+        dataset_versions: Dict[str, int]) -> str:
+    """
+    Create a fingerprint of all the inputs of a model run stage.
+    Stages with the same fingerprint produce the same outputs.
+
+    Parameters
+    ----------
+    stage : ModelStage
+        The model run stage.
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+    parameters : Dict[str, Any]
+        The parameters used for the main function of the stage's module, including any scenario options.
+    dataset_versions : Dict[str, int]
+        A dictionary mapping each dataset name to its current version.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 fingerprint of the stage inputs.
+    """
+    fingerprint_inputs = {
+        "stage": stage,
+        "catchment_area": get_catchment_area_wkt(catchment_area),
+        "parameters": _parameters_without_log_level(parameters),
+        "dataset_versions": dataset_versions,
+    }
+    return _fingerprint_inputs(fingerprint_inputs)
+
+
+def get_cached_stage(engine: Engine, stage: ModelStage, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the cache entry of a previously completed stage with the same fingerprint.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    stage : ModelStage
+        The model run stage.
+    fingerprint : str
+        The fingerprint of the stage inputs.
+
+    Returns
+    -------
+    Optional[Dict[str, Any]]
+        The cache entry containing the stage's 'artifact_dir', or None if the stage has not been completed.
+    """
+    # Create the 'stage_cache' table if it doesn't exist
+    create_table(engine, StageCache)
+    query = text(f"""
+    SELECT artifact_dir
+    FROM {StageCache.__tablename__}
+    WHERE stage = :stage AND fingerprint = :fingerprint;
+    """).bindparams(stage=str(stage), fingerprint=fingerprint)
+    with engine.connect() as conn:
+        row = conn.execute(query).fetchone()
+    return None if row is None else dict(row)
+
+
+def store_stage_in_cache(
+        engine: Engine,
+        stage: ModelStage,
+        fingerprint: str,
+        artifact_dir: Optional[pathlib.Path] = None) -> None:
+    """
+    Record that a stage has been completed with the given fingerprint, along with where its artifacts are stored.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    stage : ModelStage
+        The model run stage.
+    fingerprint : str
+        The fingerprint of the stage inputs.
+    artifact_dir : Optional[pathlib.Path] = None
+        Directory containing the output artifacts of the stage, or None if the stage only writes to the database.
+    """
+    # Create the 'stage_cache' table if it doesn't exist
+    create_table(engine, StageCache)
+    artifact_dir_str = None if artifact_dir is None else artifact_dir.as_posix()
+    created_at = datetime.now(timezone.utc)
+    query = insert(StageCache).values(
+        stage=str(stage), fingerprint=fingerprint, artifact_dir=artifact_dir_str, created_at=created_at)
+    query = query.on_conflict_do_update(
+        index_elements=[StageCache.stage, StageCache.fingerprint],
+        set_={"artifact_dir": artifact_dir_str, "created_at": created_at}
+    )
+    with engine.begin() as conn:
+        conn.execute(query)
+    log.debug(f"Stored '{stage}' stage {fingerprint} in the stage cache.")
+
+
+def save_stage_artifacts(engine: Engine, stage: ModelStage, fingerprint: str, model_workspace: pathlib.Path) -> None:
+    """
+    Copy the model input files produced by a stage from the model workspace into the stage artifact store,
+    and record the stage in the stage cache.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    stage : ModelStage
+        The model run stage.
+    fingerprint : str
+        The fingerprint of the stage inputs.
+    model_workspace : pathlib.Path
+        The model workspace containing the model input files produced by the stage.
+    """  # noqa: D400
+    artifact_dir = EnvVariable.DATA_DIR_STAGE_ARTIFACTS / stage / fingerprint
+    if not artifact_dir.exists():
+        # Copy into a temporary directory first, so that concurrent model runs never see partially copied artifacts
+        temp_artifact_dir = artifact_dir.with_name(f"{fingerprint}.{uuid.uuid4().hex}.tmp")
+        temp_artifact_dir.mkdir(parents=True)
+        for file_pattern in STAGE_ARTIFACT_PATTERNS[stage]:
+            for artifact_file in model_workspace.glob(file_pattern):
+                shutil.copy2(artifact_file, temp_artifact_dir)
+        try:
+            temp_artifact_dir.rename(artifact_dir)
+        except OSError:
+            # Another model run stored identical artifacts first
+            shutil.rmtree(temp_artifact_dir, ignore_errors=True)
+    store_stage_in_cache(engine, stage, fingerprint, artifact_dir)
+
+
+def restore_stage_artifacts(
+        engine: Engine,
+        stage: ModelStage,
+        fingerprint: str,
+        model_workspace: pathlib.Path) -> bool:
+    """
+    Copy the model input files of a previously completed stage with the same fingerprint into the model workspace.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    stage : ModelStage
+        The model run stage.
+    fingerprint : str
+        The fingerprint of the stage inputs.
+    model_workspace : pathlib.Path
+        The model workspace to copy the model input files into.
+
+    Returns
+    -------
+    bool
+        True if the stage artifacts were restored, or False if the stage needs to be run.
+    """
+    cached_stage = get_cached_stage(engine, stage, fingerprint)
+    if cached_stage is None or cached_stage["artifact_dir"] is None:
+        return False
+    artifact_dir = pathlib.Path(cached_stage["artifact_dir"])
+    # The artifacts may have been removed from disk since the stage was recorded
+    if not artifact_dir.is_dir():
+        log.warning(f"Artifacts for '{stage}' stage {fingerprint} are missing, the stage will be run again.")
+        return False
+    try:
+        for artifact_file in artifact_dir.iterdir():
+            shutil.copy2(artifact_file, model_workspace)
+    except FileNotFoundError:
+        # The artifacts were removed while being copied, because the input datasets were refreshed
+        log.warning(f"Artifacts for '{stage}' stage {fingerprint} were removed, the stage will be run again.")
+        return False
+    log.info(f"'{stage}' stage inputs are unchanged, reused artifacts from '{artifact_dir}'.")
+    return True
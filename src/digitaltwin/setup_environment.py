@@ -5,22 +5,44 @@ as well as to create an SQLAlchemy engine for database operations.
 """  # noqa: D400
 
 import logging
+import os
+import threading
+from typing import Optional
 
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError
-from sqlalchemy.ext.declarative import declarative_base
 
 from src.config import EnvVariable
+from src.digitaltwin import tables
 
 log = logging.getLogger(__name__)
 
-Base = declarative_base()
+# Guards the creation of the engine, since tasks and requests may run in several threads of the same process
+_engine_lock = threading.Lock()
+# The engine shared by everything in this process, created on first use
+_process_engine: Optional[Engine] = None
+
+
+def _reset_engine_after_fork() -> None:
+    """
+    Reset the engine in a newly forked child process, such as a Celery prefork pool process or a gunicorn worker.
+    The pooled connections inherited from the parent are dropped without being closed, since closing them would also
+    close the parent's connections, and the child opens its own connections when it next uses the engine.
+    """  # noqa: D400
+    global _engine_lock  # pylint: disable=global-statement
+    # The lock may have been held by another thread of the parent at the time of the fork, which does not exist here
+    _engine_lock = threading.Lock()
+    if _process_engine is not None:
+        _process_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_engine_after_fork)
 
 
 def get_database() -> Engine:
     """
-    Set up the database connection. Exit the program if connection fails.
+    Set up the database connection, checking that the database can be connected to.
 
     Returns
     -------
@@ -34,6 +56,9 @@ def get_database() -> Engine:
     """
     try:
         engine = get_connection_from_profile()
+        # Check out, and return to the pool, a connection to check that the database is reachable
+        with engine.connect():
+            pass
         log.debug("Connected to PostgreSQL database successfully!")
         return engine
     except OperationalError as e:
@@ -46,23 +71,29 @@ def get_database() -> Engine:
 def get_connection_from_profile() -> Engine:
     """
     Set up database connection from configuration.
+    The engine is created once per process and reused, so that later calls share its connection pool.
 
     Returns
     -------
     Engine
         The engine used to connect to the database.
-    """
-    # Create and return the database engine
-    return get_engine(EnvVariable.POSTGRES_HOST,
-                      EnvVariable.POSTGRES_PORT,
-                      EnvVariable.POSTGRES_DB,
-                      EnvVariable.POSTGRES_USER,
-                      EnvVariable.POSTGRES_PASSWORD)
+    """  # noqa: D400
+    global _process_engine  # pylint: disable=global-statement
+    with _engine_lock:
+        if _process_engine is None:
+            # Create the database engine for this process
+            _process_engine = get_engine(EnvVariable.POSTGRES_HOST,
+                                         EnvVariable.POSTGRES_PORT,
+                                         EnvVariable.POSTGRES_DB,
+                                         EnvVariable.POSTGRES_USER,
+                                         EnvVariable.POSTGRES_PASSWORD)
+        return _process_engine
 
 
 def get_engine(host: str, port: str, db: str, username: str, password: str) -> Engine:
     """
-    Get SQLAlchemy engine using credentials.
+    Get SQLAlchemy engine using credentials, with a connection pool configured from the environment.
+    No connection is made until the engine is first used.
 
     Parameters
     ----------
@@ -81,8 +112,35 @@ def get_engine(host: str, port: str, db: str, username: str, password: str) -> E
     -------
     Engine
         The engine used to connect to the database.
-    """
+    """  # noqa: D400
     url = f'postgresql://{username}:{password}@{host}:{port}/{db}'
-    engine = create_engine(url)
-    Base.metadata.create_all(engine)
-    return engine
+    return create_engine(
+        url,
+        pool_size=EnvVariable.POSTGRES_POOL_SIZE,
+        max_overflow=EnvVariable.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=EnvVariable.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=EnvVariable.POSTGRES_POOL_RECYCLE,
+        # Check connections are still alive when they are checked out, e.g. after the database restarts
+        pool_pre_ping=EnvVariable.POSTGRES_POOL_PRE_PING,
+    )
+
+
+def bootstrap_database(engine: Optional[Engine] = None) -> None:
+    """
+    Create the tables of the digital twin's models if they do not exist. This only needs to run once per deployment,
+    e.g. when the Celery worker starts, rather than whenever an engine is created.
+
+    Parameters
+    ----------
+    engine : Optional[Engine] = None
+        The engine used to connect to the database. Defaults to the engine of this process.
+    """  # noqa: D400
+    engine = get_database() if engine is None else engine
+    tables.Base.metadata.create_all(engine, checkfirst=True)
+    for table in tables.Base.metadata.sorted_tables:
+        tables.record_table_exists(engine, table.name, table.schema or "public")
+    log.info("Bootstrapped database tables.")
+
+
+if __name__ == "__main__":
+    bootstrap_database()
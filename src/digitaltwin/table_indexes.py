@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+This script declares the indexes that the pipeline's lookups rely on, including tables that are created implicitly when
+data is first loaded, and maintains them. Missing indexes are created after bulk loads that create tables or add many
+rows, followed by ANALYZE so that the query planner has statistics for the new rows. Run this script to report missing
+indexes, or with --create to create them.
+"""  # noqa: D400
+
+import argparse
+import logging
+from collections import defaultdict
+from enum import StrEnum
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import text
+
+from src.digitaltwin import setup_environment
+from src.digitaltwin.tables import BuildingFloodStatus, RiverNetworkExclusions
+from src.pollution_model.pollution_tables import Medusa2ModelOutputBuildings, Medusa2ModelOutputRoads
+
+log = logging.getLogger(__name__)
+
+
+class IndexMethod(StrEnum):
+    """
+    StrEnum to represent the PostgreSQL index access methods used by managed indexes.
+
+    Attributes
+    ----------
+    BTREE : str
+        B-tree index, for equality and range lookups on attribute columns.
+    GIST : str
+        GiST index, for spatial lookups on geometry columns.
+    """
+
+    BTREE = "btree"
+    GIST = "gist"
+
+
+class ManagedIndex(NamedTuple):
+    """
+    An index that a pipeline table is expected to have.
+
+    Attributes
+    ----------
+    table_name : str
+        The name of the indexed table.
+    columns : Tuple[str, ...]
+        The indexed columns, in order.
+    method : IndexMethod = IndexMethod.BTREE
+        The index access method.
+    """
+
+    table_name: str
+    columns: Tuple[str, ...]
+    method: IndexMethod = IndexMethod.BTREE
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the index when it is created.
+
+        Returns
+        -------
+        str
+            The name of the index.
+        """
+        return f"{self.table_name}_{'_'.join(self.columns)}_{self.method}_idx"
+
+
+# The indexes of the pipeline tables, by the lookups that use them
+MANAGED_INDEXES: List[ManagedIndex] = [
+    # Static boundary layers, intersected with the area of interest
+    ManagedIndex("nz_building_outlines", ("geometry",), IndexMethod.GIST),
+    ManagedIndex("nz_building_outlines", ("building_outline_id",)),
+    ManagedIndex("nz_roads", ("geometry",), IndexMethod.GIST),
+    ManagedIndex("nz_roads", ("road_id",)),
+    # Rainfall sites and Thiessen polygons, intersected with the catchment area, and HIRDS data looked up by site
+    ManagedIndex("rainfall_sites", ("geometry",), IndexMethod.GIST),
+    ManagedIndex("rainfall_sites", ("site_id",)),
+    ManagedIndex("rainfall_sites_voronoi", ("geometry",), IndexMethod.GIST),
+    ManagedIndex("rainfall_sites_voronoi", ("site_id",)),
+    ManagedIndex("rainfall_depth", ("site_id", "ari")),
+    ManagedIndex("rainfall_intensity", ("site_id", "ari")),
+    # Sea level rise sites, searched for the closest site to each tide query location
+    ManagedIndex("sea_level_rise", ("geometry",), IndexMethod.GIST),
+    ManagedIndex("sea_level_rise", ("siteid",)),
+    ManagedIndex("sea_level_rise_sites", ("geometry",), IndexMethod.GIST),
+    # REC rivers, intersected with the catchment area and looked up by object id
+    ManagedIndex("rec_data", ("geometry",), IndexMethod.GIST),
+    ManagedIndex("rec_data", ("objectid",)),
+    ManagedIndex(RiverNetworkExclusions.__tablename__, ("geometry",), IndexMethod.GIST),
+    # Model outputs, filtered by the model run they belong to
+    ManagedIndex(BuildingFloodStatus.__tablename__, ("flood_model_id", "building_outline_id")),
+    ManagedIndex(Medusa2ModelOutputBuildings.__tablename__, ("scenario_id",)),
+    ManagedIndex(Medusa2ModelOutputRoads.__tablename__, ("scenario_id",)),
+]
+
+
+def _get_existing_indexes(engine: Engine, table_names: Iterable[str]) -> Dict[Tuple[str, str], List[Tuple[str, ...]]]:
+    """
+    Get the columns of the existing indexes of tables in the public schema.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    table_names : Iterable[str]
+        The names of the tables.
+
+    Returns
+    -------
+    Dict[Tuple[str, str], List[Tuple[str, ...]]]
+        The indexed columns of each existing index, by table name and index access method.
+    """
+    query = text("""
+    SELECT tbl.relname AS table_name, am.amname AS method, array_agg(att.attname ORDER BY idx_key.ord) AS columns
+    FROM pg_index AS idx
+    JOIN pg_class AS tbl ON tbl.oid = idx.indrelid
+    JOIN pg_namespace AS nsp ON nsp.oid = tbl.relnamespace
+    JOIN pg_class AS idx_cls ON idx_cls.oid = idx.indexrelid
+    JOIN pg_am AS am ON am.oid = idx_cls.relam
+    CROSS JOIN LATERAL unnest(idx.indkey::int2[]) WITH ORDINALITY AS idx_key(attnum, ord)
+    JOIN pg_attribute AS att ON att.attrelid = tbl.oid AND att.attnum = idx_key.attnum
+    WHERE nsp.nspname = 'public' AND tbl.relname = ANY(:table_names)
+    GROUP BY idx.indexrelid, tbl.relname, am.amname;
+    """).bindparams(table_names=list(table_names))
+    existing_indexes = defaultdict(list)
+    with engine.connect() as conn:
+        for row in conn.execute(query):
+            existing_indexes[(row.table_name, row.method)].append(tuple(row.columns))
+    return existing_indexes
+
+
+def _get_existing_tables(engine: Engine, table_names: Iterable[str]) -> Set[str]:
+    """
+    Get which of the given tables exist in the public schema.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    table_names : Iterable[str]
+        The names of the tables.
+
+    Returns
+    -------
+    Set[str]
+        The names of the tables that exist.
+    """
+    query = text("""
+    SELECT tablename FROM pg_tables WHERE schemaname = 'public' AND tablename = ANY(:table_names);
+    """).bindparams(table_names=list(table_names))
+    with engine.connect() as conn:
+        return set(conn.execute(query).scalars())
+
+
+def find_missing_indexes(engine: Engine, table_names: Optional[Iterable[str]] = None) -> List[ManagedIndex]:
+    """
+    Find the managed indexes that are missing from existing tables. An index is not missing if an existing index with
+    the same access method starts with its columns, e.g. the spatial index that `to_postgis` creates.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    table_names : Optional[Iterable[str]] = None
+        The names of the tables to check. Defaults to all tables with managed indexes.
+
+    Returns
+    -------
+    List[ManagedIndex]
+        The missing indexes. Tables that do not exist yet are skipped.
+    """  # noqa: D400
+    table_names = None if table_names is None else set(table_names)
+    managed_indexes = [index for index in MANAGED_INDEXES if table_names is None or index.table_name in table_names]
+    if not managed_indexes:
+        return []
+    managed_table_names = {index.table_name for index in managed_indexes}
+    existing_tables = _get_existing_tables(engine, managed_table_names)
+    existing_indexes = _get_existing_indexes(engine, existing_tables)
+    return [
+        index for index in managed_indexes
+        if index.table_name in existing_tables and not any(
+            existing_columns[:len(index.columns)] == index.columns
+            for existing_columns in existing_indexes[(index.table_name, index.method)])
+    ]
+
+
+def ensure_indexes(
+        engine: Engine,
+        table_names: Optional[Iterable[str]] = None,
+        analyze: bool = False) -> List[ManagedIndex]:
+    """
+    Create the managed indexes that are missing from existing tables, then ANALYZE the tables that were indexed.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    table_names : Optional[Iterable[str]] = None
+        The names of the tables to index. Defaults to all tables with managed indexes.
+    analyze : bool = False
+        Whether to ANALYZE all of the given tables that exist, e.g. after rows have been loaded into them, rather than
+        only the tables that were indexed.
+
+    Returns
+    -------
+    List[ManagedIndex]
+        The indexes that were created.
+    """
+    table_names = None if table_names is None else list(table_names)
+    missing_indexes = find_missing_indexes(engine, table_names)
+    tables_to_analyze = {index.table_name for index in missing_indexes}
+    if analyze and table_names is not None:
+        tables_to_analyze |= _get_existing_tables(engine, table_names)
+    with engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        for index in missing_indexes:
+            log.info(f"Creating {index.method} index on '{index.table_name}' ({', '.join(index.columns)}).")
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {quote(index.name)} ON {quote(index.table_name)} "
+                f"USING {index.method} ({', '.join(quote(column) for column in index.columns)});"))
+        for table_name in sorted(tables_to_analyze):
+            conn.execute(text(f"ANALYZE {quote(table_name)};"))
+    return missing_indexes
+
+
+def main() -> None:
+    """Report the managed indexes that are missing from the database, creating them if requested."""
+    parser = argparse.ArgumentParser(description="Check the indexes of the digital twin's pipeline tables.")
+    parser.add_argument("--create", action="store_true", help="Create the missing indexes and ANALYZE their tables.")
+    args = parser.parse_args()
+    engine = setup_environment.get_database()
+    missing_indexes = ensure_indexes(engine) if args.create else find_missing_indexes(engine)
+    for index in missing_indexes:
+        status = "Created" if args.create else "Missing"
+        print(f"{status}: {index.method} index on {index.table_name} ({', '.join(index.columns)})")
+    if not missing_indexes:
+        print("No managed indexes are missing.")
+    elif not args.create:
+        # Exit with an error so that the check can be used in scripts
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
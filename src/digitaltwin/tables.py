@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 """This script contains SQLAlchemy models for various database tables and utility functions for database operations."""
 
+import threading
+import weakref
 from datetime import datetime, timezone
+from typing import Set, Tuple
 
 from geoalchemy2 import Geometry
 from sqlalchemy import Boolean, Column, DateTime, inspect, Integer, String
@@ -13,6 +16,13 @@ from sqlalchemy.schema import CheckConstraint, PrimaryKeyConstraint
 
 Base = declarative_base()
 
+# The (schema, table name) pairs known to exist in the database of each engine, so that repeated existence checks do
+# not each query the catalog. Only existing tables are cached, so tables created by other processes are found by the
+# next check, and tables are only ever dropped to be replaced within the same transaction.
+_existing_tables: "weakref.WeakKeyDictionary[Engine, Set[Tuple[str, str]]]" = weakref.WeakKeyDictionary()
+# Guards the cache, since tasks and requests may run in several threads of the same process
+_existing_tables_lock = threading.Lock()
+
 
 class GeospatialLayers(Base):
     """
@@ -77,7 +87,8 @@ class UserLogInfo(Base):
     __tablename__ = "user_log_information"
     unique_id = Column(Integer, primary_key=True, autoincrement=True)
     source_table_list = Column(ARRAY(String), comment="associated tables (geospatial layers)")
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), comment="log created datetime")
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        comment="log created datetime")
     geometry = Column(Geometry("POLYGON", srid=2193))
 
 
@@ -137,7 +148,8 @@ class RiverNetwork(Base):
                             comment="An identifier for the river network associated with each run")
     network_path = Column(String, comment="path to the rec river network file")
     network_data_path = Column(String, comment="path to the rec river network data file for the AOI")
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), comment="output created datetime")
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        comment="output created datetime")
     geometry = Column(Geometry("POLYGON", srid=2193))
 
 
@@ -165,7 +177,8 @@ class BGFloodModelOutput(Base):
     unique_id = Column(Integer, primary_key=True, autoincrement=True)
     file_name = Column(String, comment="name of the flood model output file")
     file_path = Column(String, comment="path to the flood model output file")
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), comment="output created datetime")
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        comment="output created datetime")
     geometry = Column(Geometry("POLYGON", srid=2193))
 
 
@@ -195,6 +208,86 @@ class BuildingFloodStatus(Base):
     flood_model_id = Column(Integer)
 
 
+class ModelRunCache(Base):
+    """
+    Class representing the 'model_run_cache' table.
+    Maps the fingerprint of a model run's inputs to the flood model output produced by that run.
+
+    Attributes
+    ----------
+    __tablename__ : str
+        Name of the database table.
+    fingerprint : str
+        Hash of the model run inputs: the area of interest, scenario options, module parameters and dataset versions
+        (primary key).
+    flood_model_id : int
+        Foreign key matching the unique_id from bg_flood_model_output table.
+    created_at : datetime
+        Timestamp indicating when the cache entry was created.
+    """  # pylint: disable=too-few-public-methods
+
+    __tablename__ = "model_run_cache"
+    fingerprint = Column(String, primary_key=True, comment="hash of the model run inputs")
+    flood_model_id = Column(Integer, nullable=False, comment="unique_id of the flood model output")
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        comment="cache entry created datetime")
+
+
+class DatasetVersion(Base):
+    """
+    Class representing the 'dataset_version' table.
+    Holds a version number for each group of input datasets, which is incremented whenever the datasets are refreshed.
+
+    Attributes
+    ----------
+    __tablename__ : str
+        Name of the database table.
+    dataset_name : str
+        Name of the group of input datasets, e.g. 'lidar' (primary key).
+    version : int
+        The version of the datasets, incremented each time they are refreshed.
+    updated_at : datetime
+        Timestamp indicating when the datasets were last refreshed.
+    """  # pylint: disable=too-few-public-methods
+
+    __tablename__ = "dataset_version"
+    dataset_name = Column(String, primary_key=True, comment="name of the group of input datasets")
+    version = Column(Integer, nullable=False, default=1, comment="version of the datasets")
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        comment="datasets last refreshed datetime")
+
+
+class StageCache(Base):
+    """
+    Class representing the 'stage_cache' table.
+    Records the fingerprint of the inputs of each completed model run stage, and where its output artifacts are stored.
+
+    Attributes
+    ----------
+    __tablename__ : str
+        Name of the database table.
+    stage : str
+        Name of the model run stage, e.g. 'rainfall'.
+    fingerprint : str
+        Hash of the stage inputs: the area of interest, module parameters and dataset versions.
+    artifact_dir : str
+        Directory containing the output artifacts of the stage, or None if the stage only writes to the database.
+    created_at : datetime
+        Timestamp indicating when the cache entry was created.
+    """  # pylint: disable=too-few-public-methods
+
+    __tablename__ = "stage_cache"
+    stage = Column(String, comment="name of the model run stage")
+    fingerprint = Column(String, comment="hash of the stage inputs")
+    artifact_dir = Column(String, comment="directory containing the output artifacts of the stage")
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        comment="cache entry created datetime")
+
+    __table_args__ = (
+        PrimaryKeyConstraint('stage', 'fingerprint', name='stage_cache_pk'),
+    )
+
+
 def create_table(engine: Engine, table: Base) -> None:
     """
     Create a table in the database if it doesn't already exist, using the provided engine.
@@ -206,12 +299,35 @@ def create_table(engine: Engine, table: Base) -> None:
     table : Base
         Class representing the table to create.
     """
+    schema = table.__table__.schema or "public"
+    if check_table_exists(engine, table.__tablename__, schema):
+        return
     table.__table__.create(bind=engine, checkfirst=True)
+    record_table_exists(engine, table.__tablename__, schema)
+
+
+def record_table_exists(engine: Engine, table_name: str, schema: str = "public") -> None:
+    """
+    Record that a table exists in the database, e.g. after creating it, so that checking for it does not query the
+    catalog.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    table_name : str
+        The name of the table that exists.
+    schema : str = "public"
+        The name of the schema where the table resides. Defaults to "public".
+    """  # noqa: D400
+    with _existing_tables_lock:
+        _existing_tables.setdefault(engine, set()).add((schema, table_name))
 
 
 def check_table_exists(engine: Engine, table_name: str, schema: str = "public") -> bool:
     """
     Check if a table exists in the database.
+    Tables found to exist are cached for the engine, so only the first check for an existing table queries the catalog.
 
     Parameters
     ----------
@@ -226,9 +342,15 @@ def check_table_exists(engine: Engine, table_name: str, schema: str = "public")
     -------
     bool
         True if the table exists, False otherwise.
-    """
+    """  # noqa: D400
+    with _existing_tables_lock:
+        if (schema, table_name) in _existing_tables.get(engine, set()):
+            return True
     inspector = inspect(engine)
-    return inspector.has_table(table_name, schema=schema)
+    table_exists = inspector.has_table(table_name, schema=schema)
+    if table_exists:
+        record_table_exists(engine, table_name, schema)
+    return table_exists
 
 
 def execute_query(engine: Engine, query: Query) -> None:
@@ -1,17 +1,28 @@
 # -*- coding: utf-8 -*-
-"""This script provides utility functions for logging configuration and geospatial data manipulation."""
+"""
+This script provides utility functions for logging configuration, progress reporting and geospatial data manipulation.
+"""
 
 import inspect
 import logging
 import pathlib
 import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
 from enum import IntEnum
+from functools import lru_cache
+from typing import Callable, Iterator, Optional
 
 import geopandas as gpd
+import shapely
+from pyproj import Transformer
 from sqlalchemy.engine import Engine
 
 log = logging.getLogger(__name__)
 
+# Receives the sub-step progress counters reported by the code running in the current context, if anything is listening
+_progress_callback: ContextVar[Optional[Callable[[str, int], None]]] = ContextVar("progress_callback", default=None)
+
 
 class LogLevel(IntEnum):
     """
@@ -54,6 +65,45 @@ def log_execution_info() -> None:
     log.debug(f"Executing {function_name}() in {script_name}")
 
 
+@contextmanager
+def progress_reporter(callback: Callable[[str, int], None]) -> Iterator[None]:
+    """
+    Context manager that sends sub-step progress counters reported within the context to a callback.
+
+    Parameters
+    ----------
+    callback : Callable[[str, int], None]
+        Called with the name of the counter and the amount to increment it by, each time progress is reported.
+
+    Yields
+    ------
+    None
+        Progress reported by `report_progress` within the context is sent to the callback.
+    """
+    token = _progress_callback.set(callback)
+    try:
+        yield
+    finally:
+        _progress_callback.reset(token)
+
+
+def report_progress(counter: str, increment: int = 1) -> None:
+    """
+    Report progress of a sub-step, e.g. each site fetched from an external API.
+    Does nothing unless called within a `progress_reporter` context.
+
+    Parameters
+    ----------
+    counter : str
+        The name of the progress counter, e.g. 'hirds_sites_fetched'.
+    increment : int = 1
+        The amount to increment the counter by. Default is 1.
+    """
+    callback = _progress_callback.get()
+    if callback is not None:
+        callback(counter, increment)
+
+
 def setup_logging(log_level: LogLevel = LogLevel.INFO) -> None:
     """
     Configure the root logger with the specified log level and formats, capture warnings, and exclude specific
@@ -122,6 +172,45 @@ def get_catchment_area(catchment_area: gpd.GeoDataFrame, to_crs: int = 2193) ->
     return catchment_area.to_crs(to_crs)
 
 
+def get_catchment_area_wkt(catchment_area: gpd.GeoDataFrame) -> str:
+    """
+    Get a normalised Well-Known Text (WKT) representation of the catchment area, so that the same catchment area
+    always produces the same WKT regardless of its CRS.
+
+    Parameters
+    ----------
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+
+    Returns
+    -------
+    str
+        The catchment area polygon in WKT form, in NZTM (EPSG:2193) rounded to the nearest centimetre.
+    """  # noqa: D400
+    catchment_polygon = get_catchment_area(catchment_area, to_crs=2193)["geometry"].iloc[0]
+    return shapely.to_wkt(catchment_polygon, rounding_precision=2)
+
+
+@lru_cache(maxsize=None)
+def get_transformer(from_crs: int, to_crs: int) -> Transformer:
+    """
+    Get a transformer between two Coordinate Reference Systems (CRS), reusing it if it has already been created.
+
+    Parameters
+    ----------
+    from_crs : int
+        Coordinate Reference System (CRS) code to transform from.
+    to_crs : int
+        Coordinate Reference System (CRS) code to transform to.
+
+    Returns
+    -------
+    Transformer
+        The transformer, using the axis order of each CRS, e.g. latitude then longitude for EPSG:4326.
+    """
+    return Transformer.from_crs(from_crs, to_crs)
+
+
 def get_nz_boundary(engine: Engine, to_crs: int = 2193) -> gpd.GeoDataFrame:
     """
     Get the boundary of New Zealand in the specified Coordinate Reference System (CRS).
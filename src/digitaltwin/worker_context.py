@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+This script manages state that lives for the lifetime of a worker process, such as national reference data that is
+expensive to load, so that tasks run by the same worker do not repeat the same setup and national-scale queries.
+"""  # noqa: D400
+
+import logging
+import os
+import threading
+from typing import Dict, Tuple
+
+import geopandas as gpd
+from sqlalchemy.engine import Engine
+
+from src.digitaltwin import run_cache, setup_environment
+from src.digitaltwin.utils import get_nz_boundary
+
+log = logging.getLogger(__name__)
+
+# Guards the national reference data cache, since tasks may run in several threads of the same worker process
+_reference_data_lock = threading.Lock()
+# The static data version that cached reference data was checked against, keyed by process id and database url, until
+# it is expired before the next task
+_static_data_versions: Dict[Tuple[int, str], int] = {}
+# National reference data loaded by this process with the static data version it was loaded for, keyed by process id,
+# database url and CRS
+_nz_boundaries: Dict[Tuple[int, str, int], Tuple[int, gpd.GeoDataFrame]] = {}
+
+
+def init_worker_context() -> None:
+    """
+    Initialise the worker context for the current process, creating its database engine and opening a first pooled
+    connection, so that the first task run by the worker does not pay for the connection setup.
+    """  # noqa: D400
+    engine = setup_environment.get_connection_from_profile()
+    # Open, and return to the pool, a first connection
+    with engine.connect():
+        pass
+    log.info(f"Initialised worker context for process {os.getpid()}.")
+
+
+def expire_dataset_versions() -> None:
+    """
+    Expire the static data versions that cached reference data is checked against, so that the next use of the
+    reference data checks whether the static data has been refreshed. Called before each task, so that the version is
+    queried at most once per task rather than on every use of the reference data.
+    """  # noqa: D400
+    with _reference_data_lock:
+        _static_data_versions.clear()
+
+
+def get_cached_nz_boundary(engine: Engine, to_crs: int = 2193) -> gpd.GeoDataFrame:
+    """
+    Get the boundary of New Zealand in the specified Coordinate Reference System (CRS), loading it from the database
+    only once per worker process for each version of the static data.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    to_crs : int = 2193
+        Coordinate Reference System (CRS) code to which the boundary will be converted. Default is 2193.
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        A GeoDataFrame representing the boundary of New Zealand in the specified CRS.
+    """  # noqa: D400
+    process_key = (os.getpid(), str(engine.url))
+    with _reference_data_lock:
+        # The region geometry is part of the static data, so a new static data version invalidates the cached boundary
+        static_data_version = _static_data_versions.get(process_key)
+        if static_data_version is None:
+            static_data_version = run_cache.get_dataset_versions(engine).get(run_cache.DatasetName.STATIC_DATA, 0)
+            _static_data_versions[process_key] = static_data_version
+        cached_version, nz_boundary = _nz_boundaries.get((*process_key, to_crs), (None, None))
+        if nz_boundary is None or cached_version != static_data_version:
+            log.debug(f"Loading New Zealand boundary in EPSG:{to_crs} for static data version {static_data_version}.")
+            nz_boundary = get_nz_boundary(engine, to_crs=to_crs)
+            # Replace any boundary loaded for a previous static data version
+            _nz_boundaries[(*process_key, to_crs)] = (static_data_version, nz_boundary)
+    # Return a copy so that callers cannot modify the cached boundary
+    return nz_boundary.copy()
@@ -13,6 +13,9 @@ from src.dynamic_boundary_conditions.rainfall import hirds_rainfall_data_to_db
 
 log = logging.getLogger(__name__)
 
+# The Average Recurrence Intervals (ARIs) that HIRDS provides rainfall data for
+HIRDS_ARIS = (1.58, 2, 5, 10, 20, 30, 40, 50, 60, 80, 100, 250)
+
 
 def filter_for_duration(rain_data: pd.DataFrame, duration: str) -> pd.DataFrame:
     """
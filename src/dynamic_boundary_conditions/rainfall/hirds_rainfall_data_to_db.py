@@ -8,7 +8,9 @@ import pandas as pd
 import geopandas as gpd
 from sqlalchemy.engine import Engine
 
-from src.digitaltwin import tables
+from src.digitaltwin import table_indexes, tables
+from src.digitaltwin.bulk_load import copy_to_db
+from src.digitaltwin.utils import report_progress
 from src.dynamic_boundary_conditions.rainfall import rainfall_data_from_hirds
 
 log = logging.getLogger(__name__)
@@ -101,6 +103,7 @@ def add_rainfall_data_to_db(engine: Engine, site_id: str, idf: bool) -> None:
     # Retrieve the rainfall data for the specified site from HIRDS
     log.info(f"Fetching '{rain_table_name}' data for site {site_id} from the HIRDS website https://hirds.niwa.co.nz/.")
     site_data = rainfall_data_from_hirds.get_data_from_hirds(site_id, idf)
+    report_progress("hirds_sites_fetched")
     # Extract the layout structure of the data
     layout_structure = rainfall_data_from_hirds.get_layout_structure_of_data(site_data)
 
@@ -110,7 +113,7 @@ def add_rainfall_data_to_db(engine: Engine, site_id: str, idf: bool) -> None:
         # Convert the data to a tabular format
         rain_data = rainfall_data_from_hirds.convert_to_tabular_data(site_data, site_id, block_structure)
         # Store the tabular data in the relevant rainfall data table in the database
-        rain_data.to_sql(rain_table_name, engine, index=False, if_exists="append")
+        copy_to_db(engine, rain_data, rain_table_name)
 
 
 def add_each_site_rainfall_data(engine: Engine, site_ids_list: List[str], idf: bool) -> None:
@@ -128,6 +131,9 @@ def add_each_site_rainfall_data(engine: Engine, site_ids_list: List[str], idf: b
     """
     for site_id in site_ids_list:
         add_rainfall_data_to_db(engine, site_id, idf)
+    if site_ids_list:
+        # Update the planner statistics once for all the sites added, rather than after each block of each site
+        table_indexes.ensure_indexes(engine, [db_rain_table_name(idf)], analyze=True)
 
 
 def rainfall_data_to_db(engine: Engine, sites_in_catchment: gpd.GeoDataFrame, idf: bool = False) -> None:
@@ -4,12 +4,13 @@ Main rainfall script used to fetch and store rainfall data in the database, and
 rainfall model input for BG-Flood, etc.
 """  # noqa: D400
 
+import pathlib
 from typing import Optional, Union
 
 import geopandas as gpd
 
 from src import config
-from src.digitaltwin import setup_environment
+from src.digitaltwin import artifact_store, run_cache, setup_environment
 from src.digitaltwin.utils import LogLevel, setup_logging, get_catchment_area
 from src.dynamic_boundary_conditions.rainfall import (
     rainfall_sites,
@@ -32,6 +33,7 @@ def main(
         increment_mins: int,
         hyeto_method: HyetoMethod,
         input_type: RainInputType,
+        model_workspace: Optional[pathlib.Path] = None,
         log_level: LogLevel = LogLevel.DEBUG) -> None:
     """
     Fetch and store rainfall data in the database, and generate the requested rainfall model input for BG-Flood.
@@ -58,6 +60,9 @@ def main(
     input_type: RainInputType
         The type of rainfall model input to be generated. Valid options are 'uniform' or 'varying',
         representing spatially uniform rain input (text file) or spatially varying rain input (NetCDF file).
+    model_workspace : Optional[pathlib.Path] = None
+        The directory in which to write the BG-Flood model inputs for this model run.
+        If not provided (default is None), the BG-Flood model directory will be used.
     log_level : LogLevel = LogLevel.DEBUG
         The log level to set for the root logger. Defaults to LogLevel.DEBUG.
         The available logging levels and their corresponding numeric values are:
@@ -75,8 +80,8 @@ def main(
     # Get catchment area
     catchment_area = get_catchment_area(selected_polygon_gdf, to_crs=4326)
 
-    # BG-Flood Model Directory
-    bg_flood_dir = config.EnvVariable.FLOOD_MODEL_DIR
+    # BG-Flood Model Directory, or the workspace for this model run if one is given
+    bg_flood_dir = config.EnvVariable.FLOOD_MODEL_DIR if model_workspace is None else model_workspace
     # Remove any existing rainfall model inputs in the BG-Flood directory
     rainfall_model_input.remove_existing_rain_inputs(bg_flood_dir)
 
@@ -86,15 +91,27 @@ def main(
     # Compute the coverage areas (Thiessen Polygons) for all rainfall sites across NZ and store them in the database
     thiessen_polygons.thiessen_polygons_to_db(engine)
 
-    # Get rainfall sites coverage areas (Thiessen Polygons) that intersect or are within the catchment area
-    sites_in_catchment = thiessen_polygons.thiessen_polygons_from_db(engine, catchment_area)
-    # Fetch and store rainfall depth data for all sites within the catchment area in the database
-    hirds_rainfall_data_to_db.rainfall_data_to_db(engine, sites_in_catchment, idf=False)
-
-    # Retrieve rainfall depth data from the database for all sites within the catchment area based on a
-    # user-requested scenario
-    rain_depth_in_catchment = hirds_rainfall_data_from_db.rainfall_data_from_db(
-        engine, sites_in_catchment, rcp, time_period, ari, idf=False)
+    # Get rainfall sites coverage areas (Thiessen Polygons) that intersect or are within the catchment area,
+    # from the artifact store if they have already been retrieved for the catchment area
+    dataset_versions = run_cache.get_dataset_versions(engine)
+    sites_in_catchment = artifact_store.load_area_artifact(catchment_area, dataset_versions, "rainfall_sites_coverage")
+    if sites_in_catchment is None:
+        sites_in_catchment = thiessen_polygons.thiessen_polygons_from_db(engine, catchment_area)
+        artifact_store.publish_area_artifact(
+            catchment_area, dataset_versions, "rainfall_sites_coverage", sites_in_catchment)
+    # Get rainfall depth data for all sites within the catchment area based on a user-requested scenario,
+    # from the artifact store if it has already been retrieved for the catchment area and scenario
+    rain_depth_artifact_name = f"rainfall_depth_rcp_{rcp}_{time_period}_ari_{ari}"
+    rain_depth_in_catchment = artifact_store.load_area_artifact(
+        catchment_area, dataset_versions, rain_depth_artifact_name)
+    if rain_depth_in_catchment is None:
+        # Fetch and store rainfall depth data for all sites within the catchment area in the database
+        hirds_rainfall_data_to_db.rainfall_data_to_db(engine, sites_in_catchment, idf=False)
+        # Retrieve rainfall depth data from the database for all sites within the catchment area
+        rain_depth_in_catchment = hirds_rainfall_data_from_db.rainfall_data_from_db(
+            engine, sites_in_catchment, rcp, time_period, ari, idf=False)
+        artifact_store.publish_area_artifact(
+            catchment_area, dataset_versions, rain_depth_artifact_name, rain_depth_in_catchment)
 
     # Get hyetograph data for all sites within the catchment area
     hyetograph_data = hyetograph.get_hyetograph_data(
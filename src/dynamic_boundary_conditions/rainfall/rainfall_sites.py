@@ -9,6 +9,7 @@ import requests
 from sqlalchemy.engine import Engine
 
 from src.digitaltwin import tables
+from src.digitaltwin.bulk_load import LoadMode, copy_to_db
 
 log = logging.getLogger(__name__)
 
@@ -72,4 +73,4 @@ def rainfall_sites_to_db(engine: Engine) -> None:
         sites = get_rainfall_sites_in_df()
         # Store rainfall sites data in the database
         log.info(f"Adding '{table_name}' data to the database.")
-        sites.to_postgis(f'{table_name}', engine, if_exists='replace', index=False)
+        copy_to_db(engine, sites, table_name, LoadMode.REPLACE)
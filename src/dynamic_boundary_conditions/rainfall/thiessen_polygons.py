@@ -12,8 +12,9 @@ from geovoronoi import voronoi_regions_from_coords, points_to_coords
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql import text
 
-from src.digitaltwin import tables
-from src.digitaltwin.utils import get_nz_boundary
+from src.digitaltwin import run_cache, tables
+from src.digitaltwin.bulk_load import LoadMode, copy_to_db
+from src.digitaltwin.worker_context import get_cached_nz_boundary
 
 log = logging.getLogger(__name__)
 
@@ -105,6 +106,8 @@ def thiessen_polygons_to_db(engine: Engine) -> None:
     """
     Store the data representing the Thiessen polygons, site information, and the area covered by
     each rainfall site in the database.
+    Creating the Thiessen polygons refreshes the static data version, so model runs call this before their forcing
+    stages run, rather than from within the rainfall stage.
 
     Parameters
     ----------
@@ -117,7 +120,7 @@ def thiessen_polygons_to_db(engine: Engine) -> None:
         log.info(f"'{table_name}' data already exists in the database.")
     else:
         # Get the boundary of New Zealand
-        nz_boundary = get_nz_boundary(engine, to_crs=4326)
+        nz_boundary = get_cached_nz_boundary(engine, to_crs=4326)
         # Get all rainfall sites within the boundary of New Zealand from the database
         sites_in_nz = get_sites_within_aoi(engine, nz_boundary)
         # Calculate the Thiessen polygons, i.e. the area covered by each rainfall site
@@ -125,7 +128,9 @@ def thiessen_polygons_to_db(engine: Engine) -> None:
         rainfall_sites_voronoi = thiessen_polygons_calculator(nz_boundary, sites_in_nz)
         # Store the Thiessen polygons data in the database
         log.info(f"Adding '{table_name}' data to the database.")
-        rainfall_sites_voronoi.to_postgis(f"{table_name}", engine, if_exists="replace")
+        copy_to_db(engine, rainfall_sites_voronoi, table_name, LoadMode.REPLACE)
+        # Model runs and intermediate artifacts using the previous Thiessen polygons are no longer valid
+        run_cache.refresh_dataset_version(engine, run_cache.DatasetName.STATIC_DATA)
 
 
 def thiessen_polygons_from_db(engine: Engine, catchment_area: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
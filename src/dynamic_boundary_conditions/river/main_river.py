@@ -5,6 +5,7 @@ and its associated data, and generate the requested river model input for BG-Flo
 """  # noqa: D400
 
 import logging
+import pathlib
 from typing import Union, Optional
 
 import geopandas as gpd
@@ -32,6 +33,7 @@ def main(
         maf: bool = True,
         ari: Optional[int] = None,
         bound: BoundType = BoundType.MIDDLE,
+        model_workspace: Optional[pathlib.Path] = None,
         log_level: LogLevel = LogLevel.DEBUG) -> None:
     """
     Read and store REC data in the database, fetch OSM waterways data, create a river network and its associated data,
@@ -53,6 +55,9 @@ def main(
     bound : BoundType = BoundType.MIDDLE
         Set the type of bound (estimate) for the REC river inflow scenario data.
         Valid options include: 'BoundType.LOWER', 'BoundType.MIDDLE', or 'BoundType.UPPER'.
+    model_workspace : Optional[pathlib.Path] = None
+        The directory in which to write the BG-Flood model inputs for this model run.
+        If not provided (default is None), the BG-Flood model directory will be used.
     log_level : LogLevel = LogLevel.DEBUG
         The log level to set for the root logger. Defaults to LogLevel.DEBUG.
         The available logging levels and their corresponding numeric values are:
@@ -69,8 +74,8 @@ def main(
     engine = setup_environment.get_database()
     # Get catchment area
     catchment_area = get_catchment_area(selected_polygon_gdf, to_crs=2193)
-    # BG-Flood Model Directory
-    bg_flood_dir = config.EnvVariable.FLOOD_MODEL_DIR
+    # BG-Flood Model Directory, or the workspace for this model run if one is given
+    bg_flood_dir = config.EnvVariable.FLOOD_MODEL_DIR if model_workspace is None else model_workspace
     # Remove any existing river model inputs in the BG-Flood directory
     river_model_input.remove_existing_river_inputs(bg_flood_dir)
 
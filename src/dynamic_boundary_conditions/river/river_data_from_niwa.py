@@ -12,7 +12,7 @@ import requests
 from shapely.geometry import LineString
 from sqlalchemy.engine import Engine
 
-from src.digitaltwin.utils import get_nz_boundary
+from src.digitaltwin.worker_context import get_cached_nz_boundary
 
 log = logging.getLogger(__name__)
 
@@ -96,7 +96,7 @@ def gen_rec_query_param_list(
         A list of API query parameters used to retrieve REC data in New Zealand.
     """
     # Get the New Zealand boundary geometry in the specified CRS
-    nz_boundary = get_nz_boundary(engine, to_crs=2193)
+    nz_boundary = get_cached_nz_boundary(engine, to_crs=2193)
     # Extract the bounding box coordinates from the New Zealand boundary
     x_min, y_min, x_max, y_max = nz_boundary.total_bounds
     # Create a string representation of the bounding box coordinates for use in the API query
@@ -11,6 +11,7 @@ import pandas as pd
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql import text
 
+from src.digitaltwin.bulk_load import LoadMode, copy_to_db
 from src.digitaltwin.tables import check_table_exists
 from src.dynamic_boundary_conditions.river import river_data_from_niwa
 from src.dynamic_boundary_conditions.river.river_network_to_from_db import add_network_exclusions_to_db
@@ -43,7 +44,7 @@ def store_rec_data_to_db(engine: Engine) -> None:
             rec_data = river_data_from_niwa.fetch_backup_rec_data_from_niwa()
         # Store the REC data to the database table
         log.info(f"Adding '{table_name}' to the database.")
-        rec_data.to_postgis(table_name, engine, index=False, if_exists="replace")
+        copy_to_db(engine, rec_data, table_name, LoadMode.REPLACE)
         log.info(f"Successfully added '{table_name}' to the database.")
 
 
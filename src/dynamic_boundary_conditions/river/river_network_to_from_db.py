@@ -22,6 +22,8 @@ from sqlalchemy.sql import text
 
 
 from src.config import EnvVariable
+from src.digitaltwin import artifact_store
+from src.digitaltwin.bulk_load import copy_to_db
 from src.digitaltwin.tables import (
     check_table_exists,
     create_table,
@@ -86,7 +88,7 @@ def add_network_exclusions_to_db(
         # Insert 'rec_network_id' to associate it with the river network of the current run
         rec_network_exclusions.insert(0, "rec_network_id", rec_network_id)
         # Record excluded REC geometries in the relevant table in the database
-        rec_network_exclusions.to_postgis(RiverNetworkExclusions.__tablename__, engine, if_exists="append")
+        copy_to_db(engine, rec_network_exclusions, RiverNetworkExclusions.__tablename__)
         # Convert the excluded REC river segment object IDs to a list
         excluded_ids = rec_network_exclusions["objectid"].tolist()
         # Log a warning message indicating the reason and IDs of the excluded REC river segments
@@ -115,7 +117,7 @@ def get_new_network_output_paths() -> Tuple[pathlib.Path, pathlib.Path]:
     # Create the file path for the REC Network with the current timestamp
     network_path = network_dir / f"{dt_string}_network.pickle"
     # Create the file path for the REC Network data with the current timestamp
-    network_data_path = network_dir / f"{dt_string}_network_data.geojson"
+    network_data_path = network_dir / f"{dt_string}_network_data.parquet"
     return network_path, network_data_path
 
 
@@ -180,12 +182,12 @@ def store_rec_network_to_db(
     with open(network_path, "wb") as file:
         pickle.dump(rec_network, file)
 
-    # Convert the 'first_coord' and 'last_coord' columns to string format to facilitate exporting
+    # Store the 'first_coord' and 'last_coord' columns as geometry columns alongside the main geometry
     network_data = rec_network_data.copy()
-    network_data["first_coord"] = network_data["first_coord"].astype(str)
-    network_data["last_coord"] = network_data["last_coord"].astype(str)
-    # Save the REC river network data to the specified file
-    network_data.to_file(str(network_data_path), driver="GeoJSON")
+    network_data["first_coord"] = gpd.GeoSeries(network_data["first_coord"], crs=network_data.crs)
+    network_data["last_coord"] = gpd.GeoSeries(network_data["last_coord"], crs=network_data.crs)
+    # Save the REC river network data to the specified GeoParquet file
+    artifact_store.write_geoparquet(network_data, network_data_path)
 
     # Create the REC Network table in the database if it doesn't exist
     create_table(engine, RiverNetwork)
@@ -286,10 +288,15 @@ def get_existing_network(engine: Engine, existing_network_meta: gpd.GeoDataFrame
     with open(existing_network_series["network_path"], "rb") as file:
         rec_network = pickle.load(file)
     # Load the REC river network data containing geometry information
-    rec_network_data = gpd.read_file(existing_network_series["network_data_path"])
-    # Set the data type of the 'first_coord' and 'last_coord' columns to geometry
-    rec_network_data["first_coord"] = rec_network_data["first_coord"].apply(shapely.wkt.loads).astype("geometry")
-    rec_network_data["last_coord"] = rec_network_data["last_coord"].apply(shapely.wkt.loads).astype("geometry")
+    network_data_path = pathlib.Path(existing_network_series["network_data_path"])
+    if network_data_path.suffix == ".parquet":
+        rec_network_data = artifact_store.read_geoparquet(network_data_path)
+    else:
+        # REC river network data stored before GeoParquet was used is stored as GeoJSON
+        rec_network_data = gpd.read_file(network_data_path)
+        # Set the data type of the 'first_coord' and 'last_coord' columns to geometry
+        rec_network_data["first_coord"] = rec_network_data["first_coord"].apply(shapely.wkt.loads).astype("geometry")
+        rec_network_data["last_coord"] = rec_network_data["last_coord"].apply(shapely.wkt.loads).astype("geometry")
     # Replace NaN values with None in the 'node_intersect_aoi' column
     rec_network_data["node_intersect_aoi"] = rec_network_data["node_intersect_aoi"].replace(np.nan, None)
     # Log a message indicating the successful retrieval of REC river network and its associated data from the database
@@ -5,7 +5,8 @@ and generate the requested tide uniform boundary model input for BG-Flood etc.
 """  # noqa: D400
 
 import logging
-from typing import Union
+import pathlib
+from typing import Optional, Union
 
 import geopandas as gpd
 
@@ -34,7 +35,8 @@ def main(
         ssp_scenario: str,
         add_vlm: bool,
         percentile: int,
-        log_level: LogLevel = LogLevel.DEBUG) -> None:
+        model_workspace: Optional[pathlib.Path] = None,
+        log_level: LogLevel = LogLevel.DEBUG) -> bool:
     """
     Fetch tide data, read and store sea level rise data in the database, and generate the requested tide
     uniform boundary model input for BG-Flood.
@@ -62,6 +64,9 @@ def main(
         Set to True if VLM should be included, False otherwise.
     percentile : int
         The desired percentile for the sea level rise data. Valid values are 17, 50, or 83.
+    model_workspace : Optional[pathlib.Path] = None
+        The directory in which to write the BG-Flood model inputs for this model run.
+        If not provided (default is None), the BG-Flood model directory will be used.
     log_level : LogLevel = LogLevel.DEBUG
         The log level to set for the root logger. Defaults to LogLevel.DEBUG.
         The available logging levels and their corresponding numeric values are:
@@ -71,6 +76,13 @@ def main(
         - LogLevel.INFO (20)
         - LogLevel.DEBUG (10)
         - LogLevel.NOTSET (0)
+
+    Returns
+    -------
+    bool
+        True if the tide model inputs are complete, including when the area has no tide data.
+        False if the tide data could not be fetched from NIWA, in which case the model runs without tide, and its
+        inputs should not be stored for reuse by later model runs because the failure may be transient.
     """  # noqa: D400
     try:
         # Set up logging with the specified log level
@@ -79,8 +91,8 @@ def main(
         engine = setup_environment.get_database()
         # Get catchment area
         catchment_area = get_catchment_area(selected_polygon_gdf, to_crs=2193)
-        # BG-Flood Model Directory
-        bg_flood_dir = config.EnvVariable.FLOOD_MODEL_DIR
+        # BG-Flood Model Directory, or the workspace for this model run if one is given
+        bg_flood_dir = config.EnvVariable.FLOOD_MODEL_DIR if model_workspace is None else model_workspace
         # Remove any existing uniform boundary model inputs in the BG-Flood directory
         tide_slr_model_input.remove_existing_boundary_inputs(bg_flood_dir)
 
@@ -117,8 +129,11 @@ def main(
         log.info(error)
 
     except RuntimeError as error:
-        # Log a warning message to indicate that a runtime error occurred while fetching tide data
+        # Log a warning message to indicate that the model will run without tide data fetched from NIWA
         log.warning(error)
+        return False
+
+    return True
 
 
 if __name__ == "__main__":
@@ -16,7 +16,8 @@ import requests
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql import text
 
-from src.digitaltwin import tables
+from src.digitaltwin import table_indexes, tables
+from src.digitaltwin.bulk_load import LoadMode, copy_to_db
 
 log = logging.getLogger(__name__)
 
@@ -126,9 +127,41 @@ def get_slr_data_from_takiwa() -> gpd.GeoDataFrame:
     return slr_nz_with_geom
 
 
+def store_slr_sites_to_db(engine: Engine, replace: bool = False) -> None:
+    """
+    Store the location of each sea level rise site to the database, in NZTM (EPSG:2193) with a spatial index, so that
+    the closest site to each query location can be found with an index-assisted nearest neighbour search.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    replace : bool = False
+        Whether to replace the sites if they are already stored, e.g. after the sea level rise data has been replaced.
+    """  # noqa: D400
+    # Define the table name for storing the sea level rise sites
+    table_name = "sea_level_rise_sites"
+    # Check if the table already exists in the database
+    if not replace and tables.check_table_exists(engine, table_name):
+        log.info(f"'{table_name}' data already exists in the database.")
+        return
+    log.info(f"Adding '{table_name}' data to the database.")
+    # Each site has a single location, repeated in every row of its sea level rise projections
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table_name};"))
+        conn.execute(text(f"""
+        CREATE TABLE {table_name} AS
+        SELECT DISTINCT ON (siteid) siteid, ST_Transform(geometry, 2193)::geometry(Point, 2193) AS geometry
+        FROM sea_level_rise
+        ORDER BY siteid;
+        """))
+    tables.record_table_exists(engine, table_name)
+    table_indexes.ensure_indexes(engine, [table_name], analyze=True)
+
+
 def store_slr_data_to_db(engine: Engine) -> None:
     """
-    Store sea level rise data to the database.
+    Store sea level rise data to the database, along with the location of each sea level rise site.
 
     Parameters
     ----------
@@ -140,60 +173,65 @@ def store_slr_data_to_db(engine: Engine) -> None:
     # Check if the table already exists in the database
     if tables.check_table_exists(engine, table_name):
         log.info(f"'{table_name}' data already exists in the database.")
+        store_slr_sites_to_db(engine)
     else:
         # Read sea level rise data from the NZ Sea level rise datasets
         slr_nz = get_slr_data_from_takiwa()
         # Store the sea level rise data to the database table
         log.info(f"Adding '{table_name}' data to the database.")
-        slr_nz.to_postgis(table_name, engine, index=False, if_exists="replace")
+        copy_to_db(engine, slr_nz, table_name, LoadMode.REPLACE)
+        store_slr_sites_to_db(engine, replace=True)
 
 
-def get_closest_slr_data(engine: Engine, single_query_loc: pd.Series) -> gpd.GeoDataFrame:
+def get_closest_slr_data(engine: Engine, query_locations: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
-    Retrieve the closest sea level rise data for a single query location from the database.
+    Retrieve the closest sea level rise data for each query location from the database, in a single query.
 
     Parameters
     ----------
     engine : Engine
         The engine used to connect to the database.
-    single_query_loc : pd.Series
-        Pandas Series containing the location coordinate and additional information used for retrieval.
+    query_locations : gpd.GeoDataFrame
+        GeoDataFrame containing the location coordinates and additional information used for retrieval.
 
     Returns
     -------
     gpd.GeoDataFrame
-        A GeoDataFrame containing the closest sea level rise data for the query location from the database.
+        A GeoDataFrame containing the closest sea level rise data for each query location from the database, in the
+        order of the query locations.
     """
-    # Create a GeoDataFrame with the query location geometry
-    query_loc_geom = gpd.GeoDataFrame(geometry=[single_query_loc["geometry"]], crs=4326)
-    # Convert the query location geometry to the desired coordinate reference system (CRS)
-    query_loc_geom = query_loc_geom.to_crs(2193).reset_index(drop=True)
-    # Prepare the query to retrieve sea level rise data based on the query location.
-    # The subquery calculates the distances between the query location and each location in the 'sea_level_rise' table.
-    # It then identifies the location with the shortest distance, indicating the closest location to the query location,
-    # and retrieves the 'siteid' associated with that closest location, along with its corresponding distance value.
-    # The outer query joins the sea_level_rise table with the inner subquery, merging the results to retrieve the
-    # relevant data, which includes the calculated distance. By matching the closest location's 'siteid' from the
-    # inner subquery with the corresponding data in the sea_level_rise table using the JOIN clause, the outer query
-    # obtains the sea level rise data for the closest location, along with its associated distance value.
+    # Convert the query location geometries to the coordinate reference system (CRS) of the sea level rise sites
+    query_geoms = gpd.GeoSeries(query_locations["geometry"].values, crs=4326).to_crs(2193)
+    # Prepare the query to retrieve sea level rise data for all query locations at once.
+    # The lateral subquery finds the sea level rise site closest to each query location, using the spatial index of
+    # 'sea_level_rise_sites' through the '<->' distance operator rather than calculating the distance to every site.
+    # The outer query joins the sea_level_rise table on the 'siteid' of each closest site, to retrieve the sea level
+    # rise data for the closest site to each query location, along with its associated distance value.
     command_text = """
-    SELECT slr.*, distances.distance
-    FROM sea_level_rise AS slr
-    JOIN (
-        SELECT siteid,
-        ST_Distance(ST_Transform(geometry, 2193), ST_GeomFromText(:geom, 2193)) AS distance
-        FROM sea_level_rise
-        ORDER BY distance
+    WITH query_locations AS (
+        SELECT query_index, ST_GeomFromText(geom, 2193) AS geometry
+        FROM unnest(CAST(:query_indexes AS integer[]), CAST(:geoms AS text[])) AS q(query_index, geom)
+    )
+    SELECT slr.*, closest.distance, query_locations.query_index
+    FROM query_locations
+    CROSS JOIN LATERAL (
+        SELECT sites.siteid, ST_Distance(sites.geometry, query_locations.geometry) AS distance
+        FROM sea_level_rise_sites AS sites
+        ORDER BY sites.geometry <-> query_locations.geometry
         LIMIT 1
-    ) AS distances ON slr.siteid = distances.siteid;
+    ) AS closest
+    JOIN sea_level_rise AS slr ON slr.siteid = closest.siteid
+    ORDER BY query_locations.query_index;
     """
     query = text(command_text).bindparams(
-        geom=str(query_loc_geom["geometry"][0])
+        query_indexes=list(range(len(query_geoms))),
+        geoms=[geom.wkt for geom in query_geoms]
     )
     # Execute the query and retrieve the data as a GeoDataFrame
     query_data = gpd.GeoDataFrame.from_postgis(query, engine, geom_col="geometry")
-    # Add the position information to the retrieved data
-    query_data["position"] = single_query_loc["position"]
+    # Index the retrieved data by the index of its query location, and add the position information
+    query_data.index = query_locations.index[query_data.pop("query_index").to_numpy()]
+    query_data["position"] = query_locations.loc[query_data.index, "position"].to_numpy()
     return query_data
 
 
@@ -215,17 +253,13 @@ def get_slr_data_from_db(engine: Engine, tide_data: gpd.GeoDataFrame) -> gpd.Geo
     """
     log.info("Retrieving 'sea_level_rise' data for the requested catchment area from the database.")
     # Select unique query locations from the tide data
-    tide_data_loc = tide_data[['position', 'geometry']].drop_duplicates()
-    # Initialize an empty GeoDataFrame to store the closest sea level rise data for all locations
-    slr_data = gpd.GeoDataFrame()
-    # Iterate over each query location
-    for _, row in tide_data_loc.iterrows():
-        # Retrieve the closest sea level rise data from the database for the current query location
-        query_loc_data = get_closest_slr_data(engine, row)
-        # Add a column to the retrieved data to store the geometry of the tide data location
-        query_loc_data["tide_data_loc"] = row["geometry"]
-        # Concatenate the closest sea level rise data for the query location with the overall sea level rise data
-        slr_data = pd.concat([slr_data, query_loc_data])
+    tide_data_loc = tide_data[['position', 'geometry']].drop_duplicates().reset_index(drop=True)
+    if tide_data_loc.empty:
+        return gpd.GeoDataFrame()
+    # Retrieve the closest sea level rise data from the database for all query locations at once
+    slr_data = get_closest_slr_data(engine, tide_data_loc)
+    # Add a column to the retrieved data to store the geometry of the tide data location
+    slr_data["tide_data_loc"] = tide_data_loc.loc[slr_data.index, "geometry"].to_numpy()
     # Reset the index of the closest sea level rise data
     slr_data = gpd.GeoDataFrame(slr_data).reset_index(drop=True)
     return slr_data
@@ -14,6 +14,7 @@ import numpy as np
 import pandas as pd
 
 from src import config
+from src.digitaltwin.utils import report_progress
 from src.dynamic_boundary_conditions.tide.tide_enum import DatumType, ApproachType
 
 log = logging.getLogger(__name__)
@@ -224,6 +225,7 @@ async def fetch_tide_data(
         geometry = gpd.points_from_xy(tide_df['longitude'], tide_df['latitude'])
         # Convert the DataFrame to a GeoDataFrame by adding geometry column and setting CRS
         tide_df = gpd.GeoDataFrame(tide_df, geometry=geometry, crs=4326)
+        report_progress("tide_ranges_fetched")
         return tide_df
 
 
@@ -5,10 +5,10 @@ resulting model output metadata in the database, and incorporates the model outp
 """  # noqa: D400
 
 import logging
-import os
 import pathlib
 import platform
 import subprocess
+import uuid
 from datetime import datetime
 from typing import Tuple, Union, Optional, TextIO
 
@@ -71,8 +71,10 @@ def get_new_model_output_path() -> pathlib.Path:
     model_output_dir.mkdir(parents=True, exist_ok=True)
     # Get the current timestamp in "YYYY_MM_DD_HH_MM_SS" format
     dt_string = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    # Get a short unique suffix, so that model runs finishing within the same second do not share an output path
+    unique_suffix = uuid.uuid4().hex[:8]
     # Create the BG Flood model output path with the current timestamp
-    model_output_path = model_output_dir / f"output_{dt_string}.nc"
+    model_output_path = model_output_dir / f"output_{dt_string}_{unique_suffix}.nc"
     return model_output_path
 
 
@@ -179,6 +181,39 @@ def model_output_from_db_by_id(engine: Engine, model_id: int) -> pathlib.Path:
     return latest_output_path
 
 
+def model_created_at_from_db_by_id(engine: Engine, model_id: int) -> datetime:
+    """
+    Retrieve the time that a model output was created from the database by model_id.
+
+    Parameters
+    ----------
+    engine: Engine
+        The sqlalchemy database connection engine
+    model_id: int
+        The ID of the flood model output being queried for
+
+    Returns
+    -------
+    datetime
+        The time that the model output was created
+
+    Raises
+    -------
+    FileNotFoundError
+        Error raised if `bg_flood` table is not found or does not contain the `model_id`.
+    """
+    bg_flood_table = "bg_flood_model_output"
+    if not check_table_exists(engine, bg_flood_table):
+        raise FileNotFoundError(f"{bg_flood_table} table does not exist")
+    query = text("SELECT created_at FROM bg_flood_model_output WHERE unique_id=:flood_model_id").bindparams(
+        flood_model_id=model_id)
+    with engine.connect() as conn:
+        created_at = conn.execute(query).scalar()
+    if created_at is None:
+        raise FileNotFoundError(f"{bg_flood_table} table does not have any rows with unique_id = {model_id}")
+    return created_at
+
+
 def model_extents_from_db_by_id(engine: Engine, model_id: int) -> gpd.GeoDataFrame:
     """
     Find the extents of a model output in gpd.GeoDataFrame format.
@@ -400,7 +435,8 @@ def run_bg_flood_model(
         resolution: Optional[Union[int, float]] = None,
         mask: Union[int, float] = 9999,
         gpu_device: int = 0,
-        small_nc: int = 0) -> None:
+        small_nc: int = 0,
+        model_workspace: Optional[pathlib.Path] = None) -> None:
     """
     Run the BG-Flood Model for the specified catchment area.
 
@@ -430,9 +466,14 @@ def run_bg_flood_model(
         Specify whether the output should be saved as short integers to reduce the size of the output file.
         Set the value to 1 to enable short integer conversion, or set it to 0 to save all variables as floats.
         Default value is 0.
+    model_workspace : Optional[pathlib.Path] = None
+        The directory containing the BG-Flood model inputs for this model run, in which the model is run.
+        If not provided (default is None), the BG-Flood model directory will be used.
     """
     # Get the valid BG-Flood Model directory
     bg_flood_dir = get_valid_bg_flood_dir()
+    # Model inputs are read from the workspace for this model run if one is given
+    input_dir = bg_flood_dir if model_workspace is None else model_workspace
     # Get the file path of the Hydro DEM for the catchment area
     hydro_dem_path_str, _, _, dem_resolution = get_dem_by_geometry(engine, catchment_area)
     hydro_dem_path = pathlib.Path(hydro_dem_path_str)
@@ -441,7 +482,7 @@ def run_bg_flood_model(
 
     # Prepare inputs for the BG-Flood Model
     prepare_bg_flood_model_inputs(
-        bg_flood_dir=bg_flood_dir,
+        bg_flood_dir=input_dir,
         model_output_path=model_output_path,
         hydro_dem_path=hydro_dem_path,
         resolution=resolution,
@@ -451,25 +492,21 @@ def run_bg_flood_model(
         gpu_device=gpu_device,
         small_nc=small_nc)
 
-    # Get the current working directory (cwd) haha
-    cwd = pathlib.Path.cwd()
-    # Change the current working directory to the BG-Flood Model directory
-    os.chdir(bg_flood_dir)
-    # Run the BG-Flood Model executable, accounting for OS differences
+    # Run the BG-Flood Model executable, accounting for OS differences.
+    # The executable is run from the input directory using cwd, so that the process-wide working directory is
+    # untouched and other model runs can happen concurrently.
     operating_system = platform.system()
     if operating_system == "Windows":
         # Run the .exe
-        subprocess.run([bg_flood_dir / "BG_flood.exe"], check=True)
+        subprocess.run([bg_flood_dir / "BG_flood.exe"], check=True, cwd=input_dir)
     elif operating_system == "Linux":
         # Run the executable linux script
-        subprocess.run([bg_flood_dir / "BG_Flood"], check=True)
+        subprocess.run([bg_flood_dir / "BG_Flood"], check=True, cwd=input_dir)
     else:
         # Other OSs are not officially supported, but we can attempt to try the Linux one.
         log.warning(f"{operating_system} is not officially supported. Only Windows and Linux are officially supported.")
         log.warning(f"Attempting to run BG_Flood linux script in {operating_system}")
-        subprocess.run([bg_flood_dir / "BG_Flood"], check=True)
-    # Change the current working directory back to the original directory (cwd)
-    os.chdir(cwd)
+        subprocess.run([bg_flood_dir / "BG_Flood"], check=True, cwd=input_dir)
     log.info(f"Saved new flood model to {model_output_path}")
 
 
@@ -481,6 +518,7 @@ def main(
         mask: Union[int, float] = 9999,
         gpu_device: int = 0,
         small_nc: int = 0,
+        model_workspace: Optional[pathlib.Path] = None,
         log_level: LogLevel = LogLevel.DEBUG) -> int:
     """
     Generate BG-Flood model output for the requested catchment area, and incorporate the model output to GeoServer
@@ -508,6 +546,9 @@ def main(
         Specify whether the output should be saved as short integers to reduce the size of the output file.
         Set the value to 1 to enable short integer conversion, or set it to 0 to save all variables as floats.
         Default value is 0.
+    model_workspace : Optional[pathlib.Path] = None
+        The directory containing the BG-Flood model inputs for this model run, in which the model is run.
+        If not provided (default is None), the BG-Flood model directory will be used.
     log_level : LogLevel = LogLevel.DEBUG
         The log level to set for the root logger. Defaults to LogLevel.DEBUG.
         The available logging levels and their corresponding numeric values are:
@@ -542,7 +583,8 @@ def main(
         resolution=resolution,
         mask=mask,
         gpu_device=gpu_device,
-        small_nc=small_nc
+        small_nc=small_nc,
+        model_workspace=model_workspace
     )
 
     # Store metadata related to the BG Flood model output in the database
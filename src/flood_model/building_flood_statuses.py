@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+This script streams the flood status of buildings for a flood model output directly from the database. Features are
+built as GeoJSON by PostGIS, or as Apache Arrow record batches of WKB geometries, and read through a server-side cursor,
+so that the first features are sent before the query has finished and the whole layer is never held in memory.
+"""  # noqa: D400
+
+import json
+import logging
+from enum import StrEnum
+from typing import Iterator, Tuple
+
+import pyarrow as pa
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import text
+
+from src.flood_model import bg_flood_model
+
+log = logging.getLogger(__name__)
+
+# The number of features fetched from the server-side cursor at a time
+FEATURE_BATCH_SIZE = 1000
+# The continuation marker and zero length that end an Arrow IPC stream
+_ARROW_END_OF_STREAM = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+class FeatureFormat(StrEnum):
+    """
+    StrEnum to represent the formats that building flood statuses can be streamed in.
+
+    Attributes
+    ----------
+    GEOJSON : str
+        A GeoJSON FeatureCollection.
+    NDJSON : str
+        Newline-delimited GeoJSON, with one Feature on each line.
+    ARROW : str
+        Apache Arrow IPC stream with building_outline_id, is_flooded and WKB geometry columns.
+    """
+
+    GEOJSON = "geojson"
+    NDJSON = "ndjson"
+    ARROW = "arrow"
+
+    @property
+    def mimetype(self) -> str:
+        """The media type of responses in this format."""
+        return {
+            FeatureFormat.GEOJSON: "application/geo+json",
+            FeatureFormat.NDJSON: "application/x-ndjson",
+            FeatureFormat.ARROW: "application/vnd.apache.arrow.stream",
+        }[self]
+
+
+def get_model_bounds(engine: Engine, model_id: int) -> Tuple[float, float, float, float]:
+    """
+    Get the bounds of a flood model output in NZTM (EPSG:2193).
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    model_id : int
+        The ID of the flood model output.
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        The bounds of the flood model output as (xmin, ymin, xmax, ymax).
+
+    Raises
+    ------
+    FileNotFoundError
+        If the flood model output does not exist.
+    """
+    extents = bg_flood_model.model_extents_from_db_by_id(engine, model_id)
+    return tuple(extents.to_crs(2193).total_bounds.tolist())
+
+
+def is_crs_supported(engine: Engine, crs: int) -> bool:
+    """
+    Check whether PostGIS can transform geometries into a Coordinate Reference System (CRS), so that an unknown code is
+    rejected before the building statuses start streaming rather than failing part way through.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    crs : int
+        Coordinate Reference System (CRS) code of the output geometries.
+
+    Returns
+    -------
+    bool
+        True if the CRS code is in the spatial_ref_sys table, otherwise False.
+    """  # noqa: D400
+    query = text("SELECT EXISTS (SELECT 1 FROM spatial_ref_sys WHERE srid = :srid);").bindparams(srid=crs)
+    with engine.connect() as conn:
+        return conn.execute(query).scalar()
+
+
+def stream_building_flood_statuses(
+        engine: Engine,
+        model_id: int,
+        bounds: Tuple[float, float, float, float],
+        crs: int = 4326,
+        feature_format: FeatureFormat = FeatureFormat.GEOJSON) -> Iterator[str]:
+    """
+    Stream the current building outlines within the bounds of a flood model output, with their flood status.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    model_id : int
+        The ID of the flood model output.
+    bounds : Tuple[float, float, float, float]
+        The bounds to filter the buildings to in NZTM (EPSG:2193), as (xmin, ymin, xmax, ymax).
+    crs : int = 4326
+        Coordinate Reference System (CRS) code of the output geometries. Default is 4326.
+    feature_format : FeatureFormat = FeatureFormat.GEOJSON
+        The format to stream the features in.
+
+    Yields
+    ------
+    str
+        The next chunk of the output. Each feature has the building outline columns and "is_flooded" as properties.
+    """
+    query = text("""
+        SELECT json_build_object(
+            'type', 'Feature',
+            'geometry', ST_AsGeoJSON(ST_Transform(buildings.geometry, :crs))::json,
+            'properties', (to_jsonb(buildings) - 'geometry')
+                || jsonb_build_object('is_flooded', flood_statuses.is_flooded)
+        )::text AS feature
+        FROM nz_building_outlines AS buildings
+        LEFT OUTER JOIN (
+            SELECT building_outline_id, is_flooded
+            FROM building_flood_status
+            WHERE flood_model_id = :flood_model_id
+        ) AS flood_statuses
+        USING (building_outline_id)
+        WHERE buildings.building_outline_lifecycle ILIKE 'current'
+        AND buildings.geometry && ST_MakeEnvelope(:xmin, :ymin, :xmax, :ymax, 2193);
+    """).bindparams(flood_model_id=model_id, crs=crs, xmin=bounds[0], ymin=bounds[1], xmax=bounds[2], ymax=bounds[3])
+    separator = "\n" if feature_format == FeatureFormat.NDJSON else ","
+    if feature_format == FeatureFormat.GEOJSON:
+        yield f'{{"type": "FeatureCollection", "crs": {json.dumps(_crs_member(crs))}, "features": ['
+    is_first_feature = True
+    with engine.connect() as conn:
+        # Use a server-side cursor so that features are sent as they are fetched
+        result = conn.execution_options(stream_results=True).execute(query)
+        for rows in result.partitions(FEATURE_BATCH_SIZE):
+            features = separator.join(row.feature for row in rows)
+            yield features if is_first_feature else separator + features
+            is_first_feature = False
+    if feature_format == FeatureFormat.GEOJSON:
+        yield "]}"
+    elif not is_first_feature:
+        yield "\n"
+
+
+def stream_building_flood_statuses_arrow(
+        engine: Engine,
+        model_id: int,
+        bounds: Tuple[float, float, float, float],
+        crs: int = 4326) -> Iterator[bytes]:
+    """
+    Stream the current building outlines within the bounds of a flood model output, with their flood status, as an
+    Apache Arrow IPC stream with a record batch for each batch of buildings fetched.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    model_id : int
+        The ID of the flood model output.
+    bounds : Tuple[float, float, float, float]
+        The bounds to filter the buildings to in NZTM (EPSG:2193), as (xmin, ymin, xmax, ymax).
+    crs : int = 4326
+        Coordinate Reference System (CRS) code of the output geometries. Default is 4326.
+
+    Yields
+    ------
+    bytes
+        The next message of the Arrow IPC stream. The geometry column is tagged as GeoArrow WKB with its CRS.
+    """  # noqa: D400
+    query = text("""
+        SELECT buildings.building_outline_id,
+            flood_statuses.is_flooded,
+            ST_AsBinary(ST_Transform(buildings.geometry, :crs)) AS geometry
+        FROM nz_building_outlines AS buildings
+        LEFT OUTER JOIN (
+            SELECT building_outline_id, is_flooded
+            FROM building_flood_status
+            WHERE flood_model_id = :flood_model_id
+        ) AS flood_statuses
+        USING (building_outline_id)
+        WHERE buildings.building_outline_lifecycle ILIKE 'current'
+        AND buildings.geometry && ST_MakeEnvelope(:xmin, :ymin, :xmax, :ymax, 2193);
+    """).bindparams(flood_model_id=model_id, crs=crs, xmin=bounds[0], ymin=bounds[1], xmax=bounds[2], ymax=bounds[3])
+    geometry_metadata = {
+        "ARROW:extension:name": "geoarrow.wkb",
+        "ARROW:extension:metadata": json.dumps({"crs": f"EPSG:{crs}"}),
+    }
+    schema = pa.schema([
+        pa.field("building_outline_id", pa.int64()),
+        pa.field("is_flooded", pa.bool_()),
+        pa.field("geometry", pa.binary(), metadata=geometry_metadata),
+    ])
+    # Each IPC message is self-contained, so the stream is the schema followed by each record batch and an end marker
+    yield schema.serialize().to_pybytes()
+    with engine.connect() as conn:
+        # Use a server-side cursor so that record batches are sent as they are fetched
+        result = conn.execution_options(stream_results=True).execute(query)
+        for rows in result.partitions(FEATURE_BATCH_SIZE):
+            building_outline_ids, flood_statuses, geometries = zip(*rows)
+            record_batch = pa.record_batch([
+                pa.array(building_outline_ids, pa.int64()),
+                pa.array(flood_statuses, pa.bool_()),
+                pa.array([bytes(geometry) for geometry in geometries], pa.binary()),
+            ], schema=schema)
+            yield record_batch.serialize().to_pybytes()
+    yield _ARROW_END_OF_STREAM
+
+
+def _crs_member(crs: int) -> dict:
+    """
+    Create the GeoJSON crs member for a Coordinate Reference System (CRS), as written by GeoServer.
+
+    Parameters
+    ----------
+    crs : int
+        Coordinate Reference System (CRS) code.
+
+    Returns
+    -------
+    dict
+        The GeoJSON crs member.
+    """
+    return {"type": "name", "properties": {"name": f"urn:ogc:def:crs:EPSG::{crs}"}}
@@ -10,6 +10,7 @@ import xarray
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql import text
 
+from src.digitaltwin.bulk_load import copy_to_db
 from src.flood_model.serve_model import create_building_database_views_if_not_exists
 
 
@@ -29,7 +30,7 @@ def store_flooded_buildings_in_database(engine: Engine, buildings: pd.DataFrame,
     # Associate the building flood status dataframe with the current model id
     buildings["flood_model_id"] = flood_model_id
     # Append the dataframe to the database
-    buildings.to_sql("building_flood_status", engine, if_exists="append", index=True)
+    copy_to_db(engine, buildings, "building_flood_status", index=True)
     # Create geoserver endpoints for database views if they do not already exist
     create_building_database_views_if_not_exists()
 
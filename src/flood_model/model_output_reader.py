@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+This script reads flood model outputs in the process that serves web requests. Model output files are kept open in a
+least-recently-used cache keyed by model id, so that repeated queries against the same model output only read the
+requested values instead of opening the file again.
+"""  # noqa: D400
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from enum import StrEnum
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import shapely
+import xarray
+
+from src.digitaltwin import setup_environment
+from src.digitaltwin.utils import get_transformer
+from src.flood_model import bg_flood_model
+
+log = logging.getLogger(__name__)
+
+# The maximum number of model output files kept open at once
+MAX_OPEN_MODEL_OUTPUTS = 16
+# The maximum number of points that can be sampled from a model output at once
+MAX_SAMPLE_POINTS = 10000
+
+
+class OutputVariable(StrEnum):
+    """
+    StrEnum to represent the model output variables that can be sampled at points.
+
+    Attributes
+    ----------
+    H : str
+        Water depth.
+    ZS : str
+        Water surface elevation.
+    HMAX : str
+        Maximum water depth reached so far.
+    """
+
+    H = "h"
+    ZS = "zs"
+    HMAX = "hmax"
+
+
+# Guards the open model outputs and reads from them, since the underlying file handles cannot be read by several threads
+# at once
+_model_outputs_lock = threading.Lock()
+# The open model outputs, keyed by model id, from least to most recently used
+_open_model_outputs: "OrderedDict[int, xarray.Dataset]" = OrderedDict()
+
+
+def _get_open_model_output(model_id: int) -> xarray.Dataset:
+    """
+    Get the open model output for a model id, opening it and evicting the least recently used model output if it is
+    not already open. The model output is looked up and opened without holding the model outputs lock, so that reads
+    from other model outputs are not blocked meanwhile. Must be called without holding the model outputs lock.
+
+    Parameters
+    ----------
+    model_id : int
+        The database id of the model output.
+
+    Returns
+    -------
+    xarray.Dataset
+        The lazily loaded model output. Values are only read from the file when they are accessed, which must be done
+        while holding the model outputs lock.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the model output does not exist.
+    """  # noqa: D400
+    with _model_outputs_lock:
+        model_output = _open_model_outputs.get(model_id)
+        if model_output is not None:
+            _open_model_outputs.move_to_end(model_id)
+            return model_output
+    engine = setup_environment.get_connection_from_profile()
+    model_file_path = bg_flood_model.model_output_from_db_by_id(engine, model_id)
+    log.debug(f"Opening model output {model_id} from '{model_file_path}'.")
+    # Model outputs are never modified once written, so they can be kept open for as long as they are used
+    opened_model_output = xarray.open_dataset(model_file_path)
+    with _model_outputs_lock:
+        model_output = _open_model_outputs.get(model_id)
+        if model_output is None:
+            model_output = _open_model_outputs[model_id] = opened_model_output
+            if len(_open_model_outputs) > MAX_OPEN_MODEL_OUTPUTS:
+                # Evicted model outputs still held by a reader are reopened by xarray when they are next read
+                _, evicted_model_output = _open_model_outputs.popitem(last=False)
+                evicted_model_output.close()
+        else:
+            _open_model_outputs.move_to_end(model_id)
+    if model_output is not opened_model_output:
+        # Another thread opened the same model output meanwhile, so keep the one that is already cached
+        opened_model_output.close()
+    return model_output
+
+
+def get_depth_by_time_at_point(model_id: int, lat: float, lng: float) -> Tuple[List[float], List[float]]:
+    """
+    Query a point in a flood model output and return the list of depths and times.
+
+    Parameters
+    ----------
+    model_id : int
+        The database id of the model output to query.
+    lat : float
+        The latitude of the point to query.
+    lng : float
+        The longitude of the point to query.
+
+    Returns
+    -------
+    Tuple[List[float], List[float]]
+        The depths list and times list for the pixel in the output nearest to the point.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the model output does not exist.
+    """
+    transformer = get_transformer(4326, 2193)
+    y, x = transformer.transform(lat, lng)
+    model_output = _get_open_model_output(model_id)
+    with _model_outputs_lock:
+        da = model_output["hmax_P0"].sel(xx_P0=x, yy_P0=y, method="nearest").load()
+    depths = da.values.tolist()
+    times = da.coords['time'].values.tolist()
+    return depths, times
+
+
+def transform_points(lats: Sequence[float], lngs: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transform points from latitude and longitude to the NZTM (EPSG:2193) coordinates of the model outputs in one batch.
+
+    Parameters
+    ----------
+    lats : Sequence[float]
+        The latitudes of the points.
+    lngs : Sequence[float]
+        The longitudes of the points, parallel to the latitudes.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The x and y coordinates of the points.
+    """
+    transformer = get_transformer(4326, 2193)
+    ys, xs = transformer.transform(np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float))
+    return xs, ys
+
+
+def sample_transect(
+        lats: Sequence[float],
+        lngs: Sequence[float],
+        interval: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sample points at a regular interval along a transect, from its first vertex up to and including its last vertex.
+
+    Parameters
+    ----------
+    lats : Sequence[float]
+        The latitudes of the transect vertices.
+    lngs : Sequence[float]
+        The longitudes of the transect vertices, parallel to the latitudes.
+    interval : float
+        The distance in metres between sampled points.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        The x and y coordinates of the sampled points in NZTM (EPSG:2193), and their distances in metres along the
+        transect.
+
+    Raises
+    ------
+    ValueError
+        If sampling the transect at the interval would produce more than MAX_SAMPLE_POINTS points.
+    """
+    xs, ys = transform_points(lats, lngs)
+    transect = shapely.LineString(np.column_stack([xs, ys]))
+    if transect.length / interval + 1 > MAX_SAMPLE_POINTS:
+        raise ValueError(f"Sampling the transect every {interval}m would exceed {MAX_SAMPLE_POINTS} points")
+    distances = np.append(np.arange(0, transect.length, interval), transect.length)
+    sampled_points = shapely.line_interpolate_point(transect, distances)
+    return shapely.get_x(sampled_points), shapely.get_y(sampled_points), distances
+
+
+def _to_json_list(values: np.ndarray) -> List[Any]:
+    """
+    Convert an array to nested lists, replacing NaN values, such as dry cells, with None so that they are valid JSON.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The array to convert.
+
+    Returns
+    -------
+    List[Any]
+        The nested lists of values.
+    """
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def _is_within_grid(model_output: xarray.Dataset, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Check which points fall within the cells of a model output grid, since selecting the nearest cell would otherwise
+    return the values of an edge cell for points outside of the model output.
+
+    Parameters
+    ----------
+    model_output : xarray.Dataset
+        The model output.
+    xs : np.ndarray
+        The x coordinates of the points in NZTM (EPSG:2193).
+    ys : np.ndarray
+        The y coordinates of the points in NZTM (EPSG:2193), parallel to the x coordinates.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array that is True for each point within the grid.
+    """  # noqa: D400
+    is_within_grid = np.ones(len(xs), dtype=bool)
+    for coords, dimension in ((xs, "xx_P0"), (ys, "yy_P0")):
+        cell_centres = model_output.coords[dimension].values
+        # The grid extends half a cell beyond the outermost cell centres
+        half_cell = abs(cell_centres[1] - cell_centres[0]) / 2 if len(cell_centres) > 1 else 0
+        is_within_grid &= (coords >= cell_centres.min() - half_cell) & (coords <= cell_centres.max() + half_cell)
+    return is_within_grid
+
+
+def get_time_series_at_points(
+        model_id: int,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        variables: Sequence[OutputVariable]) -> Dict[str, List[Any]]:
+    """
+    Query many points in a flood model output at once and return the time series of each variable at each point.
+    All points are selected with a single vectorised indexer, so that each variable is read from the file only once.
+
+    Parameters
+    ----------
+    model_id : int
+        The database id of the model output to query.
+    xs : np.ndarray
+        The x coordinates of the points in NZTM (EPSG:2193).
+    ys : np.ndarray
+        The y coordinates of the points in NZTM (EPSG:2193), parallel to the x coordinates.
+    variables : Sequence[OutputVariable]
+        The model output variables to return.
+
+    Returns
+    -------
+    Dict[str, List[Any]]
+        Columns containing the times, the x and y coordinates of each point, and for each variable a list of time series
+        parallel to the points. Values of dry cells, and of points outside of the model output grid, are None.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the model output does not exist.
+    """  # noqa: D400
+    x_indexer = xarray.DataArray(xs, dims="point")
+    y_indexer = xarray.DataArray(ys, dims="point")
+    variable_names = [f"{variable}_P0" for variable in variables]
+    model_output = _get_open_model_output(model_id)
+    with _model_outputs_lock:
+        samples = model_output[variable_names].sel(xx_P0=x_indexer, yy_P0=y_indexer, method="nearest").load()
+        is_within_grid = _is_within_grid(model_output, xs, ys)
+    # Mask points outside of the grid, which were snapped to the nearest edge cell
+    samples = samples.where(xarray.DataArray(is_within_grid, dims="point"))
+    columns = {
+        "time": samples.coords["time"].values.tolist(),
+        "x": xs.tolist(),
+        "y": ys.tolist(),
+    }
+    for variable, variable_name in zip(variables, variable_names):
+        columns[variable] = _to_json_list(samples[variable_name].transpose("point", "time").values)
+    return columns
+
+
+def time_series_to_arrow(columns: Dict[str, List[Any]]) -> pa.Table:
+    """
+    Convert the columns returned by `get_time_series_at_points` to an Apache Arrow table with a row for each point.
+    Variables are packed as float32 time series, and the times shared by every point are kept in the schema metadata.
+
+    Parameters
+    ----------
+    columns : Dict[str, List[Any]]
+        The time, x and y columns, any per-point columns such as distance, and a list of time series for each variable.
+
+    Returns
+    -------
+    pa.Table
+        Table with x, y and any other per-point columns as float64, and a list<float32> time series for each variable.
+    """  # noqa: D400
+    arrays = {}
+    for name, values in columns.items():
+        if name == "time":
+            continue
+        if name in set(OutputVariable):
+            # Dry cells are None, which become nulls
+            arrays[name] = pa.array(values, pa.list_(pa.float32()))
+        else:
+            arrays[name] = pa.array(values, pa.float64())
+    return pa.table(arrays, metadata={"time": json.dumps(columns["time"])})
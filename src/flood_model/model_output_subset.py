@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+This script extracts subsets of flood model outputs for download. A subset is selected lazily by variable, time range
+and bounding box, then written one time step at a time in the requested format, so that only a single time step of the
+subset is ever held in memory.
+"""  # noqa: D400
+
+import logging
+import os
+import pathlib
+import tempfile
+from enum import StrEnum
+from typing import Iterator, List, Optional, Tuple
+
+import netCDF4
+import numpy as np
+import rasterio
+import xarray as xr
+
+from src.config import EnvVariable
+from src.digitaltwin.utils import get_transformer
+
+log = logging.getLogger(__name__)
+
+# The number of bytes read from the subset file for each chunk of the download
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class OutputFormat(StrEnum):
+    """
+    StrEnum to represent the file formats that model output subsets can be downloaded in.
+
+    Attributes
+    ----------
+    NETCDF : str
+        NetCDF file with the same structure as the model output.
+    GEOTIFF : str
+        GeoTIFF file of a single variable, with a band for each time step.
+    CSV : str
+        CSV file with a row for each time step and cell, and a column for each variable.
+    """
+
+    NETCDF = "netcdf"
+    GEOTIFF = "geotiff"
+    CSV = "csv"
+
+    @property
+    def mimetype(self) -> str:
+        """The media type of files in this format."""
+        return {
+            OutputFormat.NETCDF: "application/x-netcdf",
+            OutputFormat.GEOTIFF: "image/tiff",
+            OutputFormat.CSV: "text/csv",
+        }[self]
+
+    @property
+    def extension(self) -> str:
+        """The file extension of files in this format."""
+        return {OutputFormat.NETCDF: "nc", OutputFormat.GEOTIFF: "tif", OutputFormat.CSV: "csv"}[self]
+
+
+def select_subset(
+        ds: xr.Dataset,
+        variables: Optional[List[str]] = None,
+        time_range: Tuple[Optional[float], Optional[float]] = (None, None),
+        bbox: Optional[Tuple[float, float, float, float]] = None) -> xr.Dataset:
+    """
+    Lazily select a subset of a model output. No values are read until the subset is written.
+
+    Parameters
+    ----------
+    ds : xr.Dataset
+        The model output, opened lazily.
+    variables : Optional[List[str]] = None
+        The model output variables to select, e.g. ["h", "zs"]. All variables are selected if None.
+    time_range : Tuple[Optional[float], Optional[float]] = (None, None)
+        The first and last model times to select, in seconds. Open ended where None.
+    bbox : Optional[Tuple[float, float, float, float]] = None
+        The bounding box to select as (min lng, min lat, max lng, max lat). The whole model extent is selected if None.
+
+    Returns
+    -------
+    xr.Dataset
+        The lazily selected subset of the model output.
+
+    Raises
+    ------
+    ValueError
+        If a variable is not in the model output, or the subset is empty.
+    """
+    if variables is not None:
+        variable_names = [f"{variable}_P0" for variable in variables]
+        available_variables = sorted(name.removesuffix("_P0") for name in ds.data_vars if name.endswith("_P0"))
+        if any(variable_name not in ds.data_vars for variable_name in variable_names):
+            raise ValueError(f"Query parameter variables must only contain {available_variables}")
+        ds = ds[variable_names]
+    ds = ds.sel(time=slice(*time_range))
+    if bbox is not None:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        # Transform all four corners, since the bounding box is not rectangular in NZTM
+        transformer = get_transformer(4326, 2193)
+        ys, xs = transformer.transform([min_lat, min_lat, max_lat, max_lat], [min_lng, max_lng, min_lng, max_lng])
+        # Select by index so that the selection does not depend on the order of the coordinates
+        x_indices = np.flatnonzero((ds["xx_P0"].values >= min(xs)) & (ds["xx_P0"].values <= max(xs)))
+        y_indices = np.flatnonzero((ds["yy_P0"].values >= min(ys)) & (ds["yy_P0"].values <= max(ys)))
+        if len(x_indices) == 0 or len(y_indices) == 0:
+            raise ValueError("Query parameter bbox does not overlap the model output")
+        ds = ds.isel(xx_P0=slice(x_indices[0], x_indices[-1] + 1), yy_P0=slice(y_indices[0], y_indices[-1] + 1))
+    if ds.sizes.get("time", 1) == 0:
+        raise ValueError("Query parameters startTime & endTime do not overlap the model output")
+    return ds
+
+
+def _iter_time_steps(subset: xr.Dataset) -> Iterator[Tuple[int, xr.Dataset]]:
+    """
+    Iterate over the time steps of a subset, reading the values of one time step at a time.
+
+    Parameters
+    ----------
+    subset : xr.Dataset
+        The lazily selected subset of a model output.
+
+    Yields
+    ------
+    Tuple[int, xr.Dataset]
+        The index of the time step, and the values of all variables at the time step.
+    """
+    for time_index in range(subset.sizes["time"]):
+        yield time_index, subset.isel(time=time_index, missing_dims="ignore").load()
+
+
+def write_netcdf(subset: xr.Dataset, file_path: pathlib.Path) -> None:
+    """
+    Write a subset of a model output to a NetCDF file, one time step at a time.
+
+    Parameters
+    ----------
+    subset : xr.Dataset
+        The lazily selected subset of a model output.
+    file_path : pathlib.Path
+        The path of the NetCDF file to write.
+    """
+    with netCDF4.Dataset(file_path, "w") as nc:
+        nc.setncatts(subset.attrs)
+        for dim, size in subset.sizes.items():
+            # The time dimension is unlimited so that time steps can be written one at a time
+            nc.createDimension(dim, None if dim == "time" else size)
+        # Coordinates, and variables without a time dimension such as the CRS, are small so are written directly
+        for name, variable in {**subset.coords, **subset.data_vars}.items():
+            fill_value = variable.encoding.get("_FillValue")
+            nc_variable = nc.createVariable(
+                name, variable.dtype, variable.dims, zlib=bool(variable.dims), fill_value=fill_value)
+            nc_variable.setncatts({key: value for key, value in variable.attrs.items() if key != "_FillValue"})
+            if "time" not in variable.dims:
+                nc_variable[...] = variable.values
+        nc["time"][:] = subset["time"].values
+        for time_index, time_step in _iter_time_steps(subset):
+            for name, variable in time_step.data_vars.items():
+                if "time" in subset[name].dims:
+                    nc[name][time_index] = variable.values
+
+
+def write_geotiff(subset: xr.Dataset, file_path: pathlib.Path) -> None:
+    """
+    Write a single variable subset of a model output to a GeoTIFF file, with a band for each time step written one at a
+    time.
+
+    Parameters
+    ----------
+    subset : xr.Dataset
+        The lazily selected subset of a model output, containing a single variable.
+    file_path : pathlib.Path
+        The path of the GeoTIFF file to write.
+    """  # noqa: D400
+    (variable_name,) = subset.data_vars
+    variable = subset[variable_name].rio.set_spatial_dims(x_dim="xx_P0", y_dim="yy_P0")
+    band_count = subset.sizes["time"] if "time" in variable.dims else 1
+    profile = {
+        "driver": "GTiff",
+        "width": variable.rio.width,
+        "height": variable.rio.height,
+        "count": band_count,
+        "dtype": variable.dtype,
+        "crs": variable.rio.crs,
+        "transform": variable.rio.transform(),
+        "nodata": np.nan,
+        "compress": "DEFLATE",
+        "tiled": True,
+    }
+    with rasterio.open(file_path, "w", **profile) as geotiff:
+        if band_count == 1 and "time" not in variable.dims:
+            geotiff.write(variable.values, 1)
+            return
+        for time_index, time_step in _iter_time_steps(subset):
+            geotiff.write(time_step[variable_name].transpose("yy_P0", "xx_P0").values, time_index + 1)
+            geotiff.set_band_description(time_index + 1, f"time={time_step['time'].item()}s")
+
+
+def write_csv(subset: xr.Dataset, file_path: pathlib.Path) -> None:
+    """
+    Write a subset of a model output to a CSV file, one time step at a time. Cells with no values are left out.
+
+    Parameters
+    ----------
+    subset : xr.Dataset
+        The lazily selected subset of a model output.
+    file_path : pathlib.Path
+        The path of the CSV file to write.
+    """
+    # Only the model output variables are written, not the CRS
+    model_variables = [name for name in subset.data_vars if name.endswith("_P0")]
+    # Drop non-index coordinates such as the CRS, keeping the time and cell coordinates as columns
+    subset = subset[model_variables].reset_coords(drop=True)
+    with open(file_path, "w", newline="") as csv_file:
+        for time_index, time_step in _iter_time_steps(subset):
+            time_step_df = time_step.to_dataframe().dropna(how="all", subset=model_variables).reset_index()
+            time_step_df = time_step_df.rename(columns=lambda column: column.removesuffix("_P0"))
+            time_step_df.to_csv(csv_file, header=time_index == 0, index=False)
+
+
+def write_subset(subset: xr.Dataset, output_format: OutputFormat) -> pathlib.Path:
+    """
+    Write a subset of a model output to a temporary file in the requested format.
+
+    Parameters
+    ----------
+    subset : xr.Dataset
+        The lazily selected subset of a model output.
+    output_format : OutputFormat
+        The file format to write.
+
+    Returns
+    -------
+    pathlib.Path
+        The path of the temporary file. The caller is responsible for removing it.
+
+    Raises
+    ------
+    ValueError
+        If the output format is GeoTIFF and the subset does not contain exactly one variable.
+    """
+    if output_format == OutputFormat.GEOTIFF:
+        model_variables = [name for name in subset.data_vars if name.endswith("_P0")]
+        if len(model_variables) != 1:
+            raise ValueError("Query parameter variables must contain exactly one variable for geotiff format")
+        subset = subset[model_variables]
+    writers = {OutputFormat.NETCDF: write_netcdf, OutputFormat.GEOTIFF: write_geotiff, OutputFormat.CSV: write_csv}
+    EnvVariable.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    file_descriptor, file_name = tempfile.mkstemp(suffix=f".{output_format.extension}", dir=EnvVariable.DATA_DIR)
+    os.close(file_descriptor)
+    file_path = pathlib.Path(file_name)
+    try:
+        writers[output_format](subset, file_path)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+    return file_path
+
+
+def stream_file(file_path: pathlib.Path) -> Iterator[bytes]:
+    """
+    Stream a temporary file in chunks, removing it once it has been streamed or the stream is closed.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        The path of the temporary file to stream.
+
+    Yields
+    ------
+    bytes
+        The next chunk of the file.
+    """
+    try:
+        with open(file_path, "rb") as file:
+            while chunk := file.read(DOWNLOAD_CHUNK_SIZE):
+                yield chunk
+    finally:
+        file_path.unlink(missing_ok=True)
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+This script serves flood model outputs as XYZ map tiles. The maximum flood depths of each model output are written to a
+Cloud Optimized GeoTIFF (COG) with internal overviews, and tiles are rendered from it with the same viridis colour
+scale as the GeoServer layers. Rendered tiles are cached on disk for each model output. Tiles outside the model output
+are served from a shared transparent tile without being cached, and tiles are only served up to the zoom level of the
+model output's resolution, so that the number of tiles cached for each model output is bounded.
+"""  # noqa: D400
+
+import logging
+import math
+import os
+import pathlib
+import threading
+import uuid
+import warnings
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import numpy as np
+import rasterio
+import xarray as xr
+from rasterio.enums import Resampling
+from rasterio.errors import NotGeoreferencedWarning
+from rasterio.io import MemoryFile
+from rasterio.transform import from_bounds
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import transform_bounds
+
+from src.config import EnvVariable
+from src.digitaltwin import setup_environment
+from src.flood_model import bg_flood_model
+
+log = logging.getLogger(__name__)
+
+# The width and height of each tile in pixels
+TILE_SIZE = 256
+# The maximum zoom level that tiles can be requested for
+MAX_ZOOM = 24
+# Half the width of the Web Mercator (EPSG:3857) world in metres
+_WEB_MERCATOR_HALF_WIDTH = math.pi * 6378137
+# Depths in metres and the colours they are drawn in, matching the viridis_raster GeoServer style
+_DEPTH_COLOUR_STOPS = np.array([
+    [0.1, 0xfd, 0xe7, 0x25],
+    [1, 0x7a, 0xd1, 0x51],
+    [2, 0x22, 0xa8, 0x84],
+    [3, 0x2a, 0x78, 0x8e],
+    [4, 0x41, 0x44, 0x87],
+    [5, 0x44, 0x01, 0x54],
+])
+# Guards the locks that guard the creation of each model output's COG
+_cog_locks_lock = threading.Lock()
+# Guards the creation of the COG of each model output, keyed by model id, so that concurrent tile requests for a model
+# output only create its COG once, without blocking tile requests for other model outputs
+_cog_locks: Dict[int, threading.Lock] = defaultdict(threading.Lock)
+
+
+def get_model_tiles_dir(model_id: int) -> pathlib.Path:
+    """
+    Get the directory containing the COG and rendered tiles of a model output.
+
+    Parameters
+    ----------
+    model_id : int
+        The database id of the model output.
+
+    Returns
+    -------
+    pathlib.Path
+        The directory containing the COG and rendered tiles of the model output.
+    """
+    return EnvVariable.DATA_DIR_MODEL_TILES / str(model_id)
+
+
+def _temp_path(file_path: pathlib.Path) -> pathlib.Path:
+    """
+    Get a unique temporary path next to a file, for writing the file before atomically moving it into place.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        The path of the file to write.
+
+    Returns
+    -------
+    pathlib.Path
+        The temporary path to write the file to.
+    """
+    return file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex}.tmp")
+
+
+def create_max_depth_cog(model_output_path: pathlib.Path, model_id: int) -> pathlib.Path:
+    """
+    Create a Cloud Optimized GeoTIFF of the maximum flood depths of a model output, with internal overviews so that
+    tiles at any zoom level only read the resolution they need.
+
+    Parameters
+    ----------
+    model_output_path : pathlib.Path
+        The file path to the netCDF model output.
+    model_id : int
+        The database id of the model output.
+
+    Returns
+    -------
+    pathlib.Path
+        The file path of the new COG.
+    """  # noqa: D400
+    cog_path = get_model_tiles_dir(model_id) / "hmax.tif"
+    log.info(f"Creating Cloud Optimized GeoTIFF '{cog_path}' from {model_output_path.name}")
+    cog_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_cog_path = _temp_path(cog_path)
+    with xr.open_dataset(model_output_path, decode_coords="all") as ds:
+        # hmax is the running maximum depth, so its maximum over time is the maximum depth of the whole model run
+        max_depths = ds["hmax_P0"].max(dim="time", keep_attrs=True)
+        max_depths.rio.set_spatial_dims(x_dim="xx_P0", y_dim="yy_P0", inplace=True)
+        max_depths.rio.write_nodata(np.nan, encoded=True, inplace=True)
+        max_depths.rio.to_raster(
+            temp_cog_path, driver="COG", compress="DEFLATE", predictor="YES", overview_resampling="average")
+    # Atomically move the COG into place so that tile requests never read a partially written file
+    os.replace(temp_cog_path, cog_path)
+    return cog_path
+
+
+def get_max_depth_cog(model_id: int) -> pathlib.Path:
+    """
+    Get the Cloud Optimized GeoTIFF of the maximum flood depths of a model output, creating it if it does not exist,
+    e.g. for model outputs created before COGs were introduced.
+
+    Parameters
+    ----------
+    model_id : int
+        The database id of the model output.
+
+    Returns
+    -------
+    pathlib.Path
+        The file path of the COG.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the model output does not exist.
+    """  # noqa: D400
+    cog_path = get_model_tiles_dir(model_id) / "hmax.tif"
+    if cog_path.exists():
+        return cog_path
+    with _cog_locks_lock:
+        cog_lock = _cog_locks[model_id]
+    with cog_lock:
+        # Another request may have created the COG while waiting for the lock
+        if cog_path.exists():
+            return cog_path
+        engine = setup_environment.get_connection_from_profile()
+        model_output_path = bg_flood_model.model_output_from_db_by_id(engine, model_id)
+        return create_max_depth_cog(model_output_path, model_id)
+
+
+def get_tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Get the bounds of an XYZ tile in Web Mercator (EPSG:3857).
+
+    Parameters
+    ----------
+    z : int
+        The zoom level of the tile.
+    x : int
+        The column of the tile, from west to east.
+    y : int
+        The row of the tile, from north to south.
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        The west, south, east and north bounds of the tile in metres.
+    """
+    tile_width = 2 * _WEB_MERCATOR_HALF_WIDTH / 2 ** z
+    west = -_WEB_MERCATOR_HALF_WIDTH + x * tile_width
+    north = _WEB_MERCATOR_HALF_WIDTH - y * tile_width
+    return west, north - tile_width, west + tile_width, north
+
+
+def colour_depths(depths: np.ndarray) -> np.ndarray:
+    """
+    Colour flood depths with the viridis colour scale. Depths below 0.1m and missing depths are transparent.
+
+    Parameters
+    ----------
+    depths : np.ndarray
+        The flood depths in metres.
+
+    Returns
+    -------
+    np.ndarray
+        The RGBA colours of the depths, with the colour bands as the first dimension.
+    """
+    stop_depths = _DEPTH_COLOUR_STOPS[:, 0]
+    filled_depths = np.nan_to_num(depths, nan=0)
+    rgba = np.empty((4, *depths.shape), dtype=np.uint8)
+    for band in range(3):
+        rgba[band] = np.interp(filled_depths, stop_depths, _DEPTH_COLOUR_STOPS[:, band + 1]).round()
+    rgba[3] = np.where(filled_depths >= stop_depths[0], 255, 0)
+    return rgba
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """
+    Encode RGBA colours as a PNG image.
+
+    Parameters
+    ----------
+    rgba : np.ndarray
+        The RGBA colours, with the colour bands as the first dimension.
+
+    Returns
+    -------
+    bytes
+        The PNG image.
+    """
+    with warnings.catch_warnings():
+        # The PNG is a map tile, so it does not need to be georeferenced
+        warnings.simplefilter("ignore", NotGeoreferencedWarning)
+        with MemoryFile() as memory_file:
+            with memory_file.open(driver="PNG", width=rgba.shape[2], height=rgba.shape[1], count=4,
+                                  dtype="uint8") as png:
+                png.write(rgba)
+            return memory_file.read()
+
+
+@lru_cache(maxsize=None)
+def get_empty_tile() -> bytes:
+    """
+    Get a fully transparent tile as a PNG image, shared by all tiles outside of model outputs.
+
+    Returns
+    -------
+    bytes
+        The PNG image of the transparent tile.
+    """
+    return encode_png(colour_depths(np.full((TILE_SIZE, TILE_SIZE), np.nan)))
+
+
+def get_max_native_zoom(cog_bounds: Tuple[float, float, float, float], cog_width: int) -> int:
+    """
+    Get the zoom level whose tiles have pixels no larger than the pixels of a COG, beyond which tiles would only
+    upsample the COG.
+
+    Parameters
+    ----------
+    cog_bounds : Tuple[float, float, float, float]
+        The west, south, east and north bounds of the COG in Web Mercator (EPSG:3857) metres.
+    cog_width : int
+        The width of the COG in pixels.
+
+    Returns
+    -------
+    int
+        The maximum zoom level, at most MAX_ZOOM.
+    """  # noqa: D400
+    pixel_width = (cog_bounds[2] - cog_bounds[0]) / cog_width
+    zoom = math.ceil(math.log2(2 * _WEB_MERCATOR_HALF_WIDTH / (TILE_SIZE * pixel_width)))
+    return min(max(zoom, 0), MAX_ZOOM)
+
+
+def is_tile_outside(
+        tile_bounds: Tuple[float, float, float, float],
+        cog_bounds: Tuple[float, float, float, float]) -> bool:
+    """
+    Check whether a tile is entirely outside of a COG.
+
+    Parameters
+    ----------
+    tile_bounds : Tuple[float, float, float, float]
+        The west, south, east and north bounds of the tile in Web Mercator (EPSG:3857) metres.
+    cog_bounds : Tuple[float, float, float, float]
+        The west, south, east and north bounds of the COG in Web Mercator (EPSG:3857) metres.
+
+    Returns
+    -------
+    bool
+        True if the tile does not overlap the COG.
+    """
+    return (tile_bounds[0] >= cog_bounds[2] or tile_bounds[2] <= cog_bounds[0]
+            or tile_bounds[1] >= cog_bounds[3] or tile_bounds[3] <= cog_bounds[1])
+
+
+def render_tile(cog: rasterio.DatasetReader, tile_bounds: Tuple[float, float, float, float]) -> bytes:
+    """
+    Render an XYZ tile of the maximum flood depths of a model output as a PNG image, reading only the COG overview
+    closest to the tile's resolution.
+
+    Parameters
+    ----------
+    cog : rasterio.DatasetReader
+        The open COG of the maximum flood depths of the model output.
+    tile_bounds : Tuple[float, float, float, float]
+        The west, south, east and north bounds of the tile in Web Mercator (EPSG:3857) metres.
+
+    Returns
+    -------
+    bytes
+        The PNG image of the tile.
+    """  # noqa: D400
+    # Warp the COG directly onto the tile grid, which lets GDAL choose the overview to read from
+    with WarpedVRT(cog,
+                   crs="EPSG:3857",
+                   transform=from_bounds(*tile_bounds, TILE_SIZE, TILE_SIZE),
+                   width=TILE_SIZE,
+                   height=TILE_SIZE,
+                   nodata=np.nan,
+                   resampling=Resampling.bilinear) as vrt:
+        depths = vrt.read(1)
+    return encode_png(colour_depths(depths))
+
+
+def get_tile(model_id: int, z: int, x: int, y: int) -> bytes:
+    """
+    Get an XYZ tile of the maximum flood depths of a model output as a PNG image, rendering it if it is not cached.
+    Tiles outside of the model output are the shared transparent tile, and are not cached.
+
+    Parameters
+    ----------
+    model_id : int
+        The database id of the model output.
+    z : int
+        The zoom level of the tile.
+    x : int
+        The column of the tile, from west to east.
+    y : int
+        The row of the tile, from north to south.
+
+    Returns
+    -------
+    bytes
+        The PNG image of the tile.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the model output does not exist.
+    ValueError
+        If the zoom level is beyond the resolution of the model output.
+    """  # noqa: D400
+    tile_path = get_model_tiles_dir(model_id) / "tiles" / str(z) / str(x) / f"{y}.png"
+    try:
+        return tile_path.read_bytes()
+    except FileNotFoundError:
+        pass
+    tile_bounds = get_tile_bounds(z, x, y)
+    with rasterio.open(get_max_depth_cog(model_id)) as cog:
+        cog_bounds = transform_bounds(cog.crs, "EPSG:3857", *cog.bounds)
+        # Tiles outside the model output are fully transparent, so there is nothing to read or cache
+        if is_tile_outside(tile_bounds, cog_bounds):
+            return get_empty_tile()
+        max_zoom = get_max_native_zoom(cog_bounds, cog.width)
+        if z > max_zoom:
+            raise ValueError(f"Zoom level must be at most {max_zoom} for the resolution of model output {model_id}")
+        tile = render_tile(cog, tile_bounds)
+    # Model outputs are never modified once written, so rendered tiles can be cached indefinitely
+    tile_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_tile_path = _temp_path(tile_path)
+    temp_tile_path.write_bytes(tile)
+    os.replace(temp_tile_path, tile_path)
+    return tile
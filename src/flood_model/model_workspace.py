@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+This script manages the isolated BG-Flood model workspaces. Each model run writes its input files into its own
+workspace directory, so that multiple model runs can be prepared and run concurrently without clobbering each other.
+"""  # noqa: D400
+
+import logging
+import pathlib
+import shutil
+import uuid
+
+from src.config import EnvVariable
+
+log = logging.getLogger(__name__)
+
+# The name of the file marking a model workspace whose model inputs are incomplete, e.g. after a transient failure
+INCOMPLETE_INPUTS_MARKER = ".incomplete_inputs"
+
+
+def new_workspace_id() -> str:
+    """
+    Generate a new unique identifier for a model workspace.
+
+    Returns
+    -------
+    str
+        A new unique identifier for a model workspace.
+    """
+    return uuid.uuid4().hex
+
+
+def get_model_workspace(workspace_id: str) -> pathlib.Path:
+    """
+    Get the directory of the model workspace with the given identifier, creating it if it does not already exist.
+
+    Parameters
+    ----------
+    workspace_id : str
+        The unique identifier of the model workspace.
+
+    Returns
+    -------
+    pathlib.Path
+        The model workspace directory.
+    """
+    # Get the directory containing all model workspaces from the environment variable
+    model_workspace = EnvVariable.DATA_DIR_MODEL_WORKSPACE / workspace_id
+    # Create the model workspace directory if it does not already exist
+    model_workspace.mkdir(parents=True, exist_ok=True)
+    return model_workspace
+
+
+def remove_model_workspace(workspace_id: str) -> None:
+    """
+    Remove the model workspace with the given identifier, unless the KEEP_MODEL_WORKSPACE environment variable is set,
+    in which case the workspace is kept for debugging.
+
+    Parameters
+    ----------
+    workspace_id : str
+        The unique identifier of the model workspace.
+    """  # noqa: D400
+    model_workspace = EnvVariable.DATA_DIR_MODEL_WORKSPACE / workspace_id
+    if EnvVariable.KEEP_MODEL_WORKSPACE:
+        log.info(f"Keeping model workspace '{model_workspace}' for debugging.")
+        return
+    shutil.rmtree(model_workspace, ignore_errors=True)
+    log.debug(f"Removed model workspace '{model_workspace}'.")
+
+
+def mark_inputs_incomplete(model_workspace: pathlib.Path) -> None:
+    """
+    Mark the model inputs in a model workspace as incomplete, so that the model output is not stored for reuse.
+
+    Parameters
+    ----------
+    model_workspace : pathlib.Path
+        The model workspace directory.
+    """
+    (model_workspace / INCOMPLETE_INPUTS_MARKER).touch()
+
+
+def has_incomplete_inputs(model_workspace: pathlib.Path) -> bool:
+    """
+    Check whether the model inputs in a model workspace have been marked as incomplete.
+
+    Parameters
+    ----------
+    model_workspace : pathlib.Path
+        The model workspace directory.
+
+    Returns
+    -------
+    bool
+        True if the model inputs have been marked as incomplete, False otherwise.
+    """
+    return (model_workspace / INCOMPLETE_INPUTS_MARKER).exists()
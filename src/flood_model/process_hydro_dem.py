@@ -18,7 +18,7 @@ from shapely import LineString
 from shapely.geometry import box
 from sqlalchemy.engine import Engine
 
-from src.digitaltwin import setup_environment, tables
+from src.digitaltwin import artifact_store, run_cache, setup_environment, tables
 from src.digitaltwin.utils import LogLevel, setup_logging
 
 log = logging.getLogger(__name__)
@@ -55,6 +55,38 @@ def retrieve_hydro_dem_info(
     return hydro_dem, hydro_dem_extent, res_no
 
 
+def retrieve_hydro_dem_extent(
+        engine: Engine,
+        catchment_area: gpd.GeoDataFrame) -> Tuple[LineString, Union[int, float]]:
+    """
+    Retrieve the spatial extent and resolution of the Hydrologically Conditioned DEM (Hydro DEM) for the specified
+    catchment area, without loading the Hydro DEM data if the extent has already been published to the artifact store.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    catchment_area : gpd.GeoDataFrame
+        A GeoDataFrame representing the catchment area.
+
+    Returns
+    -------
+    Tuple[LineString, Union[int, float]]
+        A tuple containing the spatial extent of the Hydro DEM as a LineString, and the resolution of the Hydro DEM as
+        either an integer or a float.
+    """  # noqa: D400
+    # Load the Hydro DEM extent if a previous stage has already published it
+    dataset_versions = run_cache.get_dataset_versions(engine)
+    hydro_dem_extent_gdf = artifact_store.load_area_artifact(catchment_area, dataset_versions, "hydro_dem_extent")
+    if hydro_dem_extent_gdf is None:
+        # Otherwise retrieve the Hydro DEM and publish its extent for later stages
+        _, hydro_dem_extent, res_no = retrieve_hydro_dem_info(engine, catchment_area)
+        hydro_dem_extent_gdf = gpd.GeoDataFrame(
+            data={"resolution": [res_no]}, geometry=[hydro_dem_extent], crs=catchment_area.crs)
+        artifact_store.publish_area_artifact(catchment_area, dataset_versions, "hydro_dem_extent", hydro_dem_extent_gdf)
+    return hydro_dem_extent_gdf["geometry"].iloc[0], hydro_dem_extent_gdf["resolution"].iloc[0]
+
+
 def get_hydro_dem_boundary_lines(engine: Engine, catchment_area: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Get the boundary lines of the Hydrologically Conditioned DEM.
@@ -72,7 +104,7 @@ def get_hydro_dem_boundary_lines(engine: Engine, catchment_area: gpd.GeoDataFram
         A GeoDataFrame containing the boundary lines of the Hydrologically Conditioned DEM.
     """
     # Obtain the spatial extent of the hydro DEM
-    _, hydro_dem_extent, _ = retrieve_hydro_dem_info(engine, catchment_area)
+    hydro_dem_extent, _ = retrieve_hydro_dem_extent(engine, catchment_area)
     # Create a list of LineString segments from the exterior boundary coordinates
     dem_boundary_lines_list = [
         LineString([hydro_dem_extent.coords[i], hydro_dem_extent.coords[i + 1]])
@@ -104,6 +136,7 @@ def ensure_lidar_datasets_initialised() -> None:
         # If it is not initialised, then initialise it
         log.info("dataset table does not exist, initialising LiDAR dataset information.")
         newzealidar.datasets.main()
+        run_cache.refresh_dataset_version(engine, run_cache.DatasetName.LIDAR)
     # Check that datasets_mapping is in the instructions.json file
     instructions_file_name = "instructions.json"
     with open(instructions_file_name, "r", encoding="utf-8") as instructions_file:
@@ -134,8 +167,12 @@ def refresh_lidar_datasets() -> None:
     """
     Web-scrapes OpenTopography metadata to create the datasets table containing links to LiDAR data sources.
     Takes a long time to run but needs to be run periodically so that the datasets are up to date.
+    Cached model runs are invalidated since they were produced using the previous LiDAR datasets.
     """
     newzealidar.datasets.main()
+    # Connect to database
+    engine = setup_environment.get_connection_from_profile()
+    run_cache.refresh_dataset_version(engine, run_cache.DatasetName.LIDAR)
 
 
 def main(
@@ -162,3 +199,6 @@ def main(
     setup_logging(log_level)
     ensure_lidar_datasets_initialised()
     process_dem(selected_polygon_gdf)
+    # Publish the Hydro DEM extent so that later stages can use it without loading the Hydro DEM
+    engine = setup_environment.get_connection_from_profile()
+    retrieve_hydro_dem_extent(engine, selected_polygon_gdf)
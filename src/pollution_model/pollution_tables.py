@@ -195,5 +195,6 @@ class MedusaScenarios(Base):
     event_duration = Column(Float, primary_key=True)
     rainfall_ph = Column(Float, primary_key=True)
 
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), comment="log created datetime")
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        comment="log created datetime")
     geometry = Column(Geometry("POLYGON", srid=2193))
@@ -19,6 +19,7 @@ from sqlalchemy.sql import text
 from src import geoserver
 from src.config import EnvVariable
 from src.digitaltwin import setup_environment
+from src.digitaltwin.bulk_load import copy_to_db
 from src.digitaltwin.tables import create_table, check_table_exists
 from src.digitaltwin.tables import execute_query
 from src.digitaltwin.utils import get_catchment_area, LogLevel, setup_logging
@@ -496,8 +497,8 @@ def run_pollution_model_rain_event(engine: Engine,
     all_buildings["scenario_id"] = scenario_id  # pylint: disable=unsupported-assignment-operation
     all_roads["scenario_id"] = scenario_id  # pylint: disable=unsupported-assignment-operation
 
-    all_buildings.to_sql(Medusa2ModelOutputBuildings.__tablename__, engine, if_exists="append", index=True)
-    all_roads.to_sql(Medusa2ModelOutputRoads.__tablename__, engine, if_exists="append", index=True)
+    copy_to_db(engine, all_buildings, Medusa2ModelOutputBuildings.__tablename__, index=True)
+    copy_to_db(engine, all_roads, Medusa2ModelOutputRoads.__tablename__, index=True)
     log.info("MEDUSA2 pollution model output saved to the database.")
 
     return scenario_id
@@ -0,0 +1,317 @@
+"""
+HTTP caching for responses derived from model outputs. Model outputs never change once they are written, so responses
+derived from them are served with validators and long-lived cache headers, conditional requests are answered with
+NOT_MODIFIED, and recently served responses are kept in memory so that hot models are served without touching the
+database or the file system.
+"""  # noqa: D400
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from http.client import NOT_MODIFIED, OK
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from flask import Response, request
+
+from src.digitaltwin import setup_environment
+from src.flood_model import bg_flood_model
+
+log = logging.getLogger(__name__)
+
+# Model outputs never change, so clients and proxies can cache responses derived from them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# The maximum total size of the responses kept in memory
+MAX_CACHED_BYTES = 256 * 1024 * 1024
+# The maximum size of a single response kept in memory, so that one large response does not evict all others
+MAX_CACHED_RESPONSE_BYTES = 16 * 1024 * 1024
+# The maximum number of model creation times kept in memory
+MAX_CACHED_MODELS = 10000
+# Headers that are set again whenever a cached response is served, so are not kept with it
+_UNCACHED_HEADERS = {"content-length", "etag", "last-modified", "cache-control"}
+
+
+class CachedResponse(NamedTuple):
+    """
+    Represents a response kept in memory by the response cache.
+
+    Attributes
+    ----------
+    etag : str
+        The entity tag of the response.
+    body : bytes
+        The body of the response.
+    headers : List[Tuple[str, str]]
+        The headers of the response describing the body, such as Content-Type and Content-Disposition.
+    """
+
+    etag: str
+    body: bytes
+    headers: List[Tuple[str, str]]
+
+
+# Guards the in-memory caches, since requests may be handled by several threads of the same process
+_cache_lock = threading.Lock()
+# The creation time of each model output, keyed by model id
+_model_created_at: "OrderedDict[int, datetime]" = OrderedDict()
+# Recently served responses, keyed by request path including the query string and by Accept header, from least to most
+# recently used
+_cached_responses: "OrderedDict[str, CachedResponse]" = OrderedDict()
+# The total size of the bodies of the cached responses
+_cached_bytes = 0
+
+
+def get_model_created_at(model_id: int) -> datetime:
+    """
+    Get the time that a model output was created, only querying the database the first time for each model.
+
+    Parameters
+    ----------
+    model_id : int
+        The ID of the model output.
+
+    Returns
+    -------
+    datetime
+        The time that the model output was created.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the model output does not exist.
+    """
+    with _cache_lock:
+        created_at = _model_created_at.get(model_id)
+        if created_at is not None:
+            _model_created_at.move_to_end(model_id)
+            return created_at
+    engine = setup_environment.get_connection_from_profile()
+    created_at = bg_flood_model.model_created_at_from_db_by_id(engine, model_id)
+    with _cache_lock:
+        _model_created_at[model_id] = created_at
+        if len(_model_created_at) > MAX_CACHED_MODELS:
+            _model_created_at.popitem(last=False)
+    return created_at
+
+
+def _store_response(cache_key: str, cached_response: CachedResponse) -> None:
+    """
+    Keep a response in memory, evicting the least recently used responses to stay within MAX_CACHED_BYTES.
+
+    Parameters
+    ----------
+    cache_key : str
+        The request path including the query string, and the Accept header.
+    cached_response : CachedResponse
+        The response to keep.
+    """
+    global _cached_bytes  # pylint: disable=global-statement
+    with _cache_lock:
+        previous_response = _cached_responses.pop(cache_key, None)
+        if previous_response is not None:
+            _cached_bytes -= len(previous_response.body)
+        _cached_responses[cache_key] = cached_response
+        _cached_bytes += len(cached_response.body)
+        while _cached_bytes > MAX_CACHED_BYTES:
+            _, evicted_response = _cached_responses.popitem(last=False)
+            _cached_bytes -= len(evicted_response.body)
+
+
+def _get_stored_response(cache_key: str, etag: str) -> Optional[CachedResponse]:
+    """
+    Get a response kept in memory, if it is still current.
+
+    Parameters
+    ----------
+    cache_key : str
+        The request path including the query string, and the Accept header.
+    etag : str
+        The current entity tag for the request.
+
+    Returns
+    -------
+    Optional[CachedResponse]
+        The response kept in memory, or None if there is no current response.
+    """
+    with _cache_lock:
+        cached_response = _cached_responses.get(cache_key)
+        if cached_response is None or cached_response.etag != etag:
+            return None
+        _cached_responses.move_to_end(cache_key)
+        return cached_response
+
+
+def _get_body_headers(response: Response) -> List[Tuple[str, str]]:
+    """
+    Get the headers of a response that describe its body, to keep with the body in memory.
+
+    Parameters
+    ----------
+    response : Response
+        The response to get the headers of.
+
+    Returns
+    -------
+    List[Tuple[str, str]]
+        The headers of the response, other than those set whenever a cached response is served.
+    """
+    return [(name, value) for name, value in response.headers.items() if name.lower() not in _UNCACHED_HEADERS]
+
+
+def _tee_into_cache(chunks: Iterable, cache_key: str, etag: str, headers: List[Tuple[str, str]]) -> Iterator:
+    """
+    Pass through the chunks of a streamed response, keeping the whole response in memory once it has been streamed,
+    unless it is larger than MAX_CACHED_RESPONSE_BYTES.
+
+    Parameters
+    ----------
+    chunks : Iterable
+        The chunks of the streamed response, as str or bytes.
+    cache_key : str
+        The request path including the query string, and the Accept header.
+    etag : str
+        The entity tag of the response.
+    headers : List[Tuple[str, str]]
+        The headers of the response describing the body.
+
+    Yields
+    ------
+    str | bytes
+        The chunks of the streamed response.
+    """  # noqa: D400
+    body_chunks = []
+    body_size = 0
+    is_too_large = False
+    for chunk in chunks:
+        if not is_too_large:
+            chunk_bytes = chunk.encode() if isinstance(chunk, str) else chunk
+            body_size += len(chunk_bytes)
+            # Stop collecting responses that are too large to keep, but keep streaming them
+            is_too_large = body_size > MAX_CACHED_RESPONSE_BYTES
+            if is_too_large:
+                body_chunks.clear()
+            else:
+                body_chunks.append(chunk_bytes)
+        yield chunk
+    if not is_too_large:
+        _store_response(cache_key, CachedResponse(etag, b"".join(body_chunks), headers))
+
+
+def _set_cache_headers(response: Response, etag: str, created_at: datetime) -> Response:
+    """
+    Set the validators and long-lived cache headers on a response derived from a model output.
+
+    Parameters
+    ----------
+    response : Response
+        The response to set the headers on.
+    etag : str
+        The entity tag of the response.
+    created_at : datetime
+        The time that the model output was created.
+
+    Returns
+    -------
+    Response
+        The response with the headers set.
+    """
+    response.set_etag(etag, weak=True)
+    response.vary.add("Accept")
+    response.last_modified = created_at
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def immutable_model_response(
+        get_model_id: Callable[..., Optional[int]]) -> Callable[[Callable[..., Response]], Callable[..., Response]]:
+    """
+    Create a view function decorator for GET endpoints whose responses are derived from a single model output, which
+    never changes once it is written.
+    Successful responses are served with ETag, Last-Modified and immutable Cache-Control headers, conditional requests
+    are answered with NOT_MODIFIED without calling the view, and responses are kept in memory so that repeated
+    requests are served without calling the view.
+
+    Parameters
+    ----------
+    get_model_id : Callable[..., Optional[int]]
+        Function taking the view function's keyword arguments and returning the ID of the model output that the
+        response is derived from, or None if it is not yet known, in which case the response is not cached.
+
+    Returns
+    -------
+    Callable[[Callable[..., Response]], Callable[..., Response]]
+        The view function decorator.
+    """  # noqa: D400
+
+    def decorator(f: Callable[..., Response]) -> Callable[..., Response]:
+        """
+        Decorate a view function with HTTP caching for responses derived from a model output.
+
+        Parameters
+        ----------
+        f : Callable[..., Response]
+            The view function that is being decorated.
+
+        Returns
+        -------
+        Callable[..., Response]
+            The decorated view function.
+        """
+
+        @wraps(f)
+        def decorated_function(*args: Tuple, **kwargs: Dict) -> Response:
+            """
+            Serve the response from the caches if possible, otherwise call `f` and cache its response.
+
+            Parameters
+            ----------
+            args : Tuple
+                The original arguments for function `f`.
+            kwargs : Dict
+                The original keyword arguments for function `f`.
+
+            Returns
+            -------
+            Response
+                NOT_MODIFIED if the client's cached response is current, otherwise the response of `f`.
+            """
+            # Only the representation served to GET requests is cached, other methods may have side effects
+            if request.method not in ("GET", "HEAD"):
+                return f(*args, **kwargs)
+            model_id = get_model_id(**kwargs)
+            if model_id is None:
+                return f(*args, **kwargs)
+            try:
+                created_at = get_model_created_at(model_id)
+            except FileNotFoundError:
+                # Let the view function respond to model outputs that do not exist
+                return f(*args, **kwargs)
+            # Responses depend on the model output, the request path including the query string, and the negotiated
+            # media type. Compression is negotiated outside the cache, so that cached responses are uncompressed
+            cache_key = f"{request.full_path} {request.headers.get('Accept', '')}"
+            fingerprint = hashlib.sha256(f"{model_id}:{created_at.isoformat()}:{cache_key}".encode()).hexdigest()
+            etag = fingerprint[:32]
+            # Answer conditional requests from clients that already have the current response
+            if request.if_none_match.contains_weak(etag) or (
+                    not request.if_none_match and request.if_modified_since is not None
+                    and request.if_modified_since >= created_at.replace(microsecond=0)):
+                return _set_cache_headers(Response(status=NOT_MODIFIED), etag, created_at)
+            cached_response = _get_stored_response(cache_key, etag)
+            if cached_response is not None:
+                response = Response(cached_response.body, status=OK, headers=cached_response.headers)
+                return _set_cache_headers(response, etag, created_at)
+            response = f(*args, **kwargs)
+            if response.status_code != OK:
+                return response
+            # Files sent directly from disk are not kept in memory, since they are already served without a copy
+            if response.is_streamed and not response.direct_passthrough:
+                response.response = _tee_into_cache(response.response, cache_key, etag, _get_body_headers(response))
+            elif not response.is_streamed and response.content_length is not None \
+                    and response.content_length <= MAX_CACHED_RESPONSE_BYTES:
+                _store_response(cache_key, CachedResponse(etag, response.get_data(), _get_body_headers(response)))
+            return _set_cache_headers(response, etag, created_at)
+
+        return decorated_function
+
+    return decorator
@@ -0,0 +1,200 @@
+"""
+Negotiates compact encodings for large API responses. Clients that send Accept-Encoding receive responses compressed
+with brotli or gzip, including streamed responses which are compressed chunk by chunk, and clients that accept Apache
+Arrow IPC streams can receive columnar binary data instead of JSON, which is always the default.
+"""  # noqa: D400
+import gzip
+import logging
+import zlib
+from functools import wraps
+from http.client import OK
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import pyarrow as pa
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    # Brotli is optional, responses are compressed with gzip when it is not installed
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+# The media type of Apache Arrow IPC streams
+ARROW_STREAM_MIMETYPE = "application/vnd.apache.arrow.stream"
+# Responses smaller than this many bytes are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+# Compression levels that favour speed, since responses are compressed for every request
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def wants_arrow() -> bool:
+    """
+    Check whether the client of the current request prefers an Apache Arrow IPC stream to JSON.
+
+    Returns
+    -------
+    bool
+        True if the Accept header ranks Arrow IPC streams above JSON, otherwise False so that JSON is the default.
+    """
+    # JSON is listed first so that it wins when both are equally acceptable, e.g. for "*/*"
+    return request.accept_mimetypes.best_match(["application/json", ARROW_STREAM_MIMETYPE]) == ARROW_STREAM_MIMETYPE
+
+
+def arrow_response(table: pa.Table) -> Response:
+    """
+    Create a response containing a table as an Apache Arrow IPC stream.
+
+    Parameters
+    ----------
+    table : pa.Table
+        The table to send.
+
+    Returns
+    -------
+    Response
+        The OK response containing the Arrow IPC stream.
+    """
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), status=OK, mimetype=ARROW_STREAM_MIMETYPE)
+
+
+def _negotiate_content_encoding() -> Optional[str]:
+    """
+    Choose the compression for the response to the current request from its Accept-Encoding header.
+
+    Returns
+    -------
+    Optional[str]
+        "br" or "gzip", or None if the client does not accept either.
+    """
+    available_encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(available_encodings)
+
+
+def _compress(data: bytes, content_encoding: str) -> bytes:
+    """
+    Compress a whole response body.
+
+    Parameters
+    ----------
+    data : bytes
+        The response body.
+    content_encoding : str
+        "br" or "gzip".
+
+    Returns
+    -------
+    bytes
+        The compressed response body.
+    """
+    if content_encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def _compress_chunks(chunks: Iterable, content_encoding: str) -> Iterator[bytes]:
+    """
+    Compress a streamed response body chunk by chunk, flushing after each chunk so that the client receives data as
+    soon as it is produced.
+
+    Parameters
+    ----------
+    chunks : Iterable
+        The chunks of the streamed response, as str or bytes.
+    content_encoding : str
+        "br" or "gzip".
+
+    Yields
+    ------
+    bytes
+        The compressed chunks.
+    """  # noqa: D400
+    if content_encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk.encode() if isinstance(chunk, str) else chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        # wbits of 16 + MAX_WBITS writes a gzip header and trailer rather than a raw zlib stream
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk) + compressor.flush(
+                zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress a response with the best compression accepted by the client of the current request.
+    Error responses, files sent directly from disk, and responses that are already compressed are left as they are.
+
+    Parameters
+    ----------
+    response : Response
+        The response to compress.
+
+    Returns
+    -------
+    Response
+        The compressed response, or the original response if it was not compressed.
+    """  # noqa: D400
+    response.vary.add("Accept-Encoding")
+    if response.status_code != OK or response.direct_passthrough or "Content-Encoding" in response.headers:
+        return response
+    content_encoding = _negotiate_content_encoding()
+    if content_encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = _compress_chunks(response.response, content_encoding)
+        # The compressed length is not known until the stream has been sent
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_BYTES:
+            return response
+        response.set_data(_compress(data, content_encoding))
+    response.headers["Content-Encoding"] = content_encoding
+    return response
+
+
+def compressible(f: Callable[..., Response]) -> Callable[..., Response]:
+    """
+    View function decorator that compresses responses with the best compression accepted by the client.
+    Should be the outermost decorator after the route, so that cached responses are kept uncompressed.
+
+    Parameters
+    ----------
+    f : Callable[..., Response]
+        The view function that is being decorated.
+
+    Returns
+    -------
+    Callable[..., Response]
+        The decorated view function.
+    """  # noqa: D400
+
+    @wraps(f)
+    def decorated_function(*args: Tuple, **kwargs: Dict) -> Response:
+        """
+        Call `f` and compress its response.
+
+        Parameters
+        ----------
+        args : Tuple
+            The original arguments for function `f`.
+        kwargs : Dict
+            The original keyword arguments for function `f`.
+
+        Returns
+        -------
+        Response
+            The response of `f`, compressed if the client accepts compression.
+        """
+        return compress_response(f(*args, **kwargs))
+
+    return decorated_function
@@ -0,0 +1,130 @@
+"""
+Streams the status of Celery tasks to clients as Server-Sent Events (SSE). The Redis result backend publishes every task
+state change and stage progress update on a channel named after its key, so the stream subscribes to the channels of a
+task and its stages, and sends the status of the task only when it has changed, instead of clients polling for it.
+Each stream holds a web server thread and a Redis connection, so streams are closed after a bounded time and clients
+reconnect to continue them, and the number of streams open at once in each process is limited.
+"""  # noqa: D400
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Set
+
+from celery import states
+
+from src import tasks
+from src.config import EnvVariable
+
+log = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments, so that proxies do not close idle streams during long model stages
+KEEP_ALIVE_INTERVAL = 15
+# Milliseconds that clients wait before reconnecting to a closed stream
+RECONNECT_DELAY = 5000
+
+# Limits the streams open at once in this process, so that they leave web server threads for other requests
+_open_streams = threading.BoundedSemaphore(EnvVariable.TASK_STREAM_MAX_OPEN)
+
+
+def try_open_stream() -> bool:
+    """
+    Reserve one of the streams that may be open at once in this process, without waiting for one to close.
+
+    Returns
+    -------
+    bool
+        True if a stream was reserved, which must be released with `close_stream`, or False if too many are open.
+    """
+    return _open_streams.acquire(blocking=False)
+
+
+def close_stream() -> None:
+    """Release a stream reserved with `try_open_stream` once its response has been closed."""
+    _open_streams.release()
+
+
+def format_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format a Server-Sent Event.
+
+    Parameters
+    ----------
+    event : str
+        The type of the event.
+    data : Dict[str, Any]
+        The JSON data of the event.
+
+    Returns
+    -------
+    str
+        The event in the text/event-stream format.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_task_status(task_id: str, get_status_body: Callable[[], Dict[str, Any]]) -> Iterator[str]:
+    """
+    Stream the status of a task as Server-Sent Events, sending a "status" event whenever the status changes, until the
+    task has finished. The stream is closed after EnvVariable.TASK_STREAM_MAX_DURATION so that clients reconnect rather
+    than holding a thread for the whole model run, and an "unknown" event ends the stream if the task is still PENDING
+    with no stages after EnvVariable.TASK_STREAM_UNKNOWN_TIMEOUT, e.g. for an unknown or expired task id.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the task.
+    get_status_body : Callable[[], Dict[str, Any]]
+        Function returning the current status body of the task, as served by the task status endpoint.
+
+    Yields
+    ------
+    str
+        The next chunk of the text/event-stream.
+    """  # noqa: D400
+    yield f"retry: {RECONNECT_DELAY}\n\n"
+    pubsub = tasks.app.backend.client.pubsub(ignore_subscribe_messages=True)
+    subscribed_channels: Set[bytes] = set()
+    last_status_json = None
+    started_at = time.monotonic()
+    stream_deadline = started_at + EnvVariable.TASK_STREAM_MAX_DURATION
+    try:
+        while True:
+            status_body = get_status_body()
+            # Subscribe before sending the status, so that no change after this status is missed
+            stage_task_ids = [stage["taskId"] for stage in status_body["stages"]]
+            new_channels = tasks.get_task_status_channels(task_id, stage_task_ids) - subscribed_channels
+            if new_channels:
+                pubsub.subscribe(*new_channels)
+                subscribed_channels |= new_channels
+                # Changes may have been published before subscribing, so read the status again
+                status_body = get_status_body()
+            status_json = json.dumps(status_body, sort_keys=True)
+            if status_json != last_status_json:
+                yield format_event("status", status_body)
+                last_status_json = status_json
+            if status_body["taskStatus"] in states.READY_STATES:
+                return
+            now = time.monotonic()
+            # Celery reports unknown and expired task ids as PENDING, and registers stages against model runs it knows
+            is_unknown = status_body["taskStatus"] == states.PENDING and not status_body["stages"]
+            unknown_deadline = started_at + EnvVariable.TASK_STREAM_UNKNOWN_TIMEOUT
+            if is_unknown and now >= unknown_deadline:
+                yield format_event("unknown", {"taskId": task_id})
+                return
+            if now >= stream_deadline:
+                # Close the stream, the client reconnects after the retry delay to continue it
+                return
+            # Wait until a change is published, sending keep-alive comments while nothing changes
+            close_at = min(stream_deadline, unknown_deadline) if is_unknown else stream_deadline
+            deadline = min(now + KEEP_ALIVE_INTERVAL, close_at)
+            message = None
+            while message is None and time.monotonic() < deadline:
+                message = pubsub.get_message(timeout=max(deadline - time.monotonic(), 0))
+            if message is None and time.monotonic() < close_at:
+                yield ": keep-alive\n\n"
+            # Drain any other changes published at the same time, since the status is read again in full
+            while pubsub.get_message(timeout=0) is not None:
+                pass
+    finally:
+        pubsub.close()
@@ -0,0 +1,80 @@
+"""
+Waits on Celery task results from view functions. Each wait blocks the thread serving the request, like any other
+`AsyncResult.get()`, but is bounded by a timeout so that a stuck or overloaded worker cannot hold web server threads
+indefinitely. The task is revoked if the wait times out, so that abandoned lookups do not occupy Celery workers.
+"""  # noqa: D400
+import logging
+from typing import Any, Optional, Union
+
+from celery import Task, result
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+
+from src.config import EnvVariable
+
+log = logging.getLogger(__name__)
+
+
+class TaskTimeoutError(TimeoutError):
+    """Raised when a task result is not ready within the time allowed for a request."""
+
+
+def wait_for_result(
+        async_result: Union[result.AsyncResult, result.GroupResult],
+        timeout: Optional[float] = None) -> Any:
+    """
+    Wait for the result of a task, or of each task in a group, for at most the timeout.
+
+    Parameters
+    ----------
+    async_result : Union[result.AsyncResult, result.GroupResult]
+        The result of the task, or group of tasks, to wait for.
+    timeout : Optional[float] = None
+        The maximum time to wait, in seconds. Defaults to EnvVariable.API_TASK_TIMEOUT.
+
+    Returns
+    -------
+    Any
+        The value returned by the task, or a list of the values returned by each task in a group.
+
+    Raises
+    ------
+    TaskTimeoutError
+        If the task result is not ready within the timeout. The task, or each task in a group, is revoked.
+    Exception
+        If the task failed, the exception raised by the task is re-raised.
+    """
+    timeout = EnvVariable.API_TASK_TIMEOUT if timeout is None else timeout
+    try:
+        return async_result.get(timeout=timeout)
+    except CeleryTimeoutError as error:
+        log.warning(f"Task {async_result.id} not ready after {timeout}s, revoking it.")
+        async_result.revoke()
+        raise TaskTimeoutError(f"Task {async_result.id} not ready after {timeout}s") from error
+
+
+def run_task(task: Task, *args: Any, timeout: Optional[float] = None) -> Any:
+    """
+    Send a task to the Celery workers and wait for its result, for at most the timeout.
+
+    Parameters
+    ----------
+    task : Task
+        The task to run.
+    args : Any
+        The arguments of the task.
+    timeout : Optional[float] = None
+        The maximum time to wait, in seconds. Defaults to EnvVariable.API_TASK_TIMEOUT.
+
+    Returns
+    -------
+    Any
+        The value returned by the task.
+
+    Raises
+    ------
+    TaskTimeoutError
+        If the task result is not ready within the timeout. The task is revoked.
+    Exception
+        If the task failed, the exception raised by the task is re-raised.
+    """
+    return wait_for_result(task.delay(*args), timeout)
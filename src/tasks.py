@@ -2,24 +2,34 @@
 Runs backend tasks using Celery. Allowing for multiple long-running tasks to complete in the background.
 Allows the frontend to send tasks and retrieve status later.
 """
+import json
 import logging
+import pathlib
 import traceback
-from typing import Dict, List, NamedTuple, Tuple, Union, Optional
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from enum import StrEnum
+from types import ModuleType
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple, Union, Optional
 
 import billiard.einfo
 import geopandas as gpd
 import shapely
-import xarray
-from celery import Celery, states, result
-from pyproj import Transformer
-
+from celery import Celery, chain, chord, current_task, group, signals, states, result
+from celery.canvas import Signature
+from celery.utils import uuid
+from kombu import Queue
+from redis.exceptions import WatchError
+from sqlalchemy.engine import Engine
+
+from src import worker_health
 from src.config import EnvVariable
-from src.digitaltwin import retrieve_static_boundaries, setup_environment
-from src.digitaltwin.utils import setup_logging
-from src.dynamic_boundary_conditions.rainfall import main_rainfall
+from src.digitaltwin import retrieve_static_boundaries, run_cache, setup_environment, worker_context
+from src.digitaltwin.utils import progress_reporter, setup_logging
+from src.dynamic_boundary_conditions.rainfall import main_rainfall, rainfall_sites, thiessen_polygons
 from src.dynamic_boundary_conditions.river import main_river
 from src.dynamic_boundary_conditions.tide import main_tide_slr
-from src.flood_model import bg_flood_model, process_hydro_dem
+from src.flood_model import bg_flood_model, model_output_reader, model_tiles, model_workspace, process_hydro_dem
 from src.pollution_model.run_medusa_2 import retrieve_input_parameters
 from src.run_all import DEFAULT_MODULES_TO_PARAMETERS
 
@@ -31,6 +41,108 @@ setup_logging()
 log = logging.getLogger(__name__)
 
 
+class TaskQueue(StrEnum):
+    """
+    StrEnum to represent the Celery queues that tasks are routed to.
+
+    Attributes
+    ----------
+    MODELS : str
+        Long-running tasks such as model runs and dataset refreshes. The default queue.
+    INTERACTIVE : str
+        Sub-second lookups that web requests wait on, served by a dedicated worker pool so that they are not
+        stuck behind model runs.
+    """
+
+    MODELS = "models"
+    INTERACTIVE = "interactive"
+
+
+# Workers consume both queues unless started with `-Q`, so that a single worker is enough for development
+app.conf.task_queues = [Queue(queue) for queue in TaskQueue]
+app.conf.task_default_queue = TaskQueue.MODELS
+# Route the lookups that web requests wait on to the interactive queue
+app.conf.task_routes = {
+    f"{__name__}.{task_name}": {"queue": TaskQueue.INTERACTIVE}
+    for task_name in (
+        "get_cached_model_id",
+        "get_model_output_filepath_from_model_id",
+        "get_depth_by_time_at_point",
+        "retrieve_medusa_input_parameters",
+        "get_model_extents_bbox",
+        "release_in_flight_model",
+        "remove_failed_model_workspace",
+    )
+}
+# Only reserve one task per worker slot at a time, so that queued model runs are not held by busy workers
+app.conf.worker_prefetch_multiplier = 1
+
+# Custom Celery state for model run stages that are running and reporting their progress
+PROGRESS = "PROGRESS"
+# Seconds after which an in-flight model run is no longer joined by identical requests, in case it was lost
+IN_FLIGHT_MODEL_TIMEOUT = 24 * 60 * 60
+
+
+@signals.worker_init.connect
+def bootstrap_worker_database(**_kwargs: Any) -> None:
+    """
+    Create any missing database tables once when the worker starts, before any pool processes are forked, rather than
+    each time a database engine is created.
+    """  # noqa: D400
+    setup_environment.bootstrap_database()
+
+
+@signals.worker_init.connect
+@signals.worker_process_init.connect
+def init_worker(**_kwargs: Any) -> None:
+    """
+    Initialise the worker context when a worker starts, so that tasks reuse its database engine and reference data.
+    Prefork pools initialise each pool process, whereas thread pools share the context of the worker process.
+    """  # noqa: D400
+    worker_context.init_worker_context()
+
+
+@signals.task_prerun.connect
+def expire_worker_context(**_kwargs: Any) -> None:
+    """
+    Expire the dataset versions cached by the worker context before each task, so that each task uses reference data
+    for the current version of the datasets without querying the version every time the reference data is used.
+    """  # noqa: D400
+    worker_context.expire_dataset_versions()
+
+
+@signals.worker_ready.connect
+def start_worker_heartbeat(sender: Any, **_kwargs: Any) -> None:
+    """
+    Start sending heartbeats once the worker is ready to consume tasks, so that the web application can check that
+    workers are available without pinging them.
+
+    Parameters
+    ----------
+    sender : Any
+        The consumer of the worker that is ready.
+    """  # noqa: D400
+    worker_health.start_heartbeat(
+        app.backend.client,
+        sender.hostname,
+        queues=app.amqp.queues.consume_from.keys(),
+        concurrency=getattr(sender.controller, "concurrency", None),
+    )
+
+
+@signals.worker_shutdown.connect
+def stop_worker_heartbeat(sender: Any, **_kwargs: Any) -> None:
+    """
+    Stop sending heartbeats when the worker shuts down, so that it is no longer counted as available.
+
+    Parameters
+    ----------
+    sender : Any
+        The worker that is shutting down.
+    """
+    worker_health.stop_heartbeat(app.backend.client, sender.hostname)
+
+
 class OnFailureStateTask(app.Task):
     """Task that switches state to FAILURE if an exception occurs."""  # pylint: disable=too-few-public-methods
 
@@ -74,9 +186,14 @@ class DepthTimePlot(NamedTuple):
     times: List[float]
 
 
-def create_model_for_area(selected_polygon_wkt: str, scenario_options: dict) -> result.GroupResult:
+def create_model_for_area(selected_polygon_wkt: str, scenario_options: dict) -> result.AsyncResult:
     """
-    Create a model for the area using series of chained (sequential) sub-tasks.
+    Create a model for the area using a graph of sub-tasks.
+    The base data and DEM tasks are chained (sequential), then the rainfall, tide and river input tasks run in
+    parallel as the header of a chord, with the flood model task as the chord callback.
+    If any of the parallel tasks fails then the flood model task is marked as failed.
+    If an identical model run is already in flight then no new tasks are started, and the in-flight model run's
+    task result is returned instead.
 
     Parameters
     ----------
@@ -87,23 +204,496 @@ def create_model_for_area(selected_polygon_wkt: str, scenario_options: dict) ->
 
     Returns
     -------
-    result.GroupResult
+    result.AsyncResult
         The task result for the long-running group of tasks. The task ID represents the final task in the group.
+    """  # noqa: D400
+    shared_stages = {
+        run_cache.ModelStage.BASE_DATA: add_base_data_to_db.si(selected_polygon_wkt).set(task_id=uuid()),
+        run_cache.ModelStage.DEM: process_dem.si(selected_polygon_wkt).set(task_id=uuid()),
+    }
+    scenario_model_graph = create_scenario_model_graph(selected_polygon_wkt, scenario_options, shared_stages)
+    # Only start the model run if no identical model run is in flight
+    request_fingerprint = run_cache.model_request_fingerprint(wkt_to_gdf(selected_polygon_wkt), scenario_options)
+    flood_model_task_id = claim_in_flight_model(request_fingerprint, scenario_model_graph.body.id)
+    if flood_model_task_id != scenario_model_graph.body.id:
+        log.info(f"Identical model run is already in flight, joining task '{flood_model_task_id}'.")
+        return result.AsyncResult(flood_model_task_id, app=app)
+    model_run = chain(*shared_stages.values(), scenario_model_graph)
+    # Release the claim if any stage fails, since the flood model task is then never run and would stay PENDING
+    model_run.link_error(release_in_flight_model.si(request_fingerprint, flood_model_task_id))
+    return model_run()
+
+
+def _in_flight_model_key(request_fingerprint: str) -> str:
+    """
+    Get the message broker key that holds the flood model task id of an in-flight model run.
+
+    Parameters
+    ----------
+    request_fingerprint : str
+        The fingerprint of the model run request.
+
+    Returns
+    -------
+    str
+        The message broker key.
+    """
+    return f"in-flight-model-{request_fingerprint}"
+
+
+def claim_in_flight_model(request_fingerprint: str, task_id: str) -> str:
+    """
+    Claim a model run request for a new flood model task, unless an identical model run is already in flight.
+    The claim is made atomically in the message broker, so that concurrent identical requests from any web worker
+    only start one model run between them. Model runs that have finished or failed are not joined.
+
+    Parameters
+    ----------
+    request_fingerprint : str
+        The fingerprint of the model run request.
+    task_id : str
+        The id of the flood model task to start if the request is claimed.
+
+    Returns
+    -------
+    str
+        The flood model task id that the request is served by. Equal to `task_id` if the request was claimed,
+        otherwise the task id of the in-flight model run.
+    """  # noqa: D400
+    in_flight_key = _in_flight_model_key(request_fingerprint)
+    redis_client = app.backend.client
+    while True:
+        # Claim the request if no model run has claimed it yet
+        if redis_client.set(in_flight_key, task_id, nx=True, ex=IN_FLIGHT_MODEL_TIMEOUT):
+            return task_id
+        in_flight_task_id = redis_client.get(in_flight_key)
+        if in_flight_task_id is None:
+            # The claim expired in between, so try to claim it again
+            continue
+        in_flight_task_id = in_flight_task_id.decode()
+        if not is_model_run_finished(in_flight_task_id):
+            return in_flight_task_id
+        # The previous model run has finished, so replace its claim unless another request has replaced it already
+        with redis_client.pipeline() as pipe:
+            try:
+                pipe.watch(in_flight_key)
+                if pipe.get(in_flight_key) == in_flight_task_id.encode():
+                    pipe.multi()
+                    pipe.set(in_flight_key, task_id, ex=IN_FLIGHT_MODEL_TIMEOUT)
+                    pipe.execute()
+                    return task_id
+            except WatchError:
+                # The claim changed while replacing it, so check it again
+                continue
+
+
+@app.task
+def release_in_flight_model(request_fingerprint: str, task_id: str) -> None:
+    """
+    Task to release the claim of a model run request, if it is still held by the given flood model task.
+    Linked as the error callback of model runs, so that identical requests do not join a model run that has failed.
+
+    Parameters
+    ----------
+    request_fingerprint : str
+        The fingerprint of the model run request.
+    task_id : str
+        The id of the flood model task that claimed the request.
+    """  # noqa: D400
+    in_flight_key = _in_flight_model_key(request_fingerprint)
+    with app.backend.client.pipeline() as pipe:
+        try:
+            pipe.watch(in_flight_key)
+            if pipe.get(in_flight_key) == task_id.encode():
+                pipe.multi()
+                pipe.delete(in_flight_key)
+                pipe.execute()
+                log.info(f"Released the in-flight claim of failed model run '{task_id}'.")
+        except WatchError:
+            # Another request replaced the claim in the meantime, so it is no longer held by this model run
+            pass
+
+
+@app.task
+def remove_failed_model_workspace(workspace_id: str) -> None:
     """
-    return (
-        add_base_data_to_db.si(selected_polygon_wkt) |
-        process_dem.si(selected_polygon_wkt) |
-        generate_rainfall_inputs.si(selected_polygon_wkt) |
-        generate_tide_inputs.si(selected_polygon_wkt, scenario_options) |
-        generate_river_inputs.si(selected_polygon_wkt) |
-        run_flood_model.si(selected_polygon_wkt)
-    )()
+    Task to remove the model workspace of a model run whose forcing stages failed.
+    Linked as the error callback of the flood model task, which removes the workspace itself when it runs, but is
+    never run if any stage of its chord header fails.
+
+    Parameters
+    ----------
+    workspace_id : str
+        The identifier of the model workspace containing the model input files.
+    """  # noqa: D400
+    model_workspace.remove_model_workspace(workspace_id)
+
+
+def is_model_run_finished(task_id: str) -> bool:
+    """
+    Check whether a model run has finished, including when one of its stages failed before the flood model task ran.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the flood model task.
+
+    Returns
+    -------
+    bool
+        True if the flood model task is ready, or any stage registered against it has failed or been revoked.
+    """
+    if result.AsyncResult(task_id, app=app).ready():
+        return True
+    registered_stages_json = app.backend.get(_model_stages_key(task_id))
+    if registered_stages_json is None:
+        return False
+    return any(
+        result.AsyncResult(stage["taskId"], app=app).status in states.PROPAGATE_STATES
+        for stage in json.loads(registered_stages_json)
+    )
+
+
+def create_sweep_for_area(
+        selected_polygon_wkt: str,
+        scenario_options_list: List[dict],
+        cached_model_task_ids: Optional[List[Optional[str]]] = None) -> result.GroupResult:
+    """
+    Create a model for the area for each of a list of scenarios, using a graph of sub-tasks.
+    The base data, DEM and the forcing inputs that are shared between scenarios are computed once, then the
+    scenario-dependent forcing inputs and flood model for each scenario run in parallel as a group.
+    Scenarios with cached model output are not run, and scenarios with an identical model run in flight join it,
+    like single model runs do.
+
+    Parameters
+    ----------
+    selected_polygon_wkt : str
+        The polygon defining the selected area to run the models for. Defined in WKT form.
+    scenario_options_list: List[dict]
+        Options for scenario modelling inputs, one for each scenario in the sweep.
+    cached_model_task_ids : Optional[List[Optional[str]]] = None
+        For each scenario, the id of a `get_cached_model_id` task whose value is the cached model output id, or None
+        if the scenario has no cached model output. If not provided (default is None), every scenario is run.
+
+    Returns
+    -------
+    result.GroupResult
+        The saved group result containing the flood model task for each scenario, in the same order as the scenarios.
+    """  # noqa: D400
+    if cached_model_task_ids is None:
+        cached_model_task_ids = [None] * len(scenario_options_list)
+    uncached_scenario_options_list = [
+        scenario_options
+        for scenario_options, cached_model_task_id in zip(scenario_options_list, cached_model_task_ids)
+        if cached_model_task_id is None
+    ]
+    shared_stages = {
+        run_cache.ModelStage.BASE_DATA: add_base_data_to_db.si(selected_polygon_wkt).set(task_id=uuid()),
+        run_cache.ModelStage.DEM: process_dem.si(selected_polygon_wkt).set(task_id=uuid()),
+        "shared_forcing_inputs": generate_shared_forcing_inputs.si(
+            selected_polygon_wkt, uncached_scenario_options_list).set(task_id=uuid()),
+    }
+    selected_polygon = wkt_to_gdf(selected_polygon_wkt)
+    # The task whose value is the flood model id of each scenario, either cached, in flight or started by this sweep
+    flood_model_task_ids = []
+    scenario_model_graphs = []
+    release_claim_stages = []
+    for scenario_options, cached_model_task_id in zip(scenario_options_list, cached_model_task_ids):
+        if cached_model_task_id is not None:
+            flood_model_task_ids.append(cached_model_task_id)
+            continue
+        scenario_model_graph = create_scenario_model_graph(selected_polygon_wkt, scenario_options, shared_stages)
+        # Only run the scenario if no identical model run is in flight
+        request_fingerprint = run_cache.model_request_fingerprint(selected_polygon, scenario_options)
+        flood_model_task_id = claim_in_flight_model(request_fingerprint, scenario_model_graph.body.id)
+        flood_model_task_ids.append(flood_model_task_id)
+        if flood_model_task_id != scenario_model_graph.body.id:
+            log.info(f"Identical model run is already in flight, joining task '{flood_model_task_id}'.")
+            continue
+        release_claim_stage = release_in_flight_model.si(request_fingerprint, flood_model_task_id)
+        # Celery calls the error callbacks of the chord body if a header stage fails, so the claim is released
+        scenario_model_graph.body.link_error(release_claim_stage)
+        release_claim_stages.append(release_claim_stage)
+        scenario_model_graphs.append(scenario_model_graph)
+    if scenario_model_graphs:
+        # Release the claims of all scenarios if a shared stage fails, since none of the scenarios are then run
+        for shared_stage in shared_stages.values():
+            for release_claim_stage in release_claim_stages:
+                shared_stage.link_error(release_claim_stage)
+        chain(
+            *shared_stages.values(),
+            group(scenario_model_graphs)
+        )()
+    # Save the group so that the status of the whole sweep can be retrieved by group id
+    sweep_result = result.GroupResult(
+        uuid(), [result.AsyncResult(task_id, app=app) for task_id in flood_model_task_ids], app=app)
+    sweep_result.save()
+    return sweep_result
+
+
+def create_scenario_model_graph(
+        selected_polygon_wkt: str,
+        scenario_options: dict,
+        shared_stages: Dict[str, Signature]) -> chord:
+    """
+    Create the graph of sub-tasks that generates the forcing inputs and runs the flood model for a single scenario.
+    The rainfall, tide and river input tasks run in parallel as the header of a chord, with the flood model task as the
+    chord callback. The shared stages, e.g. base data and DEM, must run before the graph.
+    All stages are registered against the flood model task, so that their progress can be found by its task id.
+
+    Parameters
+    ----------
+    selected_polygon_wkt : str
+        The polygon defining the selected area to run the model for. Defined in WKT form.
+    scenario_options: dict
+        Options for scenario modelling inputs.
+    shared_stages : Dict[str, Signature]
+        The stages that run before the graph, by stage name, with pre-assigned task ids.
+
+    Returns
+    -------
+    chord
+        The graph of sub-tasks for the scenario. The chord body is the flood model task, with a pre-assigned task id.
+    """  # noqa: D400
+    # Each model run gets its own workspace for BG-Flood inputs, so that concurrent model runs do not clobber each other
+    workspace_id = model_workspace.new_workspace_id()
+    # Rainfall, tide and river inputs only depend on the base data and DEM, so they can be generated in parallel
+    forcing_stages = {
+        run_cache.ModelStage.RAINFALL: generate_rainfall_inputs.si(
+            selected_polygon_wkt, scenario_options, workspace_id),
+        run_cache.ModelStage.TIDE: generate_tide_inputs.si(selected_polygon_wkt, scenario_options, workspace_id),
+        run_cache.ModelStage.RIVER: generate_river_inputs.si(selected_polygon_wkt, workspace_id),
+    }
+    for forcing_stage in forcing_stages.values():
+        forcing_stage.set(task_id=uuid())
+    flood_model_stage = run_flood_model.si(selected_polygon_wkt, scenario_options, workspace_id).set(task_id=uuid())
+    # Celery calls the error callbacks of the chord body if a header stage fails, so the workspace is not leaked
+    flood_model_stage.link_error(remove_failed_model_workspace.si(workspace_id))
+    register_model_stages(flood_model_stage.id, {**shared_stages, **forcing_stages, "flood_model": flood_model_stage})
+    return chord(list(forcing_stages.values()), flood_model_stage)
+
+
+def _model_stages_key(task_id: str) -> str:
+    """
+    Get the result backend key that holds the stages registered against a flood model task.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the flood model task.
+
+    Returns
+    -------
+    str
+        The result backend key.
+    """
+    return f"model-stages-{task_id}"
+
+
+def _stage_progress_key(task_id: str) -> str:
+    """
+    Get the result backend key that holds the progress of a stage task.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the stage task.
+
+    Returns
+    -------
+    str
+        The result backend key.
+    """
+    return f"stage-progress-{task_id}"
+
+
+def register_model_stages(task_id: str, stages: Dict[str, Signature]) -> None:
+    """
+    Register the stages of a model run against its flood model task, so that their progress can be found later.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the flood model task.
+    stages : Dict[str, Signature]
+        The stages of the model run in the order they run, by stage name, with pre-assigned task ids.
+    """
+    registered_stages = [{"stage": stage, "taskId": signature.id} for stage, signature in stages.items()]
+    app.backend.set(_model_stages_key(task_id), json.dumps(registered_stages))
+
+
+@contextmanager
+def track_stage_progress(stage: str) -> Iterator[None]:
+    """
+    Context manager that publishes the progress of the stage run by the current task.
+    The progress contains the stage name, start and finish timestamps, and counters for sub-steps reported with
+    `report_progress`. It is published as the custom PROGRESS state of the task while the stage is running,
+    and kept in the result backend once the stage has finished.
+
+    Parameters
+    ----------
+    stage : str
+        The name of the stage, e.g. 'rainfall'.
+
+    Yields
+    ------
+    None
+        The stage runs within the context.
+    """  # noqa: D400
+    # Stages run outside a worker, e.g. in tests, have nothing to publish to
+    task_id = None if current_task is None else current_task.request.id
+    progress = {
+        "stage": stage,
+        "startedAt": datetime.now(timezone.utc).isoformat(),
+        "finishedAt": None,
+        "counters": {},
+    }
+
+    def publish_progress(running: bool = True) -> None:
+        """
+        Publish the progress of the stage to the result backend.
+
+        Parameters
+        ----------
+        running : bool = True
+            Whether the stage is still running. The task state is only updated while running, since it is replaced by
+            the task result once the task returns.
+        """
+        if task_id is None:
+            return
+        if running:
+            current_task.update_state(state=PROGRESS, meta=progress)
+        app.backend.set(_stage_progress_key(task_id), json.dumps(progress))
+
+    def increment_counter(counter: str, increment: int) -> None:
+        """
+        Increment a sub-step counter and publish the progress of the stage.
+
+        Parameters
+        ----------
+        counter : str
+            The name of the progress counter.
+        increment : int
+            The amount to increment the counter by.
+        """
+        progress["counters"][counter] = progress["counters"].get(counter, 0) + increment
+        publish_progress()
+
+    publish_progress()
+    try:
+        with progress_reporter(increment_counter):
+            yield
+    finally:
+        progress["finishedAt"] = datetime.now(timezone.utc).isoformat()
+        publish_progress(running=False)
+
+
+def get_model_stages_progress(task_id: str) -> List[Dict[str, Any]]:
+    """
+    Get the progress of each stage registered against a flood model task.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the flood model task.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        The progress of each stage in the order they run, containing the stage name, taskId, taskStatus, startedAt,
+        finishedAt and counters. Empty if no stages are registered against the task, e.g. for a cached model run.
+    """
+    registered_stages_json = app.backend.get(_model_stages_key(task_id))
+    if registered_stages_json is None:
+        return []
+    registered_stages = json.loads(registered_stages_json)
+    # Fetch the progress of all stages at once
+    stages_progress_json = app.backend.mget([_stage_progress_key(stage["taskId"]) for stage in registered_stages])
+    stages_progress = []
+    for registered_stage, stage_progress_json in zip(registered_stages, stages_progress_json):
+        # Stages that have not started yet have no progress
+        stage_progress = {"startedAt": None, "finishedAt": None, "counters": {}}
+        if stage_progress_json is not None:
+            stage_progress.update(json.loads(stage_progress_json))
+        stage_progress.update(registered_stage)
+        stage_progress["taskStatus"] = result.AsyncResult(registered_stage["taskId"], app=app).status
+        stages_progress.append(stage_progress)
+    return stages_progress
+
+
+def get_task_status_channels(task_id: str, stage_task_ids: Iterable[str]) -> Set[bytes]:
+    """
+    Get the result backend channels that changes to the status of a task and its stages are published on.
+    The Redis result backend publishes each value it stores on a channel named after its key.
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the task.
+    stage_task_ids : Iterable[str]
+        The ids of the stage tasks registered against the task.
+
+    Returns
+    -------
+    Set[bytes]
+        The channels of the task's state, and of each stage's state and progress.
+    """  # noqa: D400
+    channels = {app.backend.get_key_for_task(task_id)}
+    for stage_task_id in stage_task_ids:
+        channels.add(app.backend.get_key_for_task(stage_task_id))
+        channels.add(_stage_progress_key(stage_task_id).encode())
+    return channels
+
+
+def get_rainfall_parameters(scenario_options: dict) -> Dict[str, Any]:
+    """
+    Get the parameters for the rainfall module's main function for a scenario.
+
+    Parameters
+    ----------
+    scenario_options: dict
+        Options for scenario modelling inputs.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The default rainfall parameters, with the rainfall ARI overridden if it is one of the scenario options.
+    """
+    # Copy the default parameters so that concurrent model runs do not share scenario options
+    parameters = DEFAULT_MODULES_TO_PARAMETERS[main_rainfall].copy()
+    if "Rainfall ARI" in scenario_options:
+        parameters["ari"] = scenario_options["Rainfall ARI"]
+    return parameters
+
+
+def get_tide_parameters(scenario_options: dict) -> Dict[str, Any]:
+    """
+    Get the parameters for the tide and sea level rise module's main function for a scenario.
+
+    Parameters
+    ----------
+    scenario_options: dict
+        Options for scenario modelling inputs.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The default tide and sea level rise parameters, overridden by the scenario options.
+    """
+    # Copy the default parameters so that concurrent model runs do not share scenario options
+    parameters = DEFAULT_MODULES_TO_PARAMETERS[main_tide_slr].copy()
+    parameters["proj_year"] = scenario_options["Projected Year"]
+    parameters["ssp_scenario"] = scenario_options["SSP Scenario"]
+    parameters["add_vlm"] = scenario_options["Add Vertical Land Movement"]
+    parameters["confidence_level"] = scenario_options["Confidence Level"]
+    return parameters
 
 
 @app.task(base=OnFailureStateTask)
 def add_base_data_to_db(selected_polygon_wkt: str) -> None:
     """
     Task to ensure static base data for the given area is added to the database.
+    Skipped if the base data has already been added with identical inputs.
 
     Parameters
     ----------
@@ -112,13 +702,28 @@ def add_base_data_to_db(selected_polygon_wkt: str) -> None:
     """
     parameters = DEFAULT_MODULES_TO_PARAMETERS[retrieve_static_boundaries]
     selected_polygon = wkt_to_gdf(selected_polygon_wkt)
-    retrieve_static_boundaries.main(selected_polygon, **parameters)
+    engine = setup_environment.get_connection_from_profile()
+    stage = run_cache.ModelStage.BASE_DATA
+    with track_stage_progress(stage):
+        # Compute the Thiessen polygons of the rainfall sites before the forcing stages run in parallel, since creating
+        # them refreshes the static data version that the forcing stages are fingerprinted with
+        rainfall_sites.rainfall_sites_to_db(engine)
+        thiessen_polygons.thiessen_polygons_to_db(engine)
+        fingerprint = get_stage_fingerprint(engine, stage, selected_polygon, parameters)
+        if run_cache.get_cached_stage(engine, stage, fingerprint):
+            log.info("Base data inputs are unchanged, skipping stage.")
+            return
+        retrieve_static_boundaries.main(selected_polygon, **parameters)
+        # Fingerprint again since adding the base data may have refreshed the static data version
+        run_cache.store_stage_in_cache(
+            engine, stage, get_stage_fingerprint(engine, stage, selected_polygon, parameters))
 
 
 @app.task(base=OnFailureStateTask)
 def process_dem(selected_polygon_wkt: str) -> None:
     """
     Task to ensure hydrologically-conditioned DEM is processed for the given area and added to the database.
+    Skipped if the DEM has already been processed with identical inputs.
 
     Parameters
     ----------
@@ -127,28 +732,46 @@ def process_dem(selected_polygon_wkt: str) -> None:
     """
     parameters = DEFAULT_MODULES_TO_PARAMETERS[process_hydro_dem]
     selected_polygon = wkt_to_gdf(selected_polygon_wkt)
-    process_hydro_dem.main(selected_polygon, **parameters)
+    engine = setup_environment.get_connection_from_profile()
+    stage = run_cache.ModelStage.DEM
+    with track_stage_progress(stage):
+        fingerprint = get_stage_fingerprint(engine, stage, selected_polygon, parameters)
+        if run_cache.get_cached_stage(engine, stage, fingerprint):
+            log.info("DEM inputs are unchanged, skipping stage.")
+            return
+        process_hydro_dem.main(selected_polygon, **parameters)
+        # Fingerprint again since processing the DEM may have initialised the LiDAR datasets
+        run_cache.store_stage_in_cache(
+            engine, stage, get_stage_fingerprint(engine, stage, selected_polygon, parameters))
 
 
 @app.task(base=OnFailureStateTask)
-def generate_rainfall_inputs(selected_polygon_wkt: str) -> None:
+def generate_rainfall_inputs(selected_polygon_wkt: str, scenario_options: dict, workspace_id: str) -> None:
     """
     Task to ensure rainfall input data for the given area is added to the database and model input files are created.
+    Model input files from a previous run with identical inputs are reused if they exist.
 
     Parameters
     ----------
     selected_polygon_wkt : str
         The polygon defining the selected area to add rainfall data for. Defined in WKT form.
+    scenario_options: dict
+        Options for scenario modelling inputs.
+    workspace_id : str
+        The identifier of the model workspace to write the model input files to.
     """
-    parameters = DEFAULT_MODULES_TO_PARAMETERS[main_rainfall]
+    parameters = get_rainfall_parameters(scenario_options)
     selected_polygon = wkt_to_gdf(selected_polygon_wkt)
-    main_rainfall.main(selected_polygon, **parameters)
+    workspace = model_workspace.get_model_workspace(workspace_id)
+    with track_stage_progress(run_cache.ModelStage.RAINFALL):
+        run_forcing_stage(run_cache.ModelStage.RAINFALL, main_rainfall, selected_polygon, parameters, workspace)
 
 
 @app.task(base=OnFailureStateTask)
-def generate_tide_inputs(selected_polygon_wkt: str, scenario_options: dict) -> None:
+def generate_tide_inputs(selected_polygon_wkt: str, scenario_options: dict, workspace_id: str) -> None:
     """
     Task to ensure tide input data for the given area is added to the database and model input files are created.
+    Model input files from a previous run with identical inputs are reused if they exist.
 
     Parameters
     ----------
@@ -156,39 +779,155 @@ def generate_tide_inputs(selected_polygon_wkt: str, scenario_options: dict) -> N
         The polygon defining the selected area to add tide data for. Defined in WKT form.
     scenario_options: dict
         Options for scenario modelling inputs.
+    workspace_id : str
+        The identifier of the model workspace to write the model input files to.
     """
-    parameters = DEFAULT_MODULES_TO_PARAMETERS[main_tide_slr]
-    parameters["proj_year"] = scenario_options["Projected Year"]
-    parameters["add_vlm"] = scenario_options["Add Vertical Land Movement"]
-    parameters["confidence_level"] = scenario_options["Confidence Level"]
+    parameters = get_tide_parameters(scenario_options)
     selected_polygon = wkt_to_gdf(selected_polygon_wkt)
-    main_tide_slr.main(selected_polygon, **parameters)
+    workspace = model_workspace.get_model_workspace(workspace_id)
+    with track_stage_progress(run_cache.ModelStage.TIDE):
+        run_forcing_stage(run_cache.ModelStage.TIDE, main_tide_slr, selected_polygon, parameters, workspace)
 
 
 @app.task(base=OnFailureStateTask)
-def generate_river_inputs(selected_polygon_wkt: str) -> None:
+def generate_river_inputs(selected_polygon_wkt: str, workspace_id: str) -> None:
     """
     Task to ensure river input data for the given area is added to the database and model input files are created.
+    Model input files from a previous run with identical inputs are reused if they exist.
 
     Parameters
     ----------
     selected_polygon_wkt : str
         The polygon defining the selected area to add river data for. Defined in WKT form.
+    workspace_id : str
+        The identifier of the model workspace to write the model input files to.
     """
     parameters = DEFAULT_MODULES_TO_PARAMETERS[main_river]
     selected_polygon = wkt_to_gdf(selected_polygon_wkt)
-    main_river.main(selected_polygon, **parameters)
+    workspace = model_workspace.get_model_workspace(workspace_id)
+    with track_stage_progress(run_cache.ModelStage.RIVER):
+        run_forcing_stage(run_cache.ModelStage.RIVER, main_river, selected_polygon, parameters, workspace)
+
+
+@app.task(base=OnFailureStateTask)
+def generate_shared_forcing_inputs(selected_polygon_wkt: str, scenario_options_list: List[dict]) -> None:
+    """
+    Task to generate the forcing inputs that are shared between the scenarios of a sweep once, before the scenarios
+    run in parallel. The river inputs and each distinct set of rainfall inputs are stored as stage artifacts, so that
+    each scenario reuses them instead of generating them again.
+
+    Parameters
+    ----------
+    selected_polygon_wkt : str
+        The polygon defining the selected area to generate forcing inputs for. Defined in WKT form.
+    scenario_options_list: List[dict]
+        Options for scenario modelling inputs, one for each scenario in the sweep.
+    """  # noqa: D400
+    selected_polygon = wkt_to_gdf(selected_polygon_wkt)
+    # The model input files are only needed in the stage artifact store, so a temporary workspace is used
+    workspace_id = model_workspace.new_workspace_id()
+    workspace = model_workspace.get_model_workspace(workspace_id)
+    with track_stage_progress("shared_forcing_inputs"):
+        try:
+            river_parameters = DEFAULT_MODULES_TO_PARAMETERS[main_river]
+            run_forcing_stage(run_cache.ModelStage.RIVER, main_river, selected_polygon, river_parameters, workspace)
+            # Only generate each distinct set of rainfall inputs once
+            distinct_rainfall_parameters = []
+            for scenario_options in scenario_options_list:
+                rainfall_parameters = get_rainfall_parameters(scenario_options)
+                if rainfall_parameters not in distinct_rainfall_parameters:
+                    distinct_rainfall_parameters.append(rainfall_parameters)
+            for rainfall_parameters in distinct_rainfall_parameters:
+                run_forcing_stage(
+                    run_cache.ModelStage.RAINFALL, main_rainfall, selected_polygon, rainfall_parameters, workspace)
+        finally:
+            model_workspace.remove_model_workspace(workspace_id)
+
+
+def run_forcing_stage(
+        stage: run_cache.ModelStage,
+        module: ModuleType,
+        selected_polygon: gpd.GeoDataFrame,
+        parameters: Dict[str, Any],
+        workspace: pathlib.Path) -> None:
+    """
+    Create the model input files of a forcing stage in the model workspace.
+    If the stage has previously been run with identical inputs then its model input files are copied into the model
+    workspace instead, otherwise the stage's module is run and its model input files are stored for reuse.
+    If the module reports that its model input files are incomplete, they are not stored and the model workspace is
+    marked so that the model output is not stored either.
+
+    Parameters
+    ----------
+    stage : run_cache.ModelStage
+        The forcing stage to run.
+    module : ModuleType
+        The module with the main function that creates the model input files for the stage.
+    selected_polygon : gpd.GeoDataFrame
+        A GeoDataFrame representing the selected polygon, i.e., the catchment area.
+    parameters : Dict[str, Any]
+        The parameters for the main function of the module.
+    workspace : pathlib.Path
+        The model workspace to write the model input files to.
+    """  # noqa: D400
+    engine = setup_environment.get_connection_from_profile()
+    fingerprint = get_stage_fingerprint(engine, stage, selected_polygon, parameters)
+    if run_cache.restore_stage_artifacts(engine, stage, fingerprint, workspace):
+        return
+    # Stage modules that degrade gracefully after a transient failure return False, e.g. the tide stage when NIWA is
+    # unavailable. The model still runs, but neither the stage artifacts nor the model output are stored for reuse.
+    if module.main(selected_polygon, model_workspace=workspace, **parameters) is False:
+        log.warning(f"Model inputs of stage '{stage}' are incomplete, not storing them for reuse.")
+        model_workspace.mark_inputs_incomplete(workspace)
+        return
+    run_cache.save_stage_artifacts(engine, stage, fingerprint, workspace)
+
+
+def get_stage_fingerprint(
+        engine: Engine,
+        stage: run_cache.ModelStage,
+        selected_polygon: gpd.GeoDataFrame,
+        parameters: Dict[str, Any]) -> str:
+    """
+    Create a fingerprint of the inputs of a model run stage, from the selected polygon, the stage's module parameters
+    and the current versions of the input datasets.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    stage : run_cache.ModelStage
+        The model run stage.
+    selected_polygon : gpd.GeoDataFrame
+        A GeoDataFrame representing the selected polygon, i.e., the catchment area.
+    parameters : Dict[str, Any]
+        The parameters for the main function of the stage's module.
+
+    Returns
+    -------
+    str
+        The fingerprint of the stage inputs.
+    """  # noqa: D400
+    dataset_versions = run_cache.get_dataset_versions(engine)
+    return run_cache.stage_fingerprint(stage, selected_polygon, parameters, dataset_versions)
 
 
 @app.task(base=OnFailureStateTask)
-def run_flood_model(selected_polygon_wkt: str) -> int:
+def run_flood_model(selected_polygon_wkt: str, scenario_options: dict, workspace_id: str) -> int:
     """
     Task to run flood model using input data from previous tasks.
+    The model output is stored in the model run cache against the fingerprint of the model run inputs, unless a stage
+    marked the model inputs as incomplete.
+    The model workspace is removed once the model has run, unless the KEEP_MODEL_WORKSPACE environment variable is set.
 
     Parameters
     ----------
     selected_polygon_wkt : str
         The polygon defining the selected area to run the flood model for. Defined in WKT form.
+    scenario_options: dict
+        Options for scenario modelling inputs.
+    workspace_id : str
+        The identifier of the model workspace containing the model input files.
 
     Returns
     -------
@@ -197,10 +936,72 @@ def run_flood_model(selected_polygon_wkt: str) -> int:
     """
     parameters = DEFAULT_MODULES_TO_PARAMETERS[bg_flood_model]
     selected_polygon = wkt_to_gdf(selected_polygon_wkt)
-    flood_model_id = bg_flood_model.main(selected_polygon, **parameters)
+    workspace = model_workspace.get_model_workspace(workspace_id)
+    with track_stage_progress("flood_model"):
+        try:
+            flood_model_id = bg_flood_model.main(selected_polygon, model_workspace=workspace, **parameters)
+            inputs_complete = not model_workspace.has_incomplete_inputs(workspace)
+        finally:
+            model_workspace.remove_model_workspace(workspace_id)
+        # Create the Cloud Optimized GeoTIFF that map tiles are served from, so the first tile requests are not delayed
+        model_tiles.get_max_depth_cog(flood_model_id)
+        if not inputs_complete:
+            log.warning(f"Flood model {flood_model_id} ran with incomplete inputs, not storing it for reuse.")
+            return flood_model_id
+        # Store the model output so that identical model runs can reuse it
+        engine = setup_environment.get_connection_from_profile()
+        fingerprint = get_model_run_fingerprint(engine, selected_polygon_wkt, scenario_options)
+        run_cache.store_model_run_in_cache(engine, fingerprint, flood_model_id)
     return flood_model_id
 
 
+@app.task(base=OnFailureStateTask)
+def get_cached_model_id(selected_polygon_wkt: str, scenario_options: dict) -> Optional[int]:
+    """
+    Task to find the flood model output of a previous model run with identical inputs.
+
+    Parameters
+    ----------
+    selected_polygon_wkt : str
+        The polygon defining the selected area to run the flood model for. Defined in WKT form.
+    scenario_options: dict
+        Options for scenario modelling inputs.
+
+    Returns
+    -------
+    Optional[int]
+        The database ID of the cached flood model output, or None if there is no valid cached model run.
+    """
+    engine = setup_environment.get_connection_from_profile()
+    fingerprint = get_model_run_fingerprint(engine, selected_polygon_wkt, scenario_options)
+    return run_cache.get_cached_model_id(engine, fingerprint)
+
+
+def get_model_run_fingerprint(engine: Engine, selected_polygon_wkt: str, scenario_options: dict) -> str:
+    """
+    Create a fingerprint of the model run inputs, from the rectangle produced by `wkt_to_gdf`, the scenario options,
+    the default module parameters and the current versions of the input datasets.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine used to connect to the database.
+    selected_polygon_wkt : str
+        The polygon defining the selected area to run the flood model for. Defined in WKT form.
+    scenario_options: dict
+        Options for scenario modelling inputs.
+
+    Returns
+    -------
+    str
+        The fingerprint of the model run inputs.
+    """  # noqa: D400
+    selected_polygon = wkt_to_gdf(selected_polygon_wkt)
+    dataset_versions = run_cache.get_dataset_versions(engine)
+    return run_cache.model_run_fingerprint(
+        selected_polygon, scenario_options, DEFAULT_MODULES_TO_PARAMETERS, dataset_versions)
+
+
 @app.task(base=OnFailureStateTask)
 def refresh_lidar_datasets() -> None:
     """
@@ -274,15 +1075,7 @@ def get_depth_by_time_at_point(model_id: int, lat: float, lng: float) -> DepthTi
     DepthTimePlot
         Tuple of depths list and times list for the pixel in the output nearest to the point.
     """
-    engine = setup_environment.get_connection_from_profile()
-    model_file_path = bg_flood_model.model_output_from_db_by_id(engine, model_id).as_posix()
-    with xarray.open_dataset(model_file_path) as ds:
-        transformer = Transformer.from_crs(4326, 2193)
-        y, x = transformer.transform(lat, lng)
-        da = ds["hmax_P0"].sel(xx_P0=x, yy_P0=y, method="nearest")
-
-    depths = da.values.tolist()
-    times = da.coords['time'].values.tolist()
+    depths, times = model_output_reader.get_depth_by_time_at_point(model_id, lat, lng)
     return DepthTimePlot(depths, times)
 
 
@@ -0,0 +1,177 @@
+"""
+Records the liveness of Celery workers in Redis, so that web requests can check whether workers are available without
+broadcasting a ping to every worker through the message broker. Each worker runs a background heartbeat that refreshes
+its entry every few seconds, and an entry that has not been refreshed within the heartbeat TTL is treated as dead.
+"""  # noqa: D400
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+log = logging.getLogger(__name__)
+
+# Seconds between heartbeats sent by each worker
+HEARTBEAT_INTERVAL = 5
+# Seconds after its last heartbeat that a worker is considered dead, allowing for a couple of missed heartbeats
+HEARTBEAT_TTL = 3 * HEARTBEAT_INTERVAL
+# Sorted set of worker hostnames, scored by the time of their last heartbeat
+_HEARTBEATS_KEY = "worker-heartbeats"
+
+# Set to stop the heartbeat of this worker process
+_stop_heartbeat = threading.Event()
+
+
+def _worker_info_key(hostname: str) -> str:
+    """
+    Get the Redis key holding the details of a worker.
+
+    Parameters
+    ----------
+    hostname : str
+        The hostname of the Celery worker, e.g. "celery@worker-1".
+
+    Returns
+    -------
+    str
+        The Redis key holding the details of the worker.
+    """
+    return f"worker-info-{hostname}"
+
+
+def send_heartbeat(redis_client: Redis, hostname: str, worker_info: Dict[str, Any]) -> None:
+    """
+    Record that a worker is alive, and remove workers that have missed their heartbeats.
+
+    Parameters
+    ----------
+    redis_client : Redis
+        The client of the Redis database shared by the workers and the web application.
+    hostname : str
+        The hostname of the Celery worker.
+    worker_info : Dict[str, Any]
+        The details of the worker to record, such as the queues it consumes and its concurrency.
+    """
+    now = time.time()
+    with redis_client.pipeline() as pipe:
+        pipe.zadd(_HEARTBEATS_KEY, {hostname: now})
+        pipe.zremrangebyscore(_HEARTBEATS_KEY, "-inf", now - HEARTBEAT_TTL)
+        pipe.set(_worker_info_key(hostname), json.dumps({**worker_info, "lastHeartbeat": now}), ex=HEARTBEAT_TTL)
+        pipe.execute()
+
+
+def start_heartbeat(redis_client: Redis, hostname: str, queues: Iterable[str], concurrency: Optional[int]) -> None:
+    """
+    Start a background thread that sends heartbeats for this worker until `stop_heartbeat` is called.
+
+    Parameters
+    ----------
+    redis_client : Redis
+        The client of the Redis database shared by the workers and the web application.
+    hostname : str
+        The hostname of the Celery worker.
+    queues : Iterable[str]
+        The names of the queues the worker consumes.
+    concurrency : Optional[int]
+        The number of tasks the worker can run at once, if known.
+    """
+    worker_info = {"hostname": hostname, "pid": os.getpid(), "queues": sorted(queues), "concurrency": concurrency}
+
+    def heartbeat_loop() -> None:
+        """Send heartbeats every HEARTBEAT_INTERVAL seconds, logging failures so that the worker keeps running."""
+        while not _stop_heartbeat.is_set():
+            try:
+                send_heartbeat(redis_client, hostname, worker_info)
+            except RedisError as error:
+                log.warning(f"Failed to send worker heartbeat: {error}")
+            _stop_heartbeat.wait(HEARTBEAT_INTERVAL)
+
+    _stop_heartbeat.clear()
+    threading.Thread(target=heartbeat_loop, name="worker-heartbeat", daemon=True).start()
+    log.info(f"Started heartbeat for worker {hostname} every {HEARTBEAT_INTERVAL}s.")
+
+
+def stop_heartbeat(redis_client: Redis, hostname: str) -> None:
+    """
+    Stop the heartbeat of this worker, and remove it from the live workers straight away.
+
+    Parameters
+    ----------
+    redis_client : Redis
+        The client of the Redis database shared by the workers and the web application.
+    hostname : str
+        The hostname of the Celery worker.
+    """
+    _stop_heartbeat.set()
+    try:
+        with redis_client.pipeline() as pipe:
+            pipe.zrem(_HEARTBEATS_KEY, hostname)
+            pipe.delete(_worker_info_key(hostname))
+            pipe.execute()
+    except RedisError as error:
+        log.warning(f"Failed to remove worker heartbeat: {error}")
+
+
+def count_live_workers(redis_client: Redis) -> int:
+    """
+    Count the workers that have sent a heartbeat within the heartbeat TTL.
+
+    Parameters
+    ----------
+    redis_client : Redis
+        The client of the Redis database shared by the workers and the web application.
+
+    Returns
+    -------
+    int
+        The number of live workers.
+    """
+    return redis_client.zcount(_HEARTBEATS_KEY, time.time() - HEARTBEAT_TTL, "+inf")
+
+
+def get_live_workers(redis_client: Redis) -> List[Dict[str, Any]]:
+    """
+    Get the details of the workers that have sent a heartbeat within the heartbeat TTL.
+
+    Parameters
+    ----------
+    redis_client : Redis
+        The client of the Redis database shared by the workers and the web application.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        The details of each live worker: hostname, pid, queues, concurrency and lastHeartbeat.
+    """
+    hostnames = redis_client.zrangebyscore(_HEARTBEATS_KEY, time.time() - HEARTBEAT_TTL, "+inf")
+    if not hostnames:
+        return []
+    worker_infos = redis_client.mget([_worker_info_key(hostname.decode()) for hostname in hostnames])
+    return [json.loads(worker_info) for worker_info in worker_infos if worker_info is not None]
+
+
+def get_queue_depths(redis_client: Redis, queues: Iterable[str]) -> Dict[str, int]:
+    """
+    Get the number of tasks waiting in each queue of the Redis message broker.
+
+    Parameters
+    ----------
+    redis_client : Redis
+        The client of the Redis database used as the message broker.
+    queues : Iterable[str]
+        The names of the queues.
+
+    Returns
+    -------
+    Dict[str, int]
+        The number of tasks waiting in each queue, not counting tasks reserved by workers.
+    """
+    queues = list(queues)
+    with redis_client.pipeline() as pipe:
+        for queue in queues:
+            pipe.llen(queue)
+        return dict(zip(queues, pipe.execute()))
@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from src.digitaltwin import bulk_load
+
+
+class BulkLoadTest(unittest.TestCase):
+    """Tests for bulk_load.py."""
+
+    @staticmethod
+    def mock_connection() -> mock.MagicMock:
+        """Create a mock database connection that quotes identifiers like PostgreSQL."""
+        conn = mock.MagicMock()
+        conn.dialect.identifier_preparer.quote = lambda identifier: f'"{identifier}"'
+        return conn
+
+    @staticmethod
+    def executed_statements(conn: mock.MagicMock) -> list:
+        """Get the SQL of each statement executed on a mock connection."""
+        return [str(call.args[0]) for call in conn.execute.call_args_list]
+
+    def test_3d_geometry_column_keeps_z(self):
+        """Test to ensure that the geometry column of a table created for 3D geometries has a Z dimension."""
+        gdf = gpd.GeoDataFrame(
+            {"site_id": [1, 2]}, crs="epsg:2193", geometry=[shapely.Point(0, 0, 1), shapely.Point(1, 1, 2)])
+        conn = self.mock_connection()
+        with mock.patch.object(pd.DataFrame, "to_sql") as mock_to_sql:
+            bulk_load._create_table(conn, gdf, "test_table", if_exists="fail")
+        # The other columns are created with to_sql, and the geometry column is added with its type set explicitly
+        mock_to_sql.assert_called_once_with("test_table", conn, if_exists="fail", index=False)
+        statements = self.executed_statements(conn)
+        self.assertIn('ALTER TABLE "test_table" ADD COLUMN "geometry" geometry(GeometryZ, 2193)', statements)
+
+    def test_2d_geometry_column(self):
+        """Test to ensure that the geometry column of a table created for 2D geometries has no Z dimension."""
+        gdf = gpd.GeoDataFrame({"site_id": [1]}, crs="epsg:4326", geometry=[shapely.Point(172, -43)])
+        conn = self.mock_connection()
+        with mock.patch.object(pd.DataFrame, "to_sql"):
+            bulk_load._create_table(conn, gdf, "test_table", if_exists="fail")
+        statements = self.executed_statements(conn)
+        self.assertIn('ALTER TABLE "test_table" ADD COLUMN "geometry" geometry(Geometry, 4326)', statements)
+
+    def test_crs_without_epsg_code_is_rejected(self):
+        """Test to ensure that geometries whose CRS has no EPSG code are rejected with a clear error."""
+        crs_wkt = (
+            'PROJCS["Custom",GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563]],'
+            'PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433]],PROJECTION["Transverse_Mercator"],'
+            'PARAMETER["latitude_of_origin",0],PARAMETER["central_meridian",170.5],PARAMETER["scale_factor",0.9],'
+            'PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["metre",1]]')
+        gdf = gpd.GeoDataFrame({"site_id": [1]}, crs=crs_wkt, geometry=[shapely.Point(0, 0)])
+        with self.assertRaises(ValueError):
+            list(bulk_load._iter_csv_chunks(gdf))
+
+    def test_missing_crs_uses_unknown_srid(self):
+        """Test to ensure that geometries without a CRS are loaded with the unknown SRID."""
+        gdf = gpd.GeoDataFrame({"site_id": [1]}, geometry=[shapely.Point(0, 0)])
+        csv = b"".join(bulk_load._iter_csv_chunks(gdf)).decode()
+        geometry = shapely.from_wkb(csv.strip().split(",")[1])
+        self.assertEqual(shapely.get_srid(geometry), 0)
+
+    def test_empty_strings_are_not_null(self):
+        """Test to ensure that empty strings and missing values are written differently, so COPY keeps empty strings."""
+        df = pd.DataFrame({"site_id": [1, 2, 3], "name": ["", None, "river"]})
+        csv_rows = b"".join(bulk_load._iter_csv_chunks(df)).decode().splitlines()
+        self.assertEqual(csv_rows, ["1,", f"2,{bulk_load.COPY_NULL_MARKER}", "3,river"])
+
+    def test_copy_statement_uses_null_marker(self):
+        """Test to ensure that COPY reads the NULL marker as NULL rather than empty fields."""
+        conn = self.mock_connection()
+        bulk_load._copy_rows(conn, pd.DataFrame({"name": ["a"]}), "test_table", ["name"])
+        cursor = conn.connection.cursor.return_value.__enter__.return_value
+        copy_statement = cursor.copy_expert.call_args.args[0]
+        self.assertIn(f"NULL '{bulk_load.COPY_NULL_MARKER}'", copy_statement)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import geopandas as gpd
+import shapely
+
+from src.digitaltwin import run_cache
+from src.digitaltwin.utils import LogLevel
+
+
+class RunCacheTest(unittest.TestCase):
+    """Tests for run_cache.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up arguments used for testing."""
+        cls.catchment_area = gpd.GeoDataFrame(
+            index=[0], crs="epsg:2193", geometry=[shapely.box(1568000, 5180000, 1572000, 5184000)])
+        cls.scenario_options = {
+            "Projected Year": 2050,
+            "SSP Scenario": "SSP2-4.5",
+            "Confidence Level": "medium",
+            "Add Vertical Land Movement": True
+        }
+        cls.modules_to_parameters = {run_cache: {"resolution": 10, "log_level": LogLevel.INFO}}
+        cls.dataset_versions = {"lidar": 1, "static_data": 1}
+
+    def fingerprint(self, **overrides) -> str:
+        """Create a fingerprint using the default test arguments, overridden by any given arguments."""
+        arguments = {
+            "catchment_area": self.catchment_area,
+            "scenario_options": self.scenario_options,
+            "modules_to_parameters": self.modules_to_parameters,
+            "dataset_versions": self.dataset_versions,
+        }
+        arguments.update(overrides)
+        return run_cache.model_run_fingerprint(**arguments)
+
+    def test_fingerprint_is_deterministic(self):
+        """Test to ensure that identical inputs, in any order, produce the same fingerprint."""
+        reordered_options = dict(reversed(list(self.scenario_options.items())))
+        self.assertEqual(self.fingerprint(), self.fingerprint(scenario_options=reordered_options))
+
+    def test_fingerprint_ignores_log_level(self):
+        """Test to ensure that the log level does not change the fingerprint."""
+        modules_to_parameters = {run_cache: {"resolution": 10, "log_level": LogLevel.DEBUG}}
+        self.assertEqual(self.fingerprint(), self.fingerprint(modules_to_parameters=modules_to_parameters))
+
+    def test_fingerprint_changes_with_inputs(self):
+        """Test to ensure that changing the scenario options or dataset versions changes the fingerprint."""
+        scenario_options = {**self.scenario_options, "Projected Year": 2100}
+        dataset_versions = {**self.dataset_versions, "lidar": 2}
+        self.assertNotEqual(self.fingerprint(), self.fingerprint(scenario_options=scenario_options))
+        self.assertNotEqual(self.fingerprint(), self.fingerprint(dataset_versions=dataset_versions))
+
+    def test_stage_fingerprint_differs_between_stages(self):
+        """Test to ensure that different stages with identical inputs have different fingerprints."""
+        parameters = {"proj_year": 2050, "log_level": LogLevel.INFO}
+        rainfall_fingerprint = run_cache.stage_fingerprint(
+            run_cache.ModelStage.RAINFALL, self.catchment_area, parameters, self.dataset_versions)
+        tide_fingerprint = run_cache.stage_fingerprint(
+            run_cache.ModelStage.TIDE, self.catchment_area, parameters, self.dataset_versions)
+        self.assertNotEqual(rainfall_fingerprint, tide_fingerprint)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,3 @@
-import os
 import unittest
 
 import pytest
@@ -34,12 +33,20 @@ class SetupEnvironmentTest(unittest.TestCase):
         if not self.run_database_integration_tests:
             pytest.skip(self.DATABASE_SKIP_REASON)
         self.test_connection()  # This test case requires an active connection to trust the result.
-        # Override the variables supplied by the .env file with an incorrect password
-        os.environ["POSTGRES_PASSWORD"] = "incorrect_password"
+        # Override the password supplied by the .env file with an incorrect password
+        engine = setup_environment.get_engine(config.EnvVariable.POSTGRES_HOST,
+                                              config.EnvVariable.POSTGRES_PORT,
+                                              config.EnvVariable.POSTGRES_DB,
+                                              config.EnvVariable.POSTGRES_USER,
+                                              "incorrect_password")
         with self.assertRaises(OperationalError,
-                               msg="get_connection_from_profile should raise an OperationalError"
-                                   " if the password supplied is incorrect"):
-            setup_environment.get_connection_from_profile()
+                               msg="Connecting should raise an OperationalError if the password supplied is incorrect"):
+            engine.connect()
+
+    def test_engine_is_shared(self):
+        """Ensure that get_connection_from_profile reuses one engine, so that its connection pool is shared"""
+        self.assertIs(setup_environment.get_connection_from_profile(),
+                      setup_environment.get_connection_from_profile())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,115 @@
+import unittest
+from collections import defaultdict
+from unittest import mock
+
+from src.digitaltwin import table_indexes
+from src.digitaltwin.table_indexes import IndexMethod, ManagedIndex
+
+
+class TableIndexesTest(unittest.TestCase):
+    """Tests for table_indexes.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up arguments used for testing."""
+        cls.managed_indexes = [
+            ManagedIndex("rainfall_sites", ("geometry",), IndexMethod.GIST),
+            ManagedIndex("rainfall_sites", ("site_id",)),
+            ManagedIndex("rainfall_depth", ("site_id", "ari")),
+            ManagedIndex("rec_data", ("objectid",)),
+        ]
+
+    def setUp(self):
+        """Replace the managed indexes with the test indexes."""
+        patcher = mock.patch.object(table_indexes, "MANAGED_INDEXES", self.managed_indexes)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def mock_engine() -> mock.MagicMock:
+        """Create a mock database engine that quotes identifiers like PostgreSQL."""
+        engine = mock.MagicMock()
+        conn = engine.begin.return_value.__enter__.return_value
+        conn.dialect.identifier_preparer.quote = lambda identifier: f'"{identifier}"'
+        return engine
+
+    @staticmethod
+    def executed_statements(engine: mock.MagicMock) -> list:
+        """Get the SQL of each statement executed in a transaction of a mock engine."""
+        conn = engine.begin.return_value.__enter__.return_value
+        return [str(call.args[0]) for call in conn.execute.call_args_list]
+
+    def patch_database(self, existing_tables: set, existing_indexes: dict) -> None:
+        """Patch the lookups of the tables and indexes that exist in the database."""
+        existing_indexes = defaultdict(list, existing_indexes)
+        patchers = [
+            mock.patch.object(
+                table_indexes, "_get_existing_tables",
+                side_effect=lambda engine, table_names: existing_tables & set(table_names)),
+            mock.patch.object(table_indexes, "_get_existing_indexes", return_value=existing_indexes),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_index_name(self):
+        """Test to ensure that index names include the table, columns and access method."""
+        self.assertEqual(self.managed_indexes[2].name, "rainfall_depth_site_id_ari_btree_idx")
+
+    def test_missing_indexes(self):
+        """Test to ensure that indexes of existing tables are missing unless an existing index covers them."""
+        self.patch_database(
+            existing_tables={"rainfall_sites", "rainfall_depth"},
+            existing_indexes={
+                # The spatial index created by to_postgis
+                ("rainfall_sites", "gist"): [("geometry",)],
+                # An index that starts with the same columns
+                ("rainfall_depth", "btree"): [("site_id", "ari", "duration")],
+            })
+        missing_indexes = table_indexes.find_missing_indexes(mock.Mock())
+        self.assertEqual(missing_indexes, [ManagedIndex("rainfall_sites", ("site_id",))])
+
+    def test_index_with_columns_in_other_order_is_missing(self):
+        """Test to ensure that an existing index is only used if it starts with the managed index's columns in order."""
+        self.patch_database(
+            existing_tables={"rainfall_depth"},
+            existing_indexes={("rainfall_depth", "btree"): [("ari", "site_id")], ("rainfall_depth", "gist"): []})
+        missing_indexes = table_indexes.find_missing_indexes(mock.Mock(), ["rainfall_depth"])
+        self.assertEqual(missing_indexes, [ManagedIndex("rainfall_depth", ("site_id", "ari"))])
+
+    def test_unmanaged_tables_are_not_queried(self):
+        """Test to ensure that checking tables without managed indexes does not query the database."""
+        self.patch_database(existing_tables=set(), existing_indexes={})
+        self.assertEqual(table_indexes.find_missing_indexes(mock.Mock(), ["unmanaged_table"]), [])
+        table_indexes._get_existing_tables.assert_not_called()
+
+    def test_create_missing_indexes(self):
+        """Test to ensure that missing indexes are created with their access method, and their tables analyzed."""
+        self.patch_database(existing_tables={"rainfall_sites", "rainfall_depth"}, existing_indexes={})
+        engine = self.mock_engine()
+        created_indexes = table_indexes.ensure_indexes(engine)
+        self.assertEqual(created_indexes, self.managed_indexes[:3])
+        self.assertEqual(self.executed_statements(engine), [
+            'CREATE INDEX IF NOT EXISTS "rainfall_sites_geometry_gist_idx" ON "rainfall_sites" '
+            'USING gist ("geometry");',
+            'CREATE INDEX IF NOT EXISTS "rainfall_sites_site_id_btree_idx" ON "rainfall_sites" '
+            'USING btree ("site_id");',
+            'CREATE INDEX IF NOT EXISTS "rainfall_depth_site_id_ari_btree_idx" ON "rainfall_depth" '
+            'USING btree ("site_id", "ari");',
+            'ANALYZE "rainfall_depth";',
+            'ANALYZE "rainfall_sites";',
+        ])
+
+    def test_analyze_without_missing_indexes(self):
+        """Test to ensure that loaded tables are only analyzed when requested if no indexes are missing."""
+        self.patch_database(
+            existing_tables={"rec_data"}, existing_indexes={("rec_data", "btree"): [("objectid",)]})
+        engine = self.mock_engine()
+        table_indexes.ensure_indexes(engine, ["rec_data"])
+        self.assertEqual(self.executed_statements(engine), [])
+        table_indexes.ensure_indexes(engine, ["rec_data"], analyze=True)
+        self.assertEqual(self.executed_statements(engine), ['ANALYZE "rec_data";'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+from src.digitaltwin import tables
+
+
+class TablesTest(unittest.TestCase):
+    """Tests for tables.py."""
+
+    def test_existing_table_is_cached(self):
+        """Test to ensure that the catalog is only queried once for a table that exists."""
+        engine = mock.MagicMock()
+        with mock.patch.object(tables, "inspect") as mock_inspect:
+            mock_inspect.return_value.has_table.return_value = True
+            self.assertTrue(tables.check_table_exists(engine, "test_table"))
+            self.assertTrue(tables.check_table_exists(engine, "test_table"))
+        mock_inspect.return_value.has_table.assert_called_once_with("test_table", schema="public")
+
+    def test_missing_table_is_not_cached(self):
+        """Test to ensure that a missing table is checked again, since another process may create it."""
+        engine = mock.MagicMock()
+        with mock.patch.object(tables, "inspect") as mock_inspect:
+            mock_inspect.return_value.has_table.side_effect = [False, True]
+            self.assertFalse(tables.check_table_exists(engine, "test_table"))
+            self.assertTrue(tables.check_table_exists(engine, "test_table"))
+        self.assertEqual(mock_inspect.return_value.has_table.call_count, 2)
+
+    def test_cache_is_per_engine(self):
+        """Test to ensure that a table recorded for one engine is not assumed to exist for another."""
+        engine, other_engine = mock.MagicMock(), mock.MagicMock()
+        tables.record_table_exists(engine, "test_table")
+        with mock.patch.object(tables, "inspect") as mock_inspect:
+            mock_inspect.return_value.has_table.return_value = False
+            self.assertTrue(tables.check_table_exists(engine, "test_table"))
+            self.assertFalse(tables.check_table_exists(other_engine, "test_table"))
+
+
+if __name__ == "__main__":
+    unittest.main()
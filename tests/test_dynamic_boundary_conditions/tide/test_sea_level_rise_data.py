@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+
+import geopandas as gpd
+import shapely
+
+from src.dynamic_boundary_conditions.tide import sea_level_rise_data
+
+
+class SeaLevelRiseDataTest(unittest.TestCase):
+    """Tests for sea_level_rise_data.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up arguments used for testing."""
+        # Query locations with a non-default index, as selected from the tide data
+        cls.query_locations = gpd.GeoDataFrame(
+            {"position": ["right", "top"]},
+            index=[5, 7],
+            crs=4326,
+            geometry=[shapely.Point(172.7, -43.55), shapely.Point(172.6, -43.5)],
+        )
+        # The sea level rise data of the closest site to each query location, with a row for each year
+        cls.closest_slr_data = gpd.GeoDataFrame(
+            {
+                "siteid": [11, 11, 12, 12],
+                "year": [2030, 2050, 2030, 2050],
+                "distance": [120.0, 120.0, 80.0, 80.0],
+                "query_index": [0, 0, 1, 1],
+            },
+            crs=2193,
+            geometry=[shapely.Point(1580000, 5180000)] * 2 + [shapely.Point(1572000, 5185000)] * 2,
+        )
+
+    def test_closest_slr_data_single_query(self):
+        """Test to ensure that the closest sea level rise data of all query locations is retrieved in one query."""
+        with patch.object(gpd.GeoDataFrame, "from_postgis", return_value=self.closest_slr_data.copy()) as from_postgis:
+            sea_level_rise_data.get_closest_slr_data("engine", self.query_locations)
+        from_postgis.assert_called_once()
+        query_params = from_postgis.call_args.args[0].compile().params
+        self.assertEqual(query_params["query_indexes"], [0, 1])
+        # The query locations are sent in the coordinate reference system of the sea level rise sites
+        expected_geoms = self.query_locations.to_crs(2193).geometry
+        for geom_wkt, expected_geom in zip(query_params["geoms"], expected_geoms):
+            self.assertTrue(shapely.from_wkt(geom_wkt).equals_exact(expected_geom, tolerance=1e-6))
+
+    def test_closest_slr_data_matches_query_locations(self):
+        """Test to ensure that the retrieved data is indexed by, and has the position of, its query location."""
+        with patch.object(gpd.GeoDataFrame, "from_postgis", return_value=self.closest_slr_data.copy()):
+            slr_data = sea_level_rise_data.get_closest_slr_data("engine", self.query_locations)
+        self.assertEqual(slr_data.index.tolist(), [5, 5, 7, 7])
+        self.assertEqual(slr_data["position"].tolist(), ["right", "right", "top", "top"])
+        self.assertNotIn("query_index", slr_data.columns)
+
+    def test_slr_data_for_tide_data(self):
+        """Test to ensure that sea level rise data is retrieved once for each distinct tide data location."""
+        tide_data = gpd.GeoDataFrame(
+            {"position": ["right", "right", "top", "top"], "seconds": [0, 600, 0, 600]},
+            crs=4326,
+            geometry=[self.query_locations.geometry[5]] * 2 + [self.query_locations.geometry[7]] * 2,
+        )
+        with patch.object(gpd.GeoDataFrame, "from_postgis", return_value=self.closest_slr_data.copy()) as from_postgis:
+            slr_data = sea_level_rise_data.get_slr_data_from_db("engine", tide_data)
+        self.assertEqual(from_postgis.call_args.args[0].compile().params["query_indexes"], [0, 1])
+        self.assertEqual(slr_data.index.tolist(), [0, 1, 2, 3])
+        expected_tide_data_locs = [self.query_locations.geometry[5]] * 2 + [self.query_locations.geometry[7]] * 2
+        self.assertEqual(slr_data["tide_data_loc"].tolist(), expected_tide_data_locs)
+
+    def test_slr_data_without_tide_data(self):
+        """Test to ensure that the database is not queried when there is no tide data."""
+        tide_data = gpd.GeoDataFrame({"position": []}, geometry=[], crs=4326)
+        with patch.object(gpd.GeoDataFrame, "from_postgis") as from_postgis:
+            slr_data = sea_level_rise_data.get_slr_data_from_db("engine", tide_data)
+        from_postgis.assert_not_called()
+        self.assertTrue(slr_data.empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
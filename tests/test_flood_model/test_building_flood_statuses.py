@@ -0,0 +1,112 @@
+import json
+import unittest
+from typing import List
+from unittest import mock
+
+import pyarrow as pa
+import shapely
+
+from src.flood_model import building_flood_statuses
+from src.flood_model.building_flood_statuses import FeatureFormat
+
+
+class BuildingFloodStatusesTest(unittest.TestCase):
+    """Tests for building_flood_statuses.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up arguments used for testing."""
+        cls.bounds = (1568000, 5180000, 1572000, 5184000)
+        cls.features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [172.6, -43.5 + index / 1000]},
+                "properties": {"building_outline_id": index, "is_flooded": index % 2 == 0},
+            }
+            for index in range(5)
+        ]
+
+    @staticmethod
+    def mock_engine(row_batches: List[list]) -> mock.MagicMock:
+        """Create a mock database engine whose queries return the given batches of rows."""
+        engine = mock.MagicMock()
+        conn = engine.connect.return_value.__enter__.return_value
+        conn.execution_options.return_value.execute.return_value.partitions.return_value = iter(row_batches)
+        return engine
+
+    def feature_row_batches(self, batch_size: int) -> List[list]:
+        """Split the test features into batches of rows, as fetched from the database."""
+        rows = [mock.Mock(feature=json.dumps(feature)) for feature in self.features]
+        return [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+
+    def test_geojson_feature_collection(self):
+        """Test to ensure that features streamed in several batches form a single valid GeoJSON FeatureCollection."""
+        engine = self.mock_engine(self.feature_row_batches(2))
+        chunks = building_flood_statuses.stream_building_flood_statuses(engine, 1, self.bounds, crs=2193)
+        feature_collection = json.loads("".join(chunks))
+        self.assertEqual(feature_collection["type"], "FeatureCollection")
+        self.assertEqual(feature_collection["crs"]["properties"]["name"], "urn:ogc:def:crs:EPSG::2193")
+        self.assertEqual(feature_collection["features"], self.features)
+
+    def test_empty_geojson_feature_collection(self):
+        """Test to ensure that an area without buildings is streamed as a valid empty FeatureCollection."""
+        engine = self.mock_engine([])
+        chunks = building_flood_statuses.stream_building_flood_statuses(engine, 1, self.bounds)
+        self.assertEqual(json.loads("".join(chunks))["features"], [])
+
+    def test_ndjson_features(self):
+        """Test to ensure that features streamed in several batches as NDJSON have one feature on each line."""
+        engine = self.mock_engine(self.feature_row_batches(2))
+        chunks = building_flood_statuses.stream_building_flood_statuses(
+            engine, 1, self.bounds, feature_format=FeatureFormat.NDJSON)
+        output = "".join(chunks)
+        self.assertTrue(output.endswith("\n"))
+        self.assertEqual([json.loads(line) for line in output.splitlines()], self.features)
+
+    def test_empty_ndjson_features(self):
+        """Test to ensure that an area without buildings is streamed as empty NDJSON."""
+        engine = self.mock_engine([])
+        chunks = building_flood_statuses.stream_building_flood_statuses(
+            engine, 1, self.bounds, feature_format=FeatureFormat.NDJSON)
+        self.assertEqual("".join(chunks), "")
+
+    def test_crs_supported(self):
+        """Test to ensure that a CRS code is supported if it is in the spatial_ref_sys table."""
+        engine = mock.MagicMock()
+        conn = engine.connect.return_value.__enter__.return_value
+        conn.execute.return_value.scalar.return_value = False
+        self.assertFalse(building_flood_statuses.is_crs_supported(engine, 999999))
+        query = conn.execute.call_args.args[0]
+        self.assertIn("spatial_ref_sys", str(query))
+        self.assertEqual(query.compile().params, {"srid": 999999})
+
+    def test_arrow_stream_round_trip(self):
+        """Test to ensure that buildings streamed in several batches form one Arrow IPC stream of WKB geometries."""
+        geometries = [shapely.Point(172.6, -43.5 + index / 1000) for index in range(5)]
+        # The first building has no flood status for the model output
+        flood_statuses = [None, False, True, False, True]
+        rows = list(zip(range(5), flood_statuses, shapely.to_wkb(geometries)))
+        engine = self.mock_engine([rows[:2], rows[2:4], rows[4:]])
+        chunks = building_flood_statuses.stream_building_flood_statuses_arrow(engine, 1, self.bounds, crs=2193)
+        reader = pa.ipc.open_stream(b"".join(chunks))
+        record_batches = list(reader)
+        self.assertEqual(len(record_batches), 3)
+        table = pa.Table.from_batches(record_batches)
+        self.assertEqual(table["building_outline_id"].to_pylist(), [0, 1, 2, 3, 4])
+        self.assertEqual(table["is_flooded"].to_pylist(), flood_statuses)
+        self.assertEqual(shapely.from_wkb(table["geometry"].to_pylist()).tolist(), geometries)
+        geometry_metadata = table.schema.field("geometry").metadata
+        self.assertEqual(geometry_metadata[b"ARROW:extension:name"], b"geoarrow.wkb")
+        self.assertEqual(json.loads(geometry_metadata[b"ARROW:extension:metadata"]), {"crs": "EPSG:2193"})
+
+    def test_empty_arrow_stream(self):
+        """Test to ensure that an area without buildings is streamed as a valid Arrow IPC stream without rows."""
+        engine = self.mock_engine([])
+        chunks = building_flood_statuses.stream_building_flood_statuses_arrow(engine, 1, self.bounds)
+        table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.column_names, ["building_outline_id", "is_flooded", "geometry"])
+
+
+if __name__ == "__main__":
+    unittest.main()
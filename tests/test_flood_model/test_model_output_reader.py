@@ -0,0 +1,129 @@
+import json
+import unittest
+from typing import ContextManager
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import xarray
+
+from src.flood_model import model_output_reader
+
+
+class ModelOutputReaderTest(unittest.TestCase):
+    """Tests for model_output_reader.py."""
+
+    @staticmethod
+    def create_model_output() -> xarray.Dataset:
+        """Create a model output with 10m cells centred on x = 100, 110, 120 and y = 200, 210, and two time steps."""
+        depths = np.arange(12, dtype=float).reshape((2, 2, 3))
+        # The first cell is dry at the first time step
+        depths[0, 0, 0] = np.nan
+        return xarray.Dataset(
+            {"h_P0": (("time", "yy_P0", "xx_P0"), depths)},
+            coords={"time": [0.0, 3600.0], "yy_P0": [200.0, 210.0], "xx_P0": [100.0, 110.0, 120.0]},
+        )
+
+    @staticmethod
+    def patch_transect_vertices() -> ContextManager:
+        """Patch the transformation of transect vertices, so that transects run 100m east from the NZTM origin."""
+        vertices = (np.array([0.0, 100.0]), np.array([0.0, 0.0]))
+        return mock.patch.object(model_output_reader, "transform_points", return_value=vertices)
+
+    def setUp(self):
+        """Close the cached model outputs and stub the database lookup of model output file paths."""
+        model_output_reader._open_model_outputs.clear()
+        for patcher in (
+                mock.patch.object(model_output_reader.setup_environment, "get_connection_from_profile"),
+                mock.patch.object(
+                    model_output_reader.bg_flood_model, "model_output_from_db_by_id",
+                    side_effect=lambda engine, model_id: f"output_{model_id}.nc"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_open_model_output_is_reused(self):
+        """Test to ensure that a model output is only opened once when it is queried repeatedly."""
+        with mock.patch.object(xarray, "open_dataset") as mock_open_dataset:
+            first_model_output = model_output_reader._get_open_model_output(1)
+            second_model_output = model_output_reader._get_open_model_output(1)
+        mock_open_dataset.assert_called_once_with("output_1.nc")
+        self.assertIs(first_model_output, second_model_output)
+
+    def test_least_recently_used_model_output_is_closed(self):
+        """Test to ensure that the least recently used model output is closed when too many are open."""
+        opened_model_outputs = {}
+
+        def open_dataset(model_file_path: str) -> mock.Mock:
+            opened_model_outputs[model_file_path] = mock.Mock()
+            return opened_model_outputs[model_file_path]
+
+        with mock.patch.object(model_output_reader, "MAX_OPEN_MODEL_OUTPUTS", 2), \
+                mock.patch.object(xarray, "open_dataset", side_effect=open_dataset):
+            model_output_reader._get_open_model_output(1)
+            model_output_reader._get_open_model_output(2)
+            # Model output 1 becomes the most recently used, so model output 2 is evicted next
+            model_output_reader._get_open_model_output(1)
+            model_output_reader._get_open_model_output(3)
+        opened_model_outputs["output_2.nc"].close.assert_called_once()
+        opened_model_outputs["output_1.nc"].close.assert_not_called()
+        self.assertEqual(list(model_output_reader._open_model_outputs), [1, 3])
+
+    def test_points_within_grid(self):
+        """Test to ensure that points are within the grid up to half a cell beyond the outermost cell centres."""
+        model_output = self.create_model_output()
+        xs = np.array([95.0, 125.0, 110.0, 94.9, 125.1, 110.0, 110.0])
+        ys = np.array([205.0, 205.0, 195.0, 205.0, 205.0, 194.9, 215.1])
+        is_within_grid = model_output_reader._is_within_grid(model_output, xs, ys)
+        np.testing.assert_array_equal(is_within_grid, [True, True, True, False, False, False, False])
+
+    def test_time_series_outside_grid_are_null(self):
+        """Test to ensure that dry cells and points outside of the grid are null, rather than edge cell values."""
+        xs = np.array([110.0, 100.0, 1000.0])
+        ys = np.array([200.0, 200.0, 200.0])
+        variables = [model_output_reader.OutputVariable.H]
+        with mock.patch.object(
+                model_output_reader, "_get_open_model_output", return_value=self.create_model_output()):
+            columns = model_output_reader.get_time_series_at_points(1, xs, ys, variables)
+        self.assertEqual(columns["time"], [0.0, 3600.0])
+        self.assertEqual(columns["h"], [[1.0, 7.0], [None, 6.0], [None, None]])
+
+    def test_transect_sampled_at_interval(self):
+        """Test to ensure that a transect is sampled at the interval from its first vertex up to its last vertex."""
+        with self.patch_transect_vertices():
+            xs, ys, distances = model_output_reader.sample_transect([0, 0], [0, 0], 30)
+        np.testing.assert_array_equal(distances, [0, 30, 60, 90, 100])
+        np.testing.assert_array_equal(xs, [0, 30, 60, 90, 100])
+        np.testing.assert_array_equal(ys, [0, 0, 0, 0, 0])
+
+    def test_transect_sample_limit(self):
+        """Test to ensure that sampling a transect into more than MAX_SAMPLE_POINTS points raises a ValueError."""
+        with self.patch_transect_vertices(), mock.patch.object(model_output_reader, "MAX_SAMPLE_POINTS", 10):
+            with self.assertRaises(ValueError):
+                model_output_reader.sample_transect([0, 0], [0, 0], 1)
+            # Sampling at a longer interval stays within the limit
+            _, _, distances = model_output_reader.sample_transect([0, 0], [0, 0], 20)
+        self.assertEqual(len(distances), 6)
+
+    def test_time_series_arrow_round_trip(self):
+        """Test to ensure that time series sent as an Arrow IPC stream are read back with nulls and shared times."""
+        columns = {
+            "time": [0.0, 3600.0],
+            "x": [110.0, 1000.0],
+            "y": [200.0, 200.0],
+            "distance": [0.0, 890.0],
+            "h": [[None, 0.5], [None, None]],
+        }
+        table = model_output_reader.time_series_to_arrow(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        read_table = pa.ipc.open_stream(sink.getvalue()).read_all()
+        self.assertEqual(read_table.schema.field("h").type, pa.list_(pa.float32()))
+        self.assertEqual(read_table.schema.field("distance").type, pa.float64())
+        self.assertEqual(json.loads(read_table.schema.metadata[b"time"]), columns["time"])
+        self.assertEqual(read_table.to_pydict(), {name: values for name, values in columns.items() if name != "time"})
+
+
+if __name__ == "__main__":
+    unittest.main()
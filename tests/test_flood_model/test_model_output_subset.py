@@ -0,0 +1,123 @@
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from src.flood_model import model_output_subset
+
+
+class ModelOutputSubsetTest(unittest.TestCase):
+    """Tests for model_output_subset.py."""
+
+    @staticmethod
+    def create_model_output() -> xr.Dataset:
+        """Create a model output with 10m cells centred on x = 100, 110, 120 and y = 200, 210, and three time steps."""
+        depths = np.arange(18, dtype=float).reshape((3, 2, 3))
+        # The first cell is dry at the first time step
+        depths[0, 0, 0] = np.nan
+        return xr.Dataset(
+            {
+                "h_P0": (("time", "yy_P0", "xx_P0"), depths),
+                "zs_P0": (("time", "yy_P0", "xx_P0"), depths + 10),
+                "crs": ((), 0),
+            },
+            coords={"time": [0.0, 3600.0, 7200.0], "yy_P0": [200.0, 210.0], "xx_P0": [100.0, 110.0, 120.0]},
+        )
+
+    def setUp(self):
+        """Create a temporary directory to write subsets to."""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = pathlib.Path(temp_dir.name)
+
+    def test_select_variables(self):
+        """Test to ensure that only the requested variables are selected."""
+        subset = model_output_subset.select_subset(self.create_model_output(), variables=["zs"])
+        self.assertEqual(list(subset.data_vars), ["zs_P0"])
+
+    def test_select_unknown_variable(self):
+        """Test to ensure that selecting a variable that is not in the model output raises a ValueError."""
+        with self.assertRaises(ValueError):
+            model_output_subset.select_subset(self.create_model_output(), variables=["h", "velocity"])
+
+    def test_select_time_range(self):
+        """Test to ensure that the time range is inclusive, and open ended where it is None."""
+        model_output = self.create_model_output()
+        subset = model_output_subset.select_subset(model_output, time_range=(3600, None))
+        np.testing.assert_array_equal(subset["time"].values, [3600.0, 7200.0])
+        subset = model_output_subset.select_subset(model_output, time_range=(None, 3600))
+        np.testing.assert_array_equal(subset["time"].values, [0.0, 3600.0])
+
+    def test_select_time_range_outside_model_output(self):
+        """Test to ensure that a time range that does not overlap the model output raises a ValueError."""
+        with self.assertRaises(ValueError):
+            model_output_subset.select_subset(self.create_model_output(), time_range=(10000, 20000))
+
+    def test_select_bbox(self):
+        """Test to ensure that only the cells within the bounding box are selected."""
+        transformer = mock.Mock()
+        # The transformer returns the y and x coordinates of the bounding box corners in NZTM
+        transformer.transform.return_value = ([195.0, 195.0, 205.0, 205.0], [105.0, 125.0, 105.0, 125.0])
+        with mock.patch.object(model_output_subset, "get_transformer", return_value=transformer):
+            subset = model_output_subset.select_subset(self.create_model_output(), bbox=(172.0, -43.6, 172.1, -43.5))
+        np.testing.assert_array_equal(subset["xx_P0"].values, [110.0, 120.0])
+        np.testing.assert_array_equal(subset["yy_P0"].values, [200.0])
+
+    def test_select_bbox_outside_model_output(self):
+        """Test to ensure that a bounding box that does not overlap the model output raises a ValueError."""
+        transformer = mock.Mock()
+        transformer.transform.return_value = ([0.0, 0.0, 10.0, 10.0], [0.0, 10.0, 0.0, 10.0])
+        with mock.patch.object(model_output_subset, "get_transformer", return_value=transformer):
+            with self.assertRaises(ValueError):
+                model_output_subset.select_subset(self.create_model_output(), bbox=(172.0, -43.6, 172.1, -43.5))
+
+    def test_write_netcdf_round_trip(self):
+        """Test to ensure that a subset written to NetCDF one time step at a time has the same values."""
+        subset = model_output_subset.select_subset(self.create_model_output(), variables=["h"], time_range=(3600, None))
+        file_path = self.temp_dir / "subset.nc"
+        model_output_subset.write_netcdf(subset, file_path)
+        with xr.open_dataset(file_path) as written_subset:
+            xr.testing.assert_equal(written_subset["h_P0"], subset["h_P0"])
+
+    def test_write_csv_leaves_out_empty_cells(self):
+        """Test to ensure that a subset written to CSV has a row for each time step and cell with values."""
+        subset = model_output_subset.select_subset(self.create_model_output(), time_range=(None, 3600))
+        file_path = self.temp_dir / "subset.csv"
+        model_output_subset.write_csv(subset, file_path)
+        written_df = pd.read_csv(file_path)
+        self.assertEqual(set(written_df.columns), {"time", "yy", "xx", "h", "zs"})
+        # Only the dry cell of the first time step has no depth, and it still has a water surface elevation
+        self.assertEqual(len(written_df), 12)
+        self.assertEqual(written_df["h"].isna().sum(), 1)
+
+    def test_geotiff_requires_single_variable(self):
+        """Test to ensure that writing a GeoTIFF of more than one variable raises a ValueError."""
+        with self.assertRaises(ValueError):
+            model_output_subset.write_subset(self.create_model_output(), model_output_subset.OutputFormat.GEOTIFF)
+
+    def test_stream_file_removes_file(self):
+        """Test to ensure that a streamed file is streamed in chunks and removed once it has been streamed."""
+        file_path = self.temp_dir / "subset.csv"
+        file_path.write_bytes(b"a" * 5)
+        with mock.patch.object(model_output_subset, "DOWNLOAD_CHUNK_SIZE", 2):
+            chunks = list(model_output_subset.stream_file(file_path))
+        self.assertEqual(chunks, [b"aa", b"aa", b"a"])
+        self.assertFalse(file_path.exists())
+
+    def test_closed_stream_removes_file(self):
+        """Test to ensure that a streamed file is removed when the stream is closed early, e.g. by a disconnection."""
+        file_path = self.temp_dir / "subset.csv"
+        file_path.write_bytes(b"a" * 5)
+        with mock.patch.object(model_output_subset, "DOWNLOAD_CHUNK_SIZE", 2):
+            stream = model_output_subset.stream_file(file_path)
+            next(stream)
+            stream.close()
+        self.assertFalse(file_path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
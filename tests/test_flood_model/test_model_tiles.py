@@ -0,0 +1,79 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.flood_model import model_tiles
+
+
+class ModelTilesTest(unittest.TestCase):
+    """Tests for model_tiles.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up arguments used for testing."""
+        # Half the width of the Web Mercator (EPSG:3857) world in metres
+        cls.half_width = math.pi * 6378137
+
+    def test_world_tile_bounds(self):
+        """Test to ensure that the single tile at zoom level 0 covers the whole Web Mercator world."""
+        bounds = model_tiles.get_tile_bounds(0, 0, 0)
+        np.testing.assert_allclose(bounds, (-self.half_width, -self.half_width, self.half_width, self.half_width))
+
+    def test_tile_bounds_rows_run_north_to_south(self):
+        """Test to ensure that tile columns run from west to east, and tile rows from north to south."""
+        north_west_bounds = model_tiles.get_tile_bounds(1, 0, 0)
+        south_east_bounds = model_tiles.get_tile_bounds(1, 1, 1)
+        np.testing.assert_allclose(north_west_bounds, (-self.half_width, 0, 0, self.half_width), atol=1e-6)
+        np.testing.assert_allclose(south_east_bounds, (0, -self.half_width, self.half_width, 0), atol=1e-6)
+
+    def test_adjacent_tiles_share_edges(self):
+        """Test to ensure that adjacent tiles share their edges, so there are no gaps between tiles."""
+        west, south, east, north = model_tiles.get_tile_bounds(12, 4030, 2563)
+        self.assertAlmostEqual(model_tiles.get_tile_bounds(12, 4031, 2563)[0], east)
+        self.assertAlmostEqual(model_tiles.get_tile_bounds(12, 4030, 2564)[3], south)
+
+    def test_shallow_and_missing_depths_are_transparent(self):
+        """Test to ensure that depths below 0.1m and missing depths are transparent."""
+        rgba = model_tiles.colour_depths(np.array([np.nan, 0, 0.09]))
+        np.testing.assert_array_equal(rgba[3], [0, 0, 0])
+
+    def test_depth_colour_stops(self):
+        """Test to ensure that depths at the colour stops are drawn in the stop colours of the viridis colour scale."""
+        rgba = model_tiles.colour_depths(np.array([0.1, 1, 5]))
+        np.testing.assert_array_equal(rgba[:, 0], [0xfd, 0xe7, 0x25, 255])
+        np.testing.assert_array_equal(rgba[:, 1], [0x7a, 0xd1, 0x51, 255])
+        np.testing.assert_array_equal(rgba[:, 2], [0x44, 0x01, 0x54, 255])
+
+    def test_depth_colours_are_interpolated_and_clamped(self):
+        """Test to ensure that depths between stops are interpolated, and depths beyond the last stop are clamped."""
+        rgba = model_tiles.colour_depths(np.array([[1.5, 20]]))
+        self.assertEqual(rgba.shape, (4, 1, 2))
+        # Halfway between the colours of the 1m and 2m stops, rounded to whole colour values
+        halfway_colour = [(0x7a + 0x22) / 2, (0xd1 + 0xa8) / 2, (0x51 + 0x84) / 2, 255]
+        np.testing.assert_allclose(rgba[:, 0, 0], halfway_colour, atol=0.5)
+        np.testing.assert_array_equal(rgba[:, 0, 1], [0x44, 0x01, 0x54, 255])
+
+    def test_max_native_zoom(self):
+        """Test to ensure that the maximum zoom level is the first whose pixels are no larger than the COG's pixels."""
+        # 10m pixels, between the 19.1m pixels of zoom level 13 and the 9.6m pixels of zoom level 14
+        self.assertEqual(model_tiles.get_max_native_zoom((0, 0, 1000, 1000), 100), 14)
+
+    def test_max_native_zoom_is_clamped(self):
+        """Test to ensure that the maximum zoom level is between 0 and MAX_ZOOM."""
+        self.assertEqual(model_tiles.get_max_native_zoom((0, 0, 1, 1), 1000), model_tiles.MAX_ZOOM)
+        self.assertEqual(model_tiles.get_max_native_zoom((0, 0, 4 * self.half_width, 1), 1), 0)
+
+    def test_tile_outside_cog(self):
+        """Test to ensure that tiles are only outside a COG if they do not overlap it, including tiles on its edges."""
+        cog_bounds = (0, 0, 100, 100)
+        self.assertFalse(model_tiles.is_tile_outside((-50, -50, 50, 50), cog_bounds))
+        self.assertFalse(model_tiles.is_tile_outside((10, 10, 20, 20), cog_bounds))
+        self.assertFalse(model_tiles.is_tile_outside((-1000, -1000, 1000, 1000), cog_bounds))
+        self.assertTrue(model_tiles.is_tile_outside((100, 0, 200, 100), cog_bounds))
+        self.assertTrue(model_tiles.is_tile_outside((0, -100, 100, 0), cog_bounds))
+        self.assertTrue(model_tiles.is_tile_outside((200, 200, 300, 300), cog_bounds))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+from datetime import datetime, timezone
+from typing import Callable, Tuple
+from unittest import mock
+
+from flask import Flask, Response
+from flask.testing import FlaskClient
+from werkzeug.http import http_date
+
+from src import response_cache
+
+
+class ImmutableModelResponseTest(unittest.TestCase):
+    """Tests for response_cache.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up arguments used for testing."""
+        cls.created_at = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+    def setUp(self):
+        """Empty the in-memory caches and stub the model creation time lookup, which queries the database."""
+        response_cache._cached_responses.clear()
+        response_cache._model_created_at.clear()
+        response_cache._cached_bytes = 0
+        patcher = mock.patch.object(response_cache, "get_model_created_at", return_value=self.created_at)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def create_client(make_response: Callable[[], Response]) -> Tuple[FlaskClient, mock.Mock]:
+        """Create a test client for an app with a single cached model view, and a mock recording calls to the view."""
+        app = Flask(__name__)
+        view = mock.Mock(side_effect=make_response)
+
+        @app.route("/models/<int:model_id>")
+        @response_cache.immutable_model_response(lambda model_id: model_id)
+        def get_model(model_id: int) -> Response:
+            return view()
+
+        return app.test_client(), view
+
+    def test_response_has_cache_headers(self):
+        """Test to ensure that responses derived from a model output are served with validators and cache headers."""
+        client, _ = self.create_client(lambda: Response(b"model output"))
+        response = client.get("/models/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.headers.get("ETag"))
+        self.assertEqual(response.headers["Last-Modified"], http_date(self.created_at))
+        self.assertEqual(response.headers["Cache-Control"], response_cache.IMMUTABLE_CACHE_CONTROL)
+
+    def test_if_none_match_not_modified(self):
+        """Test to ensure that a request with the current ETag is answered with NOT_MODIFIED, skipping the view."""
+        client, view = self.create_client(lambda: Response(b"model output"))
+        etag = client.get("/models/1").headers["ETag"]
+        response = client.get("/models/1", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(view.call_count, 1)
+
+    def test_if_none_match_other_etag(self):
+        """Test to ensure that a request with an outdated ETag is served the full response."""
+        client, _ = self.create_client(lambda: Response(b"model output"))
+        response = client.get("/models/1", headers={"If-None-Match": 'W/"outdated"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b"model output")
+
+    def test_if_modified_since_not_modified(self):
+        """Test to ensure that a request made since the model output was created is answered with NOT_MODIFIED."""
+        client, view = self.create_client(lambda: Response(b"model output"))
+        response = client.get("/models/1", headers={"If-Modified-Since": http_date(self.created_at)})
+        self.assertEqual(response.status_code, 304)
+        view.assert_not_called()
+
+    def test_if_modified_since_before_creation(self):
+        """Test to ensure that a request made before the model output was created is served the full response."""
+        client, view = self.create_client(lambda: Response(b"model output"))
+        earlier = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        response = client.get("/models/1", headers={"If-Modified-Since": http_date(earlier)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(view.call_count, 1)
+
+    def test_cache_hit_skips_view(self):
+        """Test to ensure that a repeated request is served from memory without calling the view."""
+        client, view = self.create_client(lambda: Response(b"model output", content_type="text/plain"))
+        first_response = client.get("/models/1")
+        second_response = client.get("/models/1")
+        self.assertEqual(view.call_count, 1)
+        self.assertEqual(second_response.data, first_response.data)
+        self.assertEqual(second_response.headers["Content-Type"], "text/plain")
+        self.assertEqual(second_response.headers["ETag"], first_response.headers["ETag"])
+
+    def test_cache_is_keyed_by_query_string(self):
+        """Test to ensure that requests with different query strings are not served each other's responses."""
+        client, view = self.create_client(lambda: Response(b"model output"))
+        client.get("/models/1?variables=h")
+        client.get("/models/1?variables=zs")
+        self.assertEqual(view.call_count, 2)
+
+    def test_small_streamed_response_is_cached(self):
+        """Test to ensure that a streamed response is kept in memory once it has been streamed."""
+        client, view = self.create_client(lambda: Response(iter([b"model ", b"output"])))
+        client.get("/models/1")
+        response = client.get("/models/1")
+        self.assertEqual(response.data, b"model output")
+        self.assertEqual(view.call_count, 1)
+
+    def test_large_streamed_response_is_not_cached(self):
+        """Test to ensure that a streamed response larger than MAX_CACHED_RESPONSE_BYTES is streamed but not kept."""
+        chunks = [b"a" * 6, b"b" * 6]
+        client, view = self.create_client(lambda: Response(iter(chunks)))
+        with mock.patch.object(response_cache, "MAX_CACHED_RESPONSE_BYTES", 10):
+            first_response = client.get("/models/1")
+            second_response = client.get("/models/1")
+        # The whole response is still streamed to the client
+        self.assertEqual(first_response.data, b"".join(chunks))
+        self.assertEqual(second_response.data, b"".join(chunks))
+        self.assertEqual(view.call_count, 2)
+        self.assertEqual(response_cache._cached_bytes, 0)
+
+    def test_error_response_is_not_cached(self):
+        """Test to ensure that unsuccessful responses are not cached or given cache headers."""
+        client, view = self.create_client(lambda: Response(b"not found", status=404))
+        client.get("/models/1")
+        response = client.get("/models/1")
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(response.headers.get("Cache-Control"))
+        self.assertEqual(view.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
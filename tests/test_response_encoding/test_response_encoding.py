@@ -0,0 +1,96 @@
+import gzip
+import unittest
+import zlib
+
+import pyarrow as pa
+from flask import Flask, Response
+
+from src import response_encoding
+
+
+class ResponseEncodingTest(unittest.TestCase):
+    """Tests for response_encoding.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up arguments used for testing."""
+        cls.app = Flask(__name__)
+        cls.chunks = ['{"features": [', b'{"id": 1},' * 200, '{"id": 2}', "]}"]
+        cls.body = b"".join(chunk.encode() if isinstance(chunk, str) else chunk for chunk in cls.chunks)
+
+    def test_gzip_chunks_round_trip(self):
+        """Test to ensure that a stream compressed chunk by chunk with gzip decompresses to the original body."""
+        compressed_chunks = list(response_encoding._compress_chunks(self.chunks, "gzip"))
+        self.assertEqual(gzip.decompress(b"".join(compressed_chunks)), self.body)
+
+    def test_gzip_chunks_are_flushed(self):
+        """Test to ensure that each gzip compressed chunk can be decompressed as soon as it is received."""
+        compressed_chunks = response_encoding._compress_chunks(self.chunks, "gzip")
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        for chunk, compressed_chunk in zip(self.chunks, compressed_chunks):
+            chunk_bytes = chunk.encode() if isinstance(chunk, str) else chunk
+            self.assertEqual(decompressor.decompress(compressed_chunk), chunk_bytes)
+
+    @unittest.skipIf(response_encoding.brotli is None, "brotli is not installed")
+    def test_brotli_chunks_round_trip(self):
+        """Test to ensure that a stream compressed chunk by chunk with brotli decompresses to the original body."""
+        compressed_chunks = list(response_encoding._compress_chunks(self.chunks, "br"))
+        self.assertEqual(response_encoding.brotli.decompress(b"".join(compressed_chunks)), self.body)
+
+    def test_large_response_is_compressed(self):
+        """Test to ensure that a response is compressed with the compression accepted by the client."""
+        with self.app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            response = response_encoding.compress_response(Response(self.body))
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.vary)
+        self.assertEqual(gzip.decompress(response.get_data()), self.body)
+
+    def test_small_response_is_not_compressed(self):
+        """Test to ensure that a response smaller than MIN_COMPRESS_BYTES is not compressed."""
+        with self.app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            response = response_encoding.compress_response(Response(b"{}"))
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.get_data(), b"{}")
+
+    def test_response_is_not_compressed_without_accept_encoding(self):
+        """Test to ensure that a response is not compressed for a client that does not accept compression."""
+        with self.app.test_request_context():
+            response = response_encoding.compress_response(Response(self.body))
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_error_response_is_not_compressed(self):
+        """Test to ensure that error responses are not compressed."""
+        with self.app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            response = response_encoding.compress_response(Response(self.body, status=500))
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_streamed_response_is_compressed(self):
+        """Test to ensure that a streamed response is compressed chunk by chunk without a Content-Length."""
+        with self.app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            response = response_encoding.compress_response(Response(iter(self.chunks)))
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(gzip.decompress(b"".join(response.response)), self.body)
+
+    def test_json_is_the_default(self):
+        """Test to ensure that clients only receive Arrow IPC streams if they prefer them to JSON."""
+        for accept, expected_wants_arrow in (
+                ("*/*", False),
+                ("application/json", False),
+                (f"application/json, {response_encoding.ARROW_STREAM_MIMETYPE}", False),
+                (response_encoding.ARROW_STREAM_MIMETYPE, True),
+                (f"application/json;q=0.5, {response_encoding.ARROW_STREAM_MIMETYPE}", True),
+        ):
+            with self.subTest(accept=accept), self.app.test_request_context(headers={"Accept": accept}):
+                self.assertEqual(response_encoding.wants_arrow(), expected_wants_arrow)
+
+    def test_arrow_response_round_trip(self):
+        """Test to ensure that a table sent as an Arrow IPC stream is read back unchanged."""
+        table = pa.table({"x": pa.array([1.0, 2.0]), "h": pa.array([[0.5, None], None], pa.list_(pa.float32()))})
+        response = response_encoding.arrow_response(table)
+        self.assertEqual(response.mimetype, response_encoding.ARROW_STREAM_MIMETYPE)
+        self.assertTrue(pa.ipc.open_stream(response.get_data()).read_all().equals(table))
+
+
+if __name__ == "__main__":
+    unittest.main()
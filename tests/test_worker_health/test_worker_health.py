@@ -0,0 +1,146 @@
+import json
+import unittest
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+from src import worker_health
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands used by worker_health.py. Key expiry is not simulated."""
+
+    def __init__(self):
+        self.sorted_sets: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.values: Dict[str, bytes] = {}
+        self.lists: Dict[str, list] = defaultdict(list)
+
+    def pipeline(self) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def _members_in_range(self, key: str, min_score: Any, max_score: Any) -> List[str]:
+        # Scores may be given as "-inf" and "+inf", like Redis
+        return [
+            member for member, score in sorted(self.sorted_sets[key].items(), key=lambda item: item[1])
+            if float(min_score) <= score <= float(max_score)
+        ]
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> None:
+        self.sorted_sets[key].update(mapping)
+
+    def zremrangebyscore(self, key: str, min_score: Any, max_score: Any) -> None:
+        for member in self._members_in_range(key, min_score, max_score):
+            del self.sorted_sets[key][member]
+
+    def zrem(self, key: str, member: str) -> None:
+        self.sorted_sets[key].pop(member, None)
+
+    def zcount(self, key: str, min_score: Any, max_score: Any) -> int:
+        return len(self._members_in_range(key, min_score, max_score))
+
+    def zrangebyscore(self, key: str, min_score: Any, max_score: Any) -> List[bytes]:
+        return [member.encode() for member in self._members_in_range(key, min_score, max_score)]
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> None:
+        self.values[key] = value.encode()
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.values.get(key) for key in keys]
+
+    def delete(self, key: str) -> None:
+        self.values.pop(key, None)
+
+    def llen(self, key: str) -> int:
+        return len(self.lists[key])
+
+
+class FakePipeline:
+    """In-memory stand-in for a Redis pipeline, running the queued commands when it is executed."""
+
+    def __init__(self, redis_client: FakeRedis):
+        self.redis_client = redis_client
+        self.commands: List[Callable[[], Any]] = []
+
+    def __enter__(self) -> "FakePipeline":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.commands.clear()
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        command = getattr(self.redis_client, name)
+        return lambda *args, **kwargs: self.commands.append(lambda: command(*args, **kwargs))
+
+    def execute(self) -> List[Any]:
+        results = [command() for command in self.commands]
+        self.commands.clear()
+        return results
+
+
+class WorkerHealthTest(unittest.TestCase):
+    """Tests for worker_health.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up arguments used for testing."""
+        cls.worker_info = {"hostname": "celery@worker-1", "pid": 1, "queues": ["models"], "concurrency": 2}
+
+    def setUp(self):
+        """Create an empty fake Redis database."""
+        self.redis_client = FakeRedis()
+
+    def send_heartbeat_at(self, now: float, hostname: str = "celery@worker-1") -> None:
+        """Send a heartbeat for a worker at the given time."""
+        with mock.patch.object(worker_health.time, "time", return_value=now):
+            worker_health.send_heartbeat(self.redis_client, hostname, {**self.worker_info, "hostname": hostname})
+
+    def count_live_workers_at(self, now: float) -> int:
+        """Count the live workers at the given time."""
+        with mock.patch.object(worker_health.time, "time", return_value=now):
+            return worker_health.count_live_workers(self.redis_client)
+
+    def test_worker_is_live_within_ttl(self):
+        """Test to ensure that a worker is live until the heartbeat TTL has passed since its last heartbeat."""
+        self.send_heartbeat_at(1000)
+        self.assertEqual(self.count_live_workers_at(1000), 1)
+        self.assertEqual(self.count_live_workers_at(1000 + worker_health.HEARTBEAT_TTL), 1)
+        self.assertEqual(self.count_live_workers_at(1000 + worker_health.HEARTBEAT_TTL + 1), 0)
+
+    def test_repeated_heartbeats_count_once(self):
+        """Test to ensure that each worker is only counted once, however many heartbeats it has sent."""
+        for now in range(1000, 1000 + 4 * worker_health.HEARTBEAT_INTERVAL, worker_health.HEARTBEAT_INTERVAL):
+            self.send_heartbeat_at(now)
+        self.send_heartbeat_at(1000, hostname="celery@worker-2")
+        self.assertEqual(self.count_live_workers_at(1000 + worker_health.HEARTBEAT_TTL), 2)
+        self.assertEqual(self.count_live_workers_at(1000 + 4 * worker_health.HEARTBEAT_INTERVAL), 1)
+
+    def test_heartbeat_removes_dead_workers(self):
+        """Test to ensure that a heartbeat removes the workers that have missed their heartbeats."""
+        self.send_heartbeat_at(1000, hostname="celery@worker-2")
+        self.send_heartbeat_at(1000 + worker_health.HEARTBEAT_TTL + 1)
+        self.assertEqual(list(self.redis_client.sorted_sets[worker_health._HEARTBEATS_KEY]), ["celery@worker-1"])
+
+    def test_live_worker_details(self):
+        """Test to ensure that the details of live workers are returned with the time of their last heartbeat."""
+        self.send_heartbeat_at(1000, hostname="celery@worker-2")
+        self.send_heartbeat_at(1000 + worker_health.HEARTBEAT_TTL)
+        with mock.patch.object(worker_health.time, "time", return_value=1000 + worker_health.HEARTBEAT_TTL + 1):
+            live_workers = worker_health.get_live_workers(self.redis_client)
+        self.assertEqual(live_workers, [{**self.worker_info, "lastHeartbeat": 1000 + worker_health.HEARTBEAT_TTL}])
+
+    def test_stopped_worker_is_not_live(self):
+        """Test to ensure that a worker whose heartbeat is stopped is no longer live straight away."""
+        self.send_heartbeat_at(1000)
+        worker_health.stop_heartbeat(self.redis_client, "celery@worker-1")
+        self.assertEqual(self.count_live_workers_at(1000), 0)
+        self.assertEqual(self.redis_client.values, {})
+
+    def test_queue_depths(self):
+        """Test to ensure that the number of tasks waiting in each queue is counted."""
+        self.redis_client.lists["models"].extend([json.dumps({"task": "run_flood_model"})] * 3)
+        queue_depths = worker_health.get_queue_depths(self.redis_client, ["models", "interactive"])
+        self.assertEqual(queue_depths, {"models": 3, "interactive": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()